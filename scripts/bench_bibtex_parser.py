@@ -0,0 +1,111 @@
+import argparse
+import random
+import re
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from modules.bibtex_stream import clean_bibtex_entry, iter_bibtex_entries
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Benchmark the streaming BibTeX parser against the previous regex split parser")
+    ap.add_argument('--entries', type=int, required=False, default=100_000, help='Number of synthetic entries to generate (Default: 100000)')
+    ap.add_argument('--bib_file', type=Path, required=False, default=None, help='Benchmark an existing .bib file instead of a synthetic one')
+    return ap.parse_args()
+
+
+WORDS = ["rheumatoid", "arthritis", "methotrexate", "lupus", "vasculitis", "trial", "randomized",
+         "cohort", "outcomes", "biologic", "therapy", "patients", "inflammation", "synovitis"]
+
+
+def write_synthetic_bib(path: Path, n_entries: int):
+    rng = random.Random(0)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(n_entries):
+            title = " ".join(rng.choices(WORDS, k=12))
+            f.write(
+                f"@article{{key{i},\n"
+                f"  title = {{{title[:60]}\n           {title[60:]} in {{RA}}}},\n"
+                f"  author = {{Author{i}, A. and Other, {{B}}.}},\n"
+                f"  journal = \"Journal of {{Rheumatology}}\",\n"
+                f"  year = {2000 + i % 25},\n"
+                + (f"  doi = {{10.1000/bench.{i}}},\n" if i % 3 else "")
+                + f"  keywords = {{{', '.join(rng.choices(WORDS, k=3))}}}\n"
+                f"}}\n\n"
+            )
+
+
+def legacy_parse(file_path):
+    """The pre-streaming parse_bibtex, minus the DOI lookups."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        raw_text = f.read()
+    raw_text = re.split(r"\@\w+\{", raw_text)
+    articles = [i.strip() for i in raw_text if i.strip()]
+    processed_articles = [[i.strip() for i in entry.splitlines()] for entry in articles]
+
+    final_tex_dicts = []
+    for item in processed_articles:
+        key_value_pairs = [i.split(' = ') for i in item[1:] if ' = ' in i]
+        element_dict = {}
+        for element in key_value_pairs:
+            feature_values = re.sub(r'\{\\.*?\}', '', element[1])
+            feature_values = feature_values.replace('{', '').replace('}', '').replace('"', '').rstrip(',')
+            if element[0] in ["title", "url", "author", "doi", "keywords"]:
+                element_dict[element[0]] = feature_values.split(" and ") if element[0]=="author" else feature_values
+        final_tex_dicts.append(element_dict)
+    return final_tex_dicts
+
+
+def streaming_parse(file_path):
+    return [clean_bibtex_entry(entry) for entry in iter_bibtex_entries(file_path)]
+
+
+def streaming_count(file_path):
+    # Consume the stream without keeping the entries, as a pipeline would
+    return sum(1 for entry in iter_bibtex_entries(file_path) if clean_bibtex_entry(entry) is not None)
+
+
+def measure(fn, file_path):
+    # Time and peak memory are measured in separate runs since tracemalloc slows allocation down
+    start = time.perf_counter()
+    result = fn(file_path)
+    elapsed = time.perf_counter() - start
+    del result
+
+    tracemalloc.start()
+    result = fn(file_path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def mean_title_length(entries):
+    titles = [len(e.get('title', '')) for e in entries]
+    return sum(titles) / len(titles) if titles else 0.0
+
+
+def main():
+    args = parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        bib_file = args.bib_file
+        if bib_file is None:
+            bib_file = Path(tmp) / "bench.bib"
+            write_synthetic_bib(bib_file, args.entries)
+
+        size_mb = bib_file.stat().st_size / 1e6
+        print(f"[INFO] {bib_file} ({size_mb:.1f} MB)")
+
+        legacy, legacy_time, legacy_peak = measure(legacy_parse, bib_file)
+        streamed, _, _ = measure(streaming_parse, bib_file)
+        count, stream_time, stream_peak = measure(streaming_count, bib_file)
+
+    print(f"legacy    : {len(legacy):>8} entries  {legacy_time:7.2f} s  peak {legacy_peak / 1e6:8.2f} MB  "
+          f"mean title length {mean_title_length(legacy):6.1f} chars")
+    print(f"streaming : {count:>8} entries  {stream_time:7.2f} s  peak {stream_peak / 1e6:8.2f} MB  "
+          f"mean title length {mean_title_length(streamed):6.1f} chars")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import argparse
+import random
+import time
+from pathlib import Path
+from urllib.parse import urljoin
+from bs4 import BeautifulSoup
+from modules.pdf_links import find_pdf_link_in_html
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Benchmark PDF-link extraction from landing pages against the previous BeautifulSoup walk")
+    ap.add_argument('--size_kb', type=int, nargs='+', required=False, default=[100, 500, 2000],
+                    help='Sizes (kB) of the synthetic landing pages (Default: 100 500 2000)')
+    ap.add_argument('--html_file', type=Path, nargs='*', required=False, default=[],
+                    help='Also benchmark saved landing pages')
+    ap.add_argument('--base_url', required=False, default='https://example.org/article/1',
+                    help='URL relative links of the saved pages are resolved against')
+    ap.add_argument('--repeat', type=int, required=False, default=3, help='Runs per page; the best time is reported')
+    return ap.parse_args()
+
+
+def legacy_find_pdf_link_in_html(html_content, base_url):
+    """The BeautifulSoup version download.py used before the tiered extractor."""
+    try:
+        soup = BeautifulSoup(html_content, 'html.parser')
+
+        meta_tag = soup.find('meta', attrs={'name': 'citation_pdf_url'})
+        if meta_tag and meta_tag.get('content'):
+            return urljoin(base_url, meta_tag['content'])
+
+        for iframe in soup.find_all('iframe', src=True):
+            src = iframe['src']
+            if '.pdf' in src.lower() or 'pdf' in src.lower():
+                return urljoin(base_url, src)
+
+        for a_tag in soup.find_all('a', href=True):
+            text = a_tag.get_text().lower().strip()
+            href = a_tag['href']
+            if text in ['open', 'open pdf', 'download', 'download pdf']:
+                return urljoin(base_url, href)
+
+        for a_tag in soup.find_all('a', href=True):
+            href = a_tag['href'].strip()
+            if href.lower().endswith('.pdf'):
+                return urljoin(base_url, href)
+            if 'pdf' in a_tag.get_text().lower() and 'full' in a_tag.get_text().lower():
+                return urljoin(base_url, href)
+
+    except Exception as e:
+        print(f"[!] Error parsing HTML: {e}")
+    return None
+
+
+WORDS = ["rheumatoid", "arthritis", "methotrexate", "lupus", "vasculitis", "trial", "cohort",
+         "outcomes", "biologic", "therapy", "patients", "inflammation", "synovitis"]
+
+
+def filler(rng, size):
+    """Publisher-page padding: navigation links, paragraphs and an inline script."""
+    parts, total = [], 0
+    while total < size:
+        words = " ".join(rng.choices(WORDS, k=40))
+        part = (f'<div class="section"><a href="/topics/{rng.randrange(10**6)}">{rng.choice(WORDS).title()}</a>'
+                f'<p>{words} &amp; {words}</p>'
+                f'<script>var cfg = {{"id": {rng.randrange(10**6)}, "tpl": "<a href=\'x\'>"}};</script></div>\n')
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)
+
+
+def synthetic_pages(size_kb):
+    """One page per way the link is found, with ~size_kb of padding each."""
+    rng = random.Random(size_kb)
+    body = filler(rng, size_kb * 1000)
+    head = '<!DOCTYPE html><html><head><title>Article</title>{}</head><body>'
+    tail = '</body></html>'
+    return {
+        "citation_pdf_url meta": head.format('<meta name="citation_pdf_url" content="/doi/pdf/10.1000/abc?x=1&amp;y=2">') + body + tail,
+        "pdf viewer iframe": head.format('') + body + '<iframe src="/viewer/article.pdf#page=1"></iframe>' + tail,
+        "download button": head.format('') + body + '<a class="btn" href="/doi/epdf/10.1000/abc"><span> Download PDF </span></a>' + tail,
+        "link ending in .pdf": head.format('') + body + '<a href=" /files/article.PDF ">Article</a>' + tail,
+        "no link": head.format('') + body + tail,
+    }
+
+
+def timed(fn, page, base_url, repeat):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(page, base_url)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def report(name, page, base_url, repeat):
+    legacy, legacy_time = timed(legacy_find_pdf_link_in_html, page, base_url, repeat)
+    tiered, tiered_time = timed(find_pdf_link_in_html, page.encode('utf-8'), base_url, repeat)
+    speedup = legacy_time / tiered_time if tiered_time else float("inf")
+    match = "same" if legacy == tiered else f"DIFFERENT: {legacy!r} vs {tiered!r}"
+    print(f"{name:<40} {len(page) / 1e3:8.1f} kB  legacy {legacy_time:8.4f} s  tiered {tiered_time:8.4f} s  "
+          f"x{speedup:,.1f}  {match}")
+    return legacy == tiered
+
+
+def main():
+    args = parse_args()
+
+    matched = total = 0
+    for size_kb in args.size_kb:
+        for kind, page in synthetic_pages(size_kb).items():
+            matched += report(f"{kind} ({size_kb} kB)", page, args.base_url, args.repeat)
+            total += 1
+
+    for path in args.html_file:
+        page = path.read_text(encoding='utf-8', errors='replace')
+        matched += report(path.name, page, args.base_url, args.repeat)
+        total += 1
+
+    print(f"Same link as the legacy extractor on {matched}/{total} pages")
+
+
+if __name__ == "__main__":
+    main()
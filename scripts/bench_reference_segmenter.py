@@ -0,0 +1,85 @@
+import argparse
+import random
+import re
+import time
+from pathlib import Path
+from modules.reference_segmenter import segment_references
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Benchmark the reference segmenter against the previous lazy-regex split")
+    ap.add_argument('--references', type=int, nargs='+', required=False, default=[100, 200, 400],
+                    help='Bibliography sizes (number of references) of the synthetic inputs (Default: 100 200 400)')
+    ap.add_argument('--markdown_file', type=Path, nargs='*', required=False, default=[],
+                    help='Also benchmark existing bibliography / OCR markdown files')
+    return ap.parse_args()
+
+
+LEGACY_PATTERN = r'([A-Z][a-zA-Z]*[^\n]*\s*\(\d{4}\).*?)(?=\n[A-Z][a-zA-Z]*[^\n]*\s*\(\d{4}\)|\Z)'
+
+SURNAMES = ["Smith", "Jones", "Nguyen", "Garcia", "Muller", "Rossi", "Tanaka", "Dubois", "Kowalski", "Olsen"]
+WORDS = ["Rheumatoid", "arthritis", "Methotrexate", "lupus", "Vasculitis", "trial", "Randomized",
+         "cohort", "Outcomes", "biologic", "Therapy", "patients", "Inflammation", "synovitis"]
+
+
+def legacy_segment(bibliography):
+    """The split process_document_to_dict used before the segmenter."""
+    references = re.findall(LEGACY_PATTERN, bibliography, re.DOTALL)
+    return [ref.strip() for ref in references if ref.strip()]
+
+
+def author_year_reference(rng, i):
+    title = " ".join(rng.choices(WORDS, k=14))
+    return (f"{rng.choice(SURNAMES)}, A., {rng.choice(SURNAMES)}, B. and {rng.choice(SURNAMES)}, C. "
+            f"({1990 + i % 35}) {title}. Journal of Rheumatology {i % 60}({i % 12 + 1}), {i}-{i + 9}.")
+
+
+def numbered_reference(rng, i):
+    title = " ".join(rng.choices(WORDS, k=14))
+    return (f"{i + 1}. {rng.choice(SURNAMES)} A, {rng.choice(SURNAMES)} B, {rng.choice(SURNAMES)} C. {title}. "
+            f"J Rheumatol. {1990 + i % 35};{i % 60}({i % 12 + 1}):{i}-{i + 9}.")
+
+
+def synthetic_inputs(n_references):
+    """
+    Clean one-reference-per-line text, plus the worst cases seen in OCR output: the whole
+    list on one line, in author-year and in numbered (Vancouver) style.
+    """
+    rng = random.Random(n_references)
+    author_year = [author_year_reference(rng, i) for i in range(n_references)]
+    numbered = [numbered_reference(rng, i) for i in range(n_references)]
+    return {
+        "author-year lines": "\n".join(author_year),
+        "numbered lines": "\n".join(numbered),
+        "ocr author-year one-line": " ".join(author_year),
+        "ocr numbered one-line": " ".join(numbered),
+    }
+
+
+def timed(fn, text):
+    start = time.perf_counter()
+    result = fn(text)
+    return result, time.perf_counter() - start
+
+
+def report(name, text):
+    legacy, legacy_time = timed(legacy_segment, text)
+    segmented, segment_time = timed(segment_references, text)
+    speedup = legacy_time / segment_time if segment_time else float("inf")
+    print(f"{name:<40} {len(text) / 1e3:8.1f} kB  legacy {len(legacy):>5} refs {legacy_time:8.3f} s  "
+          f"segmenter {len(segmented):>5} refs {segment_time:8.4f} s  x{speedup:,.1f}")
+
+
+def main():
+    args = parse_args()
+
+    for n in args.references:
+        for kind, text in synthetic_inputs(n).items():
+            report(f"{kind} ({n} refs)", text)
+
+    for path in args.markdown_file:
+        report(path.name, path.read_text(encoding='utf-8'))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import asyncio
+import logging
+from datetime import date
+from pathlib import Path
+from modules.citation_graph import crawl_citations, DEFAULT_SPARQL_BATCH, DEFAULT_CONCURRENCY
+from modules.crossref_client import AsyncCrossrefClient
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Crawl the OpenCitations citation neighbourhood of a set of DOIs")
+    ap.add_argument('--seed_file', type=Path, required=True, help='Text file with one seed DOI per line')
+    ap.add_argument('--out_dir', type=Path, required=True, help='Dir for the edges, checkpoint and graph arrays - rerun with the same dir to resume')
+    ap.add_argument('--depth', type=int, required=False, default=1, help='Number of citation hops to follow (Default: 1)')
+    ap.add_argument('--batch_size', type=int, required=False, default=DEFAULT_SPARQL_BATCH, help='OMIDs per SPARQL query')
+    ap.add_argument('--concurrency', type=int, required=False, default=DEFAULT_CONCURRENCY, help='SPARQL queries in flight')
+    ap.add_argument('--log_dir', type=Path, required=False, default=Path('./localworkspace'), help='Default will be ./localworkspace')
+    return ap.parse_args()
+
+
+async def main():
+    args = parse_args()
+
+    args.log_dir.mkdir(parents=True, exist_ok=True)
+    log_file_path = args.log_dir / f"citation_crawl_{date.today():%Y-%m-%d}.log"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file_path),
+            logging.StreamHandler()
+        ]
+    )
+
+    with open(args.seed_file, 'r', encoding='utf-8') as f:
+        seed_dois = [line.strip() for line in f if line.strip()]
+    logger.info(f"Crawling {len(seed_dois)} seeds to depth {args.depth}")
+
+    async with AsyncCrossrefClient(concurrency=args.concurrency) as client:
+        graph = await crawl_citations(
+            seed_dois,
+            depth=args.depth,
+            out_dir=args.out_dir,
+            client=client,
+            batch_size=args.batch_size,
+            concurrency=args.concurrency,
+        )
+
+    logger.info(f"Finished crawl: {graph.num_nodes} nodes, {graph.num_edges} edges in {args.out_dir}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+import argparse
+import json
+import logging
+from datetime import date
+from pathlib import Path
+from modules.document_conversion import convert_directory, convert_documents, DEFAULT_TIMEOUT
+from modules.pdf_store import PDFStore
+from modules.title_index import TitleIndex
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Convert a directory of papers to body / bibliography records with DOIs")
+    source = ap.add_mutually_exclusive_group(required=True)
+    source.add_argument('--dir', type=Path, help='dir with the documents to convert (searched recursively)')
+    source.add_argument('--pdf_store', type=Path, help='PDF store written by download.py; each unique PDF is converted once and its rows list every paper id sharing it')
+    ap.add_argument('--out_file', type=Path, required=True, help='JSONL file the results are written to, one line per document')
+    ap.add_argument('--pattern', type=str, required=False, default='*.pdf', help='Glob of the files to convert (Default: *.pdf)')
+    ap.add_argument('--workers', type=int, required=False, default=None, help='Conversion processes (Default: CPU count)')
+    ap.add_argument('--timeout', type=float, required=False, default=DEFAULT_TIMEOUT, help='Seconds allowed per document')
+    ap.add_argument('--no_resolve', action='store_true', help='Only convert and split; skip the Crossref lookups')
+    ap.add_argument('--title_index', type=Path, required=False, default=None, help='Title index dir consulted before Crossref')
+    ap.add_argument('--log_dir', type=Path, required=False, default=Path('./localworkspace'), help='Default will be ./localworkspace')
+    return ap.parse_args()
+
+
+def main():
+    args = parse_args()
+
+    args.log_dir.mkdir(parents=True, exist_ok=True)
+    log_file_path = args.log_dir / f"convert_documents_{date.today():%Y-%m-%d}.log"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file_path),
+            logging.StreamHandler()
+        ]
+    )
+
+    title_index = TitleIndex(args.title_index) if args.title_index else None
+
+    kwargs = dict(workers=args.workers, timeout=args.timeout, title_index=title_index, resolve=not args.no_resolve)
+    if args.pdf_store:
+        with PDFStore(args.pdf_store) as store:
+            unique = {str(path): (digest, paper_ids) for digest, path, paper_ids in store.unique()}
+        logger.info(f"PDF store: {store.stats()}")
+        results = convert_documents(sorted(unique), **kwargs)
+    else:
+        unique = {}
+        results = convert_directory(args.dir, pattern=args.pattern, **kwargs)
+
+    converted = failed = 0
+    with open(args.out_file, 'a', encoding='utf-8') as f:
+        for result in results:
+            if result['file'] in unique:
+                result['sha256'], result['paper_ids'] = unique[result['file']]
+            if result['error']:
+                failed += 1
+                logger.info(f"Failed {result['file']}: {result['error']}")
+            else:
+                converted += 1
+                logger.info(f"Converted {result['file']}")
+            f.write(json.dumps(result, ensure_ascii=False) + '\n')
+            f.flush()
+
+    if title_index is not None:
+        title_index.save()
+        logger.info(f"Title index: {title_index.stats()}")
+    logger.info(f"Done: {converted} converted, {failed} failed, written to {args.out_file}")
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,13 @@ import asyncio
 from pathlib import Path
 from datetime import date
 import logging
-import json
-from modules.paper_to_doi import get_info_from_doi
+from modules.crossref_client import AsyncCrossrefClient
+from modules.paper_to_doi import CROSSREF_BATCH_SIZE
+from modules.response_cache import configure_cache, DEFAULT_CACHE_PATH
+from modules.fan_out import bounded_map, DEFAULT_CONCURRENCY, ORDERS
+from modules.record_io import iter_records
+from modules.pull_checkpoint import resume_rows, finish_resume
+from modules.pull_io import batched, json_writer
 
 logger = logging.getLogger(__name__)
 
@@ -17,73 +22,72 @@ def parse_args():
     ap.add_argument('--dir', type=Path,required=True, help='dir of the file with the doi of the papers - will also be where the output file will be saved')
     ap.add_argument('--paper_file', type=Path, required=True , help='path of the file')
     ap.add_argument('--log_dir', type=Path, required=False, default=Path('./localworkspace'),help='Default will be ./localworkspace')
-    return ap.parse_args()
-
-async def pulling_info(row_data , queue): 
-    for row in row_data: 
+    ap.add_argument('--cache_path', type=Path, required=False, default=DEFAULT_CACHE_PATH, help='SQLite file used to cache Crossref responses between runs')
+    ap.add_argument('--no_cache', action='store_true', help='Bypass the response cache entirely')
+    ap.add_argument('--refresh_cache', action='store_true', help='Ignore cached responses and overwrite them with fresh ones')
+    ap.add_argument('--timeout', type=float, required=False, default=30.0, help='Per-request timeout in seconds')
+    ap.add_argument('--batch_size', type=int, required=False, default=CROSSREF_BATCH_SIZE, help='DOIs resolved per Crossref request')
+    ap.add_argument('--concurrency', type=int, required=False, default=DEFAULT_CONCURRENCY, help='Batch requests in flight at once (pacing still follows the Crossref rate limit)')
+    ap.add_argument('--order', choices=ORDERS, required=False, default='input', help='Write results in input order or as they complete (Default: input)')
+    ap.add_argument('--output_file', type=Path, required=False, default=None, help='Results file (Default: <dir>/paper_journal_info_<date>.json). Pass the same file again with --resume')
+    ap.add_argument('--resume', action='store_true', help='Skip papers already in --output_file (required) and append to it instead of overwriting it')
+    ap.add_argument('--retry_errors', action='store_true', help='With --resume, look up again the papers whose error is not "No Error"')
+    args = ap.parse_args()
+    # The default output name carries the date, so resuming without it would quietly start over
+    if args.resume and (args.output_file is None or not args.output_file.exists()):
+        ap.error('--resume needs --output_file pointing at the results file of the earlier run')
+    return args
+
+def build_result(row, paper_info, error):
+    paper_info = paper_info or {}
+    return {
+        'paper_id': row.get('recordid.'),
+        'cross_ref_paper_title': paper_info.get('title', ''),
+        'paper_citation': row.get('citation'),
+        'paper_abstract' : row.get('abstract'),
+        'cross_ref_paper_doi': paper_info.get('doi', ''),
+        'cross_ref_paper_link': paper_info.get('document_link', ''),
+        'cross_ref_paper_license': paper_info.get('document_link', ''),
+        'error' : error
+    }
+
+async def pulling_batch(rows, client):
+    # One filter=doi:... request covers the whole batch; rows without a DOI are passed through
+    dois = [str(row.get('DOI')) if row.get('DOI') else None for row in rows]
+    infos = await client.get_info_from_dois(dois)
+
+    results = []
+    for row, doi, paper_info in zip(rows, dois, infos):
         logger.info(f"Processing paper: {row.get('recordid.')}")
-        doi =  str(row.get('DOI')) 
-        if not doi: 
-            logger.info(f'No DOI for paper {row.get('recordid.')}')
-            result = {
-            'paper_id': row.get('recordid.'),
-            'cross_ref_paper_title': paper_info.get('title', ''),
-            'paper_citation': row.get('citation'),
-            'paper_abstract' : row.get('abstract'),
-            'cross_ref_paper_doi': paper_info.get('doi', ''),
-            'cross_ref_paper_link': paper_info.get('document_link', ''),
-            'cross_ref_paper_license': paper_info.get('document_link', ''),
-            'error' : "No DOI"
-        }
-        paper_info = await asyncio.to_thread(get_info_from_doi, str(doi)) or {}
-        if paper_info: 
+        if not doi:
+            logger.info(f"No DOI for paper {row.get('recordid.')}")
+            result = build_result(row, None, "No DOI")
+        elif paper_info:
             logger.info(f"Found Information for paper {row.get('recordid.')} ")
-            result = {
-                'paper_id': row.get('recordid.'),
-                'cross_ref_paper_title': paper_info.get('title', ''),
-                'paper_citation': row.get('citation'),
-                'paper_abstract' : row.get('abstract'),
-                'cross_ref_paper_doi': paper_info.get('doi', ''),
-                'cross_ref_paper_link': paper_info.get('document_link', ''),
-                'cross_ref_paper_license': paper_info.get('document_link', ''),
-                'error' : "No Error"
-            }
-        else: 
-           logger.info(f"No information found for paper: {row.get('recordid.')}")
-           result = {
-                'paper_id': row.get('recordid.'),
-                'cross_ref_paper_title': '',
-                'paper_citation': row.get('citation'),
-                'paper_abstract': row.get('abstract'),
-                'cross_ref_paper_doi': '',
-                'cross_ref_paper_link': '',
-                'cross_ref_paper_license': '',
-                'error' : f"No information found for paper: {row.get('recordid.')}"
-            }
-        await queue.put(result)
+            result = build_result(row, paper_info, "No Error")
+        else:
+            logger.info(f"No information found for paper: {row.get('recordid.')}")
+            result = build_result(row, None, f"No information found for paper: {row.get('recordid.')}")
+        results.append(result)
+    return results
+
+async def pulling_info(row_data , queue, client, batch_size=CROSSREF_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY, order='input'):
+    # Up to `concurrency` batches are looked up at once
+    async for results in bounded_map(lambda batch: pulling_batch(batch, client), batched(row_data, batch_size),
+                                     concurrency=concurrency, order=order):
+        for result in results:
+            await queue.put(result)
     await queue.put(None) 
 
 
 
-async def json_writer(file_path, queue): 
-    with open(file_path, 'w', encoding='utf-8') as new_file:
-        
-        while True:
-            row = await queue.get()
-            if row is None:
-                break
-                
-            json_string = json.dumps(row, ensure_ascii=False)
-            new_file.write(json_string + '\n')
-
-
 async def main():
 
     args = parse_args()
 
     file_dir = args.dir
     file_path = file_dir / args.paper_file
-    result_path = file_dir / f"paper_journal_info_{date.today():%Y-%m-%d}.json"
+    result_path = args.output_file or file_dir / f"paper_journal_info_{date.today():%Y-%m-%d}.json"
 
     args.log_dir.mkdir(parents=True, exist_ok=True)
     log_file_path = args.log_dir / f"paper_info_extraction_{date.today():%Y-%m-%d}.log"
@@ -97,20 +101,30 @@ async def main():
         ]
     )
     
+    configure_cache(path=args.cache_path, enabled=not args.no_cache, refresh=args.refresh_cache)
+
     logger.info("Loaded Env File successfully.")
     logger.info(f"Starting to process papers from {file_path}")
 
 
-    with open(file_path, 'r', encoding='utf-8') as paper_file: 
-        for line in paper_file: 
-            row_data = json.loads(line)
+    # Rows are parsed lazily and handed to the lookups as they are read (JSONL or a JSON array)
+    row_data = iter_records(file_path)
 
-    queue = asyncio.Queue()
+    resumed_at = None
+    if args.resume:
+        row_data, resumed_at = resume_rows(row_data, result_path, retry_errors=args.retry_errors)
 
-    await asyncio.gather(
-        pulling_info(row_data, queue),
-        json_writer(result_path, queue)
-    )
+    queue = asyncio.Queue(maxsize=1000)
+
+    async with AsyncCrossrefClient(concurrency=args.concurrency, timeout=args.timeout) as client:
+        await asyncio.gather(
+            pulling_info(row_data, queue, client, batch_size=args.batch_size,
+                         concurrency=args.concurrency, order=args.order),
+            json_writer(result_path, queue, mode='a' if args.resume else 'w')
+        )
+
+    if args.resume:
+        finish_resume(result_path, resumed_at, retry_errors=args.retry_errors)
 
     logger.info(f"Finished processing. Results saved to {result_path}")
 if __name__ == "__main__":
@@ -3,16 +3,24 @@
 import asyncio
 import json
 import random
+import time
 from datetime import date
 import re
 import aiofiles
+import hashlib
 from pathlib import Path
 import argparse
 import logging
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin
+from urllib.parse import urlparse
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
 from curl_cffi.requests import AsyncSession
 from dotenv import load_dotenv
+from modules.pdf_links import find_pdf_link
+from modules.domain_strategy import DomainStrategyTable, DEFAULT_STRATEGY_PATH
+from modules.response_cache import ResponseCache, DEFAULT_CACHE_PATH, DEFAULT_NEGATIVE_TTL
+from modules.pdf_store import PDFStore
+from modules.retry_ledger import RetryLedger
 load_dotenv()
 
 logger = logging.getLogger(__name__)
@@ -23,10 +31,25 @@ logger = logging.getLogger(__name__)
 def parse_args(): 
     ap = argparse.ArgumentParser(description="Download Paper PDFS")
     ap.add_argument('--paper_meta_file' , required=True, type=Path, help='input file that contains paper links')
-    ap.add_argument('--pdf_save_dir' , required=True, type=Path, help='Dir to Save Downloaded PDFS')
+    ap.add_argument('--pdf_save_dir' , required=True, type=Path, help='Dir to Save Downloaded PDFS: unique PDFs go to <dir>/objects/<sha256>.pdf, <dir>/pdf_index.tsv maps paper ids to them (pass <dir> to olmocr_client.py and the index to inline_paper_annotation.py --pdf-index)')
     ap.add_argument("--num_workers" , required=True, type=int, help= 'Worker Allocation')
     ap.add_argument('--unextracted_dir', required=False, default=Path('./localworkspace'), type=Path, help='Dir to Save Unextracted Paper Metadata')
     ap.add_argument('--log_dir', type=Path, required=False, default=Path('./localworkspace'),help='Default will be ./localworkspace')
+    ap.add_argument('--max_per_host', type=int, required=False, default=DEFAULT_MAX_PER_HOST, help='Requests in flight to one host across all workers')
+    ap.add_argument('--domain_interval', type=float, required=False, default=DEFAULT_DOMAIN_INTERVAL, help='Minimum seconds between two requests to the same domain')
+    ap.add_argument('--domain_concurrency', type=int, required=False, default=DEFAULT_DOMAIN_CONCURRENCY, help='Papers from the same domain processed at once')
+    ap.add_argument('--max_pending', type=int, required=False, default=DEFAULT_MAX_PENDING, help='Papers read ahead of the workers before the loader waits')
+    ap.add_argument('--max_inflight_mb', type=int, required=False, default=DEFAULT_MAX_INFLIGHT_MB, help='Response bytes (in MB) being downloaded at once across all workers; each request reserves its share before it is sent')
+    ap.add_argument('--strategy_table', type=Path, required=False, default=DEFAULT_STRATEGY_PATH, help='SQLite file recording which mask and link strategy work on each domain')
+    ap.add_argument('--no_strategy_table', action='store_true', help='Always try masks and link strategies in the default order and record nothing')
+    ap.add_argument('--link_cache', type=Path, required=False, default=DEFAULT_CACHE_PATH, help='SQLite file caching the PDF links found on landing pages between runs')
+    ap.add_argument('--link_cache_ttl', type=float, required=False, default=DEFAULT_LINK_CACHE_TTL, help='Days a cached PDF link is reused')
+    ap.add_argument('--no_link_cache', action='store_true', help='Visit every landing page again and cache nothing')
+    ap.add_argument('--refresh_link_cache', action='store_true', help='Ignore cached links and overwrite them with fresh ones')
+    ap.add_argument('--retry_db', type=Path, required=False, default=None, help='SQLite file of failed attempts and scheduled retries (Default: <unextracted_dir>/<pdf dir name>_download_retries.sqlite)')
+    ap.add_argument('--retry_only', action='store_true', help='Ignore --paper_meta_file and retry the failed papers whose next attempt is due')
+    ap.add_argument('--import_existing', action='store_true', help="Move the '{paper_id}.pdf' files of earlier runs lying in --pdf_save_dir into the store (they are renamed to objects/<sha256>.pdf)")
+    ap.add_argument('--domain_config', type=Path, required=False, default=None, help='JSON file of per-domain overrides, e.g. {"onlinelibrary.wiley.com": {"min_interval": 4, "max_concurrency": 1}}')
     return ap.parse_args()
 
 
@@ -48,40 +71,6 @@ HEADERS = {
 
 
 
-def find_pdf_link_in_html(html_content, base_url):
-    try:
-        soup = BeautifulSoup(html_content, 'html.parser')
-
-        # STRATEGY 1: Meta tags
-        meta_tag = soup.find('meta', attrs={'name': 'citation_pdf_url'})
-        if meta_tag and meta_tag.get('content'):
-            return urljoin(base_url, meta_tag['content'])
-
-        # STRATEGY 2: Iframes
-        for iframe in soup.find_all('iframe', src=True):
-            src = iframe['src']
-            if '.pdf' in src.lower() or 'pdf' in src.lower():
-                return urljoin(base_url, src)
-
-        # STRATEGY 3: Buttons
-        for a_tag in soup.find_all('a', href=True):
-            text = a_tag.get_text().lower().strip()
-            href = a_tag['href']
-            if text in ['open', 'open pdf', 'download', 'download pdf']:
-                 return urljoin(base_url, href)
-
-        # STRATEGY 4: Links ending in .pdf
-        for a_tag in soup.find_all('a', href=True):
-            href = a_tag['href'].strip()
-            if href.lower().endswith('.pdf'):
-                return urljoin(base_url, href)
-            if 'pdf' in a_tag.get_text().lower() and 'full' in a_tag.get_text().lower():
-                 return urljoin(base_url, href)
-
-    except Exception as e:
-        print(f"[!] Error parsing HTML: {e}")
-    return None
-
 def get_smart_pdf_url(landing_url):
     """
     Predicts the PDF link based on the URL structure.
@@ -126,12 +115,441 @@ def get_smart_pdf_url(landing_url):
     return None
 
 
+def pdf_link_candidates(final_landing_url, scraped_link, link_strategy):
+    """
+    {strategy: link} of the distinct PDF links found for a landing page, in the default
+    order: the smart URL rewrite first on Wiley, the link scraped from the page first
+    elsewhere. 'meta' is a citation_pdf_url tag, 'scrape' any other link in the page.
+    """
+    scraped = ('meta' if link_strategy == 'meta' else 'scrape', scraped_link)
+    smart = ('smart', get_smart_pdf_url(final_landing_url))
+    ordered = [smart, scraped] if "onlinelibrary.wiley.com" in final_landing_url else [scraped, smart]
+
+    candidates = {}
+    for strategy, link in ordered:
+        if link and link not in candidates.values():
+            candidates[strategy] = link
+    return candidates
+
+
 
 # --- 3. ASYNC DOWNLOAD LOGIC ---
 
-async def download_one_paper(paper_info):
+# Impersonation masks, in the order they are tried. Priority: Edge -> Chrome -> Safari
+MASKS = ["edge101", "chrome120", "safari15_3"]
+
+# Requests in flight to a single host, across all workers
+DEFAULT_MAX_PER_HOST = 4
+
+
+class SessionPool:
+    """
+    Long-lived curl_cffi sessions shared by all download workers, one per impersonation mask.
+
+    Reusing a session keeps connections alive across papers (no new DNS / TCP / TLS
+    handshake per request) and keeps the cookies a publisher sets on its landing page
+    for the following papers from that host. Requests to one host are capped at
+    `max_per_host` at a time so that a batch dominated by one publisher does not open
+    a connection per worker against it.
+    """
+
+    def __init__(self, max_clients, max_per_host=DEFAULT_MAX_PER_HOST, masks=MASKS):
+        self.max_clients = max_clients
+        self.max_per_host = max_per_host
+        self.masks = masks
+        self._sessions = {}
+        self._host_limits = {}
+
+    def session(self, mask):
+        if mask not in self._sessions:
+            self._sessions[mask] = AsyncSession(impersonate=mask, max_clients=self.max_clients)
+        return self._sessions[mask]
+
+    def host_limit(self, url):
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_limits[host]
+
+    @asynccontextmanager
+    async def stream(self, url, mask, **kwargs):
+        """
+        GET `url` with the session for `mask` under the host's limit. The response is
+        returned once its headers arrive and the body is read with `aiter_content` /
+        `atext`. A body left unread is aborted on exit.
+        """
+        async with self.host_limit(url):
+            resp = await self.session(mask).get(url, stream=True, **kwargs)
+            try:
+                yield resp
+            finally:
+                if resp.quit_now is not None:
+                    resp.quit_now.set()  # Stop curl from fetching the rest of an unread body
+                await resp.aclose()
+
+    async def close(self):
+        for session in self._sessions.values():
+            try:
+                await session.close()
+            except Exception as e:
+                logger.info(f"[Sessions] Error closing session: {e}")
+        self._sessions = {}
+
+# Response bytes being downloaded at once across all workers
+DEFAULT_MAX_INFLIGHT_MB = 256
+# Days a landing page -> PDF link entry is reused (misses follow the cache's negative TTL)
+DEFAULT_LINK_CACHE_TTL = 30
+
+# Reserved for a PDF response that sends no Content-Length
+UNKNOWN_SIZE_RESERVATION = 8 * 1024 * 1024
+
+
+class ByteBudget:
+    """
+    Caps the bytes of response bodies being downloaded at once.
+
+    Once its headers arrive curl reads a streamed body into memory as fast as the
+    network delivers it, whether or not it is consumed, so a download can only wait for
+    budget before its request is sent: `reserve` takes UNKNOWN_SIZE_RESERVATION up front
+    and waits while the reservations in flight would exceed `limit`. When the headers
+    are in, `Reservation.resize` sets it to the Content-Length; that never waits, since
+    the body is already coming, but holds back the next requests. A reservation larger
+    than `limit` is capped at `limit`.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.used = 0
+        self._changed = asyncio.Condition()
+
+    @asynccontextmanager
+    async def reserve(self, size=UNKNOWN_SIZE_RESERVATION):
+        reservation = Reservation(self, min(size, self.limit))
+        async with self._changed:
+            await self._changed.wait_for(lambda: self.used + reservation.size <= self.limit)
+            self.used += reservation.size
+        try:
+            yield reservation
+        finally:
+            async with self._changed:
+                self.used -= reservation.size
+                self._changed.notify_all()
+
+
+class Reservation:
+    """Bytes held in a ByteBudget by one download; see `ByteBudget.reserve`."""
+
+    def __init__(self, budget, size):
+        self.budget = budget
+        self.size = size
+
+    async def resize(self, size):
+        size = min(size, self.budget.limit)
+        async with self.budget._changed:
+            self.budget.used += size - self.size
+            self.size = size
+            self.budget._changed.notify_all()
+
+
+def expected_size(resp):
+    try:
+        return int(resp.headers.get('Content-Length'))
+    except (TypeError, ValueError):
+        return UNKNOWN_SIZE_RESERVATION
+
+
+# Every PDF starts with this header; readers accept it within the first kilobyte
+PDF_MAGIC = b"%PDF-"
+SNIFF_BYTES = 1024
+# Content types a PDF is served under; an empty type is sniffed as well
+PDF_CONTENT_TYPES = ("application/pdf", "application/x-pdf", "application/octet-stream", "binary/octet-stream")
+
+
+class NotPDFError(Exception):
+    """A response announced as a PDF whose first bytes are not one (paywall, JS challenge...)."""
+
+
+def maybe_pdf(content_type):
+    return not content_type or any(t in content_type for t in PDF_CONTENT_TYPES)
+
+
+async def read_head(chunks, size=SNIFF_BYTES):
+    """Read from the chunk iterator `chunks` until `size` bytes or the end of the body."""
+    head = b""
+    async for chunk in chunks:
+        head += chunk
+        if len(head) >= size:
+            break
+    return head
+
+
+async def save_pdf_body(resp, part_file: Path):
+    """
+    Stream the body of `resp` to `part_file` chunk by chunk, hashing it on the way, and
+    return its SHA-256. The file is removed if the download fails, so an interrupted
+    download never leaves a truncated PDF behind.
+
+    The first kilobyte is checked for the %PDF- header before anything is written;
+    without it NotPDFError is raised and, once the response is closed, the transfer is
+    aborted instead of fetching the rest of a page that would be thrown away.
+    """
+    chunks = resp.aiter_content()
+    head = await read_head(chunks)
+    if PDF_MAGIC not in head:
+        content_type = resp.headers.get('Content-Type', '') or 'no Content-Type'
+        raise NotPDFError(f"Not a PDF ({content_type}, starts with {head[:24]!r})")
+
+    digest = hashlib.sha256(head)
+    try:
+        async with aiofiles.open(part_file, 'wb') as f:
+            await f.write(head)
+            async for chunk in chunks:
+                digest.update(chunk)
+                await f.write(chunk)
+    except BaseException:
+        part_file.unlink(missing_ok=True)
+        raise
+    return digest.hexdigest()
+
+
+async def save_pdf(resp, store: PDFStore, paper_id, reservation: Reservation):
+    """
+    Download the PDF body of `resp` into `store` under `paper_id`; returns its stored path.
+    `reservation`, taken before the request was sent, is set to the announced size.
+    """
+    await reservation.resize(expected_size(resp))
+    part_file = store.temp_path(paper_id)
+    digest = await save_pdf_body(resp, part_file)
+    path, duplicate = store.commit(paper_id, part_file, digest)
+    if duplicate:
+        logger.info(f"[PDF store] {paper_id} is a copy of {store.papers_for(digest)[0]}, not stored again")
+    return path
+
+
+# Politeness defaults per domain: minimum seconds between two requests (the old random
+# 1-3 s sleep averaged 2 s) and papers from the domain processed at once
+DEFAULT_DOMAIN_INTERVAL = 2.0
+DEFAULT_DOMAIN_CONCURRENCY = 2
+# Papers read from the input but not yet started; bounds the loader's memory
+DEFAULT_MAX_PENDING = 1000
+
+
+def normalize_landing_url(url):
+    """Rewrite linkinghub.elsevier.com redirector links to the ScienceDirect article page."""
+    if url and "linkinghub.elsevier.com" in url and "/pii/" in url:
+        try:
+            pii_id = url.split('/pii/')[-1].split('?')[0].split('/')[0]
+            return f"https://www.sciencedirect.com/science/article/pii/{pii_id}"
+        except:
+            pass
+    return url
+
+
+def url_domain(url):
+    return urlparse(url).netloc.lower()
+
+
+def paper_domain(paper_info):
+    """Domain a paper is scheduled under: the host of the first URL that will be tried."""
+    for key in ('url_1', 'url_2'):
+        if paper_info.get(key):
+            return url_domain(normalize_landing_url(paper_info[key]))
+    return ""
+
+
+class DomainScheduler:
+    """
+    Hands papers to the download workers per domain instead of in file order.
+
+    Papers wait in one ready queue per domain. `get` gives a worker the next paper of
+    any domain that is below its concurrency cap and whose minimum interval has
+    elapsed, rotating over domains, so a worker is never idle while some publisher is
+    allowed traffic. `pace` spaces the requests made to a host by at least its
+    interval (with a little jitter), replacing fixed sleeps.
+
+    Args:
+        default_interval (float): Seconds between two requests to a domain.
+        default_concurrency (int): Papers of one domain processed at once.
+        overrides (dict): {domain: {"min_interval": s, "max_concurrency": n}}; a key
+            also applies to its subdomains.
+        max_pending (int): Papers queued but not started before `put` blocks, which
+            keeps the loader from reading ahead of the workers.
+    """
+
+    def __init__(self, default_interval=DEFAULT_DOMAIN_INTERVAL,
+                 default_concurrency=DEFAULT_DOMAIN_CONCURRENCY, overrides=None,
+                 max_pending=DEFAULT_MAX_PENDING):
+        self.default_interval = default_interval
+        self.default_concurrency = default_concurrency
+        self.overrides = overrides or {}
+        self.max_pending = max_pending
+        self._queues = OrderedDict()  # domain -> deque of papers, in round-robin order
+        self._active = {}             # domain -> papers being processed
+        self._next_request = {}       # domain -> earliest time of the next request
+        self._pending = 0
+        self._closed = False
+        self._changed = asyncio.Condition()
+
+    def _setting(self, domain, name, default):
+        parts = domain.split('.')
+        for i in range(len(parts)):
+            override = self.overrides.get('.'.join(parts[i:]))
+            if override and name in override:
+                return override[name]
+        return default
+
+    def interval(self, domain):
+        return self._setting(domain, "min_interval", self.default_interval)
+
+    def concurrency(self, domain):
+        return self._setting(domain, "max_concurrency", self.default_concurrency)
+
+    def __len__(self):
+        return self._pending
+
+    async def put(self, paper_info):
+        async with self._changed:
+            await self._changed.wait_for(lambda: self._pending < self.max_pending)
+            self._queues.setdefault(paper_domain(paper_info), deque()).append(paper_info)
+            self._pending += 1
+            self._changed.notify_all()
+
+    async def close(self):
+        """Mark the end of the input; `get` returns None once every queue is drained."""
+        async with self._changed:
+            self._closed = True
+            self._changed.notify_all()
+
+    def _pick(self, now):
+        """Pop a paper of a ready domain, or return the seconds until one may become ready."""
+        wait = None
+        for domain, queue in self._queues.items():
+            if self._active.get(domain, 0) >= self.concurrency(domain):
+                continue
+            delay = self._next_request.get(domain, 0.0) - now
+            if delay <= 0:
+                paper_info = queue.popleft()
+                if queue:
+                    self._queues.move_to_end(domain)
+                else:
+                    del self._queues[domain]
+                self._active[domain] = self._active.get(domain, 0) + 1
+                self._pending -= 1
+                return paper_info, None
+            wait = delay if wait is None else min(wait, delay)
+        return None, wait
+
+    async def get(self):
+        """Next paper a worker may start, or None when the input is exhausted."""
+        async with self._changed:
+            while True:
+                paper_info, wait = self._pick(time.monotonic())
+                if paper_info is not None:
+                    self._changed.notify_all()  # Room may have been made for a blocked `put`
+                    return paper_info
+                if self._closed and not self._pending:
+                    return None
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def done(self, paper_info):
+        """Release the domain slot taken by `get`."""
+        domain = paper_domain(paper_info)
+        async with self._changed:
+            self._active[domain] -= 1
+            if not self._active[domain]:
+                del self._active[domain]
+            self._changed.notify_all()
+
+    async def pace(self, url):
+        """Wait until a request to the host of `url` is allowed and reserve that slot."""
+        domain = url_domain(url)
+        now = time.monotonic()
+        start = max(now, self._next_request.get(domain, 0.0))
+        self._next_request[domain] = start + self.interval(domain) * random.uniform(0.8, 1.2)
+        if start > now:
+            await asyncio.sleep(start - now)
+
+
+# Key prefix of the landing page -> PDF link entries in the link cache
+LINK_CACHE_PREFIX = "pdf-link:"
+
+
+def cached_pdf_links(link_cache: ResponseCache, url):
+    """
+    What an earlier run found on the landing page `url`: {"landing_url", "candidates",
+    "content_type"}, where empty candidates mean the page had no PDF link; or None if
+    the page is not cached.
+    """
+    cached = link_cache.get(LINK_CACHE_PREFIX + url)
+    return cached[1] if cached is not None else None
+
+
+def remember_pdf_links(link_cache: ResponseCache, urls, landing_url, candidates, content_type=None):
+    """Cache the links resolved for a landing page under each URL it was reached by."""
+    payload = {"landing_url": landing_url, "candidates": candidates, "content_type": content_type}
+    for url in dict.fromkeys(urls):
+        link_cache.set(LINK_CACHE_PREFIX + url, 200, payload, negative=not candidates)
+
+
+async def fetch_pdf(candidates, landing_url, mask, sessions, strategies, store, paper_id, budget):
+    """
+    STEP C: DOWNLOAD PDF, trying the candidate links in the order that worked on the site
+    of `landing_url` before. Only headers and the first bytes of a response that is not
+    a PDF are fetched. Returns (strategy, status, content_type, error): the strategy that
+    gave the PDF (None if none did), the status and type of the last response and why
+    it was not a PDF.
+    """
+    landing_domain = url_domain(landing_url)
+    pdf_headers = HEADERS.copy()
+    pdf_headers["Referer"] = landing_url
+    status = content_type = error = None
+    served_page = False
+
+    for attempt, strategy in enumerate(strategies.order(landing_domain, "strategy", candidates)):
+        # RECOVERY: only a page served instead of the PDF is worth the next candidate
+        if attempt and not served_page:
+            break
+        started = time.perf_counter()
+        # Budget is taken before the request: once headers arrive curl buffers the body
+        async with budget.reserve() as reservation, sessions.stream(
+            candidates[strategy],
+            mask,
+            headers=pdf_headers,
+            timeout=45
+        ) as pdf_resp:
+            status = pdf_resp.status_code
+            content_type = pdf_resp.headers.get('Content-Type', '').lower()
+            served_page = 'text/html' in content_type
+            error = None
+            if status == 200 and maybe_pdf(content_type):
+                try:
+                    await save_pdf(pdf_resp, store, paper_id, reservation)
+                except NotPDFError as e:
+                    error, served_page = str(e), True
+            else:
+                error = f"PDF req failed ({status}, {content_type or 'no Content-Type'})"
+
+        if status == 403:
+            break # Refused for the mask, not for the link
+        strategies.record(landing_domain, "strategy", strategy, error is None, time.perf_counter() - started)
+        if error is None:
+            return strategy, status, content_type, None
+    return None, status, content_type, error
+
+
+async def download_one_paper(paper_info, sessions, scheduler, store: PDFStore, budget: ByteBudget,
+                             strategies: DomainStrategyTable, link_cache: ResponseCache):
     """
     The core logic from your first script, converted to Asyncio.
+    All requests go through `sessions`, the pipeline-wide SessionPool, and are paced
+    per domain by `scheduler`. The PDF is streamed into `store` (see `save_pdf_body`)
+    and its path returned, so no PDF is ever held in memory as a whole. Masks and link
+    strategies are tried in the order `strategies` learned for the domain, and every
+    outcome is recorded there. Landing pages resolved by an earlier run are looked up in
+    `link_cache` and not fetched again.
     """
     paper_id = paper_info.get("paper_id")
     raw_urls = [paper_info.get('url_1'), paper_info.get('url_2')]
@@ -151,43 +569,59 @@ async def download_one_paper(paper_info):
         logging.info(log_dict)
         return None, paper_info
     
-    # We use AsyncSession for non-blocking HTTP requests
-    async with AsyncSession() as session:
-        error = "No specific error captured"
-        
-        # Priority: Edge -> Chrome -> Safari
-        masks = ["edge101", "chrome120", "safari15_3"]
-
-        for url in urls_to_try:
-            # --- PRE-FLIGHT FIX: Domain Correction ---
-            if "linkinghub.elsevier.com" in url and "/pii/" in url:
-                try:
-                    pii_id = url.split('/pii/')[-1].split('?')[0].split('/')[0]
-                    url = f"https://www.sciencedirect.com/science/article/pii/{pii_id}"
-                except:
-                    pass
-
-            for mask in masks:
-                try:
-                    # Random sleep to prevent being IP banned (essential even in async)
-                    await asyncio.sleep(random.uniform(1, 3))
-                    
-                    # print(f"[*] [{paper_id}] Visiting {url} (Mask: {mask})...")
-                    
-                    # STEP A: VISIT LANDING PAGE
-                    req_headers = HEADERS.copy()
-                    req_headers["Referer"] = "https://www.google.com/"
-                    
-                    landing_resp = await session.get(
-                        url, 
-                        headers=req_headers, 
-                        impersonate=mask, 
-                        timeout=30, 
-                        allow_redirects=True
-                    )
-                    
+    error = "No specific error captured"
+
+    for url in urls_to_try:
+        # --- PRE-FLIGHT FIX: Domain Correction ---
+        url = normalize_landing_url(url)
+        domain = url_domain(url)
+        masks = strategies.order(domain, "mask", MASKS)
+
+        # SHORTCUT: the landing page was resolved by an earlier run
+        cached = cached_pdf_links(link_cache, url)
+        if cached is not None:
+            if not cached["candidates"]:
+                error = "HTML loaded, no PDF link found (cached)"
+                continue # Known dead end
+            started = time.perf_counter()
+            try:
+                await scheduler.pace(url)
+                strategy, status, _, cached_error = await fetch_pdf(cached["candidates"], cached["landing_url"], masks[0],
+                                                                    sessions, strategies, store, paper_id, budget)
+                if strategy:
+                    strategies.record(domain, "mask", masks[0], True, time.perf_counter() - started)
+                    print(f"[+] [{paper_id}] Success (Cached link, {strategy})")
+                    return store.path_for(paper_id), paper_info
+                logger.info(f"[{paper_id}] Cached PDF link failed ({cached_error}), visiting {url} again")
+            except Exception as e:
+                logger.info(f"[{paper_id}] Cached PDF link failed ({e}), visiting {url} again")
+
+        # Default priority Edge -> Chrome -> Safari, reordered by what worked on this domain before
+        for mask in masks:
+            started = time.perf_counter()
+            try:
+                # Space requests to this publisher to prevent being IP banned
+                await scheduler.pace(url)
+                
+                # print(f"[*] [{paper_id}] Visiting {url} (Mask: {mask})...")
+                
+                # STEP A: VISIT LANDING PAGE
+                req_headers = HEADERS.copy()
+                req_headers["Referer"] = "https://www.google.com/"
+                
+                # The landing page may be the PDF itself, so it is budgeted like one
+                async with budget.reserve() as reservation, sessions.stream(
+                    url, 
+                    mask,
+                    headers=req_headers, 
+                    timeout=30, 
+                    allow_redirects=True
+                ) as landing_resp:
+                
                     if landing_resp.status_code == 403:
                         # print(f"    [!] [{paper_id}] 403 on landing. Rotating mask...")
+                        strategies.record(domain, "mask", mask, False, time.perf_counter() - started)
+                        error = "403 Forbidden on landing page"
                         log_dict["Error"] = landing_resp.status_code
                         logger.info(log_dict)
                         continue 
@@ -195,116 +629,109 @@ async def download_one_paper(paper_info):
                     final_landing_url = landing_resp.url
                     
                     # Check for direct PDF download
-                    if 'application/pdf' in landing_resp.headers.get('Content-Type', '').lower():
+                    landing_type = landing_resp.headers.get('Content-Type', '').lower()
+                    if landing_type and maybe_pdf(landing_type):
+                        try:
+                            pdf_path = await save_pdf(landing_resp, store, paper_id, reservation)
+                        except NotPDFError as e:
+                            error = str(e)
+                            break # The link itself serves something else; other masks get the same
+                        strategies.record(domain, "mask", mask, True, time.perf_counter() - started)
                         print(f"[+] [{paper_id}] Success (Direct)")
 
-                        return landing_resp.content, paper_info
-
-                    # STEP B: FIND THE PDF LINK
-                    pdf_target_url = None
-                    landing_text = landing_resp.text # Access text property once
-
-                    # CASE 1: ScienceDirect
-                    if "sciencedirect.com" in final_landing_url:
-                        # Prioritize Meta Tag
-                        scraped_link = find_pdf_link_in_html(landing_text, final_landing_url)
-                        if scraped_link:
-                            pdf_target_url = scraped_link
-                        else:
-                            pdf_target_url = get_smart_pdf_url(final_landing_url)
-
-                    # CASE 2: Wiley
-                    elif "onlinelibrary.wiley.com" in final_landing_url:
-                        # Prioritize Smart Link
-                        pdf_target_url = get_smart_pdf_url(final_landing_url)
-                        if not pdf_target_url:
-                            pdf_target_url = find_pdf_link_in_html(landing_text, final_landing_url)
-
-                    # CASE 3: Others
-                    else:
-                        pdf_target_url = find_pdf_link_in_html(landing_text, final_landing_url)
-                        if not pdf_target_url:
-                            pdf_target_url = get_smart_pdf_url(final_landing_url)
-                    
-                    if not pdf_target_url:
-                        error = "HTML loaded, no PDF link found"
-                        break # Page loaded fine, but empty. Don't retry masks.
-
-                    # STEP C: DOWNLOAD PDF
-                    pdf_headers = HEADERS.copy()
-                    pdf_headers["Referer"] = final_landing_url 
-                    
-                    pdf_resp = await session.get(
-                        pdf_target_url,
-                        headers=pdf_headers,
-                        impersonate=mask,
-                        timeout=45
-                    )
-
-                    content_type = pdf_resp.headers.get('Content-Type', '').lower()
-
-                    if pdf_resp.status_code == 200 and 'application/pdf' in content_type:
-                        print(f"[+] [{paper_id}] Success (Extracted)")
-                        # paper_download_logging_dict.update(
-                        #         Paper_Id=paper_id, 
-                        #         url_1=raw_urls[0] if raw_urls[0] else "",
-                        #         url_2=raw_urls[1] if raw_urls[1] else "",
-                        #         PDF_Extracted=True,
-                        #         Error=error
-            
-                        # )
-                        # logger.info(paper_download_logging_dict)
-                        return pdf_resp.content, paper_info
-                    
-                    # RECOVERY: Backup Scrape
-                    elif 'text/html' in content_type and "sciencedirect" not in final_landing_url:
-                        backup_link = find_pdf_link_in_html(landing_text, final_landing_url)
-                        if backup_link and backup_link != pdf_target_url:
-                            pdf_resp = await session.get(backup_link, headers=pdf_headers, impersonate=mask)
-                            if pdf_resp.status_code == 200 and 'application/pdf' in pdf_resp.headers.get('Content-Type', '').lower():
-                                print(f"[+] [{paper_id}] Success (Backup)")
-                                # paper_download_logging_dict.update(
-                                # Paper_Id=paper_id, 
-                                # url_1=raw_urls[0] if raw_urls[0] else "",
-                                # url_2=raw_urls[1] if raw_urls[1] else "",
-                                # PDF_Extracted=True,
-                                # Error=error
-            
-                                #     )
-                                # logger.info(paper_download_logging_dict)
-                                return pdf_resp.content, paper_info
+                        return pdf_path, paper_info
 
-                    if pdf_resp.status_code == 403:
-                        # print(f"    [!] [{paper_id}] 403 on PDF. Rotating mask...")
-                        log_dict["Error"] = "403 Forbidden on PDF target"
-                        logger.info(log_dict)
-                        continue 
-                    
-                    else:
-                        error = f"PDF req failed ({pdf_resp.status_code})"
+                    # 404, 429, 5xx...: left to the retry ledger, never cached as a dead end
+                    if not 200 <= landing_resp.status_code < 300:
+                        error = f"Landing page failed ({landing_resp.status_code}, {landing_type or 'no Content-Type'})"
                         log_dict["Error"] = error
                         logger.info(log_dict)
-                        break 
-
-                except Exception as e:
-                    # print(f"[!] [{paper_id}] Error: {e}")
-                    error = str(e)
-                    logger.info(error)
-        
-        paper_info["error"] = error
-        return None, paper_info
+                        break
+
+                    landing_html = await landing_resp.acontent() # Read the page once
+
+                # STEP B: FIND THE PDF LINK
+                # Byte prescan, then lxml if needed, in a thread so large pages do not stall the other workers
+                scraped_link, link_strategy = await find_pdf_link(landing_html, final_landing_url)
+                candidates = pdf_link_candidates(final_landing_url, scraped_link, link_strategy)
+                # Cached before the PDF is fetched: if that fails, a retry run skips straight to it.
+                # Only what an HTML page says is kept; anything else may read differently next time.
+                if 'html' in landing_type:
+                    remember_pdf_links(link_cache, [url, final_landing_url], final_landing_url, candidates)
+                
+                if not candidates:
+                    error = "HTML loaded, no PDF link found"
+                    break # Page loaded fine, but empty. Don't retry masks.
+
+                # STEP C: DOWNLOAD PDF
+                strategy, status, content_type, pdf_error = await fetch_pdf(candidates, final_landing_url, mask,
+                                                                            sessions, strategies, store, paper_id, budget)
+                if strategy:
+                    strategies.record(domain, "mask", mask, True, time.perf_counter() - started)
+                    remember_pdf_links(link_cache, [url, final_landing_url], final_landing_url,
+                                       {strategy: candidates[strategy]}, content_type)
+                    print(f"[+] [{paper_id}] Success (Extracted, {strategy})")
+                    return store.path_for(paper_id), paper_info
+
+                if status == 403:
+                    # print(f"    [!] [{paper_id}] 403 on PDF. Rotating mask...")
+                    strategies.record(domain, "mask", mask, False, time.perf_counter() - started)
+                    error = "403 Forbidden on PDF target"
+                    log_dict["Error"] = error
+                    logger.info(log_dict)
+                    continue 
+                
+                else:
+                    error = pdf_error
+                    log_dict["Error"] = error
+                    logger.info(log_dict)
+                    break 
+
+            except Exception as e:
+                # print(f"[!] [{paper_id}] Error: {e}")
+                error = str(e)
+                logger.info(error)
     
+    paper_info["error"] = error
+    return None, paper_info
+
 
 # --- 4. PIPELINE COMPONENTS (Producer/Consumer/Worker) ---
 
-async def load_papers_from_jsonl(input_file: Path, task_queue: asyncio.Queue):
+def as_url(value):
+    """Only string URLs are fetched (the license column may hold Crossref license objects)."""
+    return value if isinstance(value, str) and value.startswith("http") else None
+
+
+async def load_papers_from_jsonl(input_file: Path, scheduler: DomainScheduler, ledger: RetryLedger):
     """
-    Reads JSONL input and fills the queue.
+    Reads JSONL input and feeds the scheduler while the workers are already running.
+    `scheduler.put` blocks while too many papers are pending, so only a bounded window
+    of the file is in memory; the scheduler is closed (end of input) however this exits.
+    Papers the retry ledger holds back (dead, or next attempt not due) are skipped.
     """
-    if not input_file.exists():
-        print(f"Input file not found: {input_file}")
-        return
+    try:
+        if not input_file.exists():
+            print(f"Input file not found: {input_file}")
+            return
+        await _load_papers(input_file, scheduler, ledger)
+    finally:
+        await scheduler.close()
 
+
+async def load_due_retries(ledger: RetryLedger, scheduler: DomainScheduler):
+    """Feeds the scheduler the failed papers whose next attempt is due (--retry_only)."""
+    try:
+        due = ledger.due()
+        logger.info(f"[Loader] {len(due)} papers due for a retry.")
+        for task_item in due:
+            await scheduler.put(task_item)
+    finally:
+        await scheduler.close()
+
+
+async def _load_papers(input_file: Path, scheduler: DomainScheduler, ledger: RetryLedger):
+    loaded = held_back = 0
     async with aiofiles.open(input_file, 'r', encoding='utf-8') as f:
         seen_ids = set()
         async for line in f:
@@ -320,82 +747,115 @@ async def load_papers_from_jsonl(input_file: Path, task_queue: asyncio.Queue):
                     continue
                 seen_ids.add(paper_id)
 
+                if not ledger.should_try(paper_id):
+                    held_back += 1
+                    continue
+
                 # Normalize input for the worker
                 task_item = {
                     "paper_id": paper_id,
-                    "url_1": paper_data.get('cross_ref_paper_link'),
-                    "url_2": paper_data.get('cross_ref_paper_license') 
+                    "url_1": as_url(paper_data.get('cross_ref_paper_link')),
+                    "url_2": as_url(paper_data.get('cross_ref_paper_license'))
                 }
                 
-                await task_queue.put(task_item)
+                await scheduler.put(task_item)
+                loaded += 1
                 
             except json.JSONDecodeError:
                 pass
     
-    logger.info("[Loader] Finished loading all tasks into queue.")
+    logger.info(f"[Loader] Finished loading all {loaded} tasks ({held_back} held back by the retry ledger).")
 
 
-async def worker_pdf_downloader(pdf_fir:Path,
-                                task_queue: asyncio.Queue, 
+async def worker_pdf_downloader(store: PDFStore,
+                                scheduler: DomainScheduler, 
                                 extracted_queue: asyncio.Queue, 
                                 unextracted_queue: asyncio.Queue, 
-                                worker_id: int):
+                                worker_id: int,
+                                sessions: SessionPool,
+                                budget: ByteBudget,
+                                strategies: DomainStrategyTable,
+                                link_cache: ResponseCache,
+                                ledger: RetryLedger,
+                                dead_letter_queue: asyncio.Queue):
     """
-    Consumes tasks, runs the download logic, and sorts results.
+    Consumes tasks, runs the download logic, and sorts results. Failures are recorded in
+    the retry ledger; papers it gives up on go to the dead-letter queue instead of the
+    unextracted one.
     """
     while True:
-        paper_info = await task_queue.get()
+        # Any paper whose domain is currently allowed traffic
+        paper_info = await scheduler.get()
         
-        # Poison pill check
+        # End of input
         if paper_info is None:
-            task_queue.task_done()
             break
         
         try:
-            # Check if file already exists before processing
+            # Check the in-memory store index before processing
             paper_id = paper_info.get("paper_id")
-            target_file = pdf_fir / f"{paper_id}.pdf"
             
-            if target_file.exists():
+            if paper_id in store:
                 logger.info(f"[Worker {worker_id}] PDF {paper_id} exists. Skipping.")
                 # Treat as success but no bytes to save
-                paper_info["pdf_saved_path"] = str(target_file)
+                paper_info["pdf_saved_path"] = str(store.path_for(paper_id))
+                ledger.record_success(paper_id)
                 # await extracted_queue.put(paper_info) # Optional: Log as extracted?
                 # For now, just skip
             else:
                 # RUN THE DOWNLOAD
-                pdf_bytes, result_meta = await download_one_paper(paper_info)
+                started = time.perf_counter()
+                pdf_path, result_meta = await download_one_paper(paper_info, sessions, scheduler, store, budget, strategies, link_cache)
                 
-                if pdf_bytes:
+                if pdf_path:
                     logger.info({
                         "Paper_Id": paper_info.get('paper_id'),
                         "url_1": paper_info.get('url_1', ""),
                         "url_2": paper_info.get('url_2', ""),
                         "PDF_Extracted": True,
-                        "Error": "No Error"
+                        "Error": "No Error",
+                        "Seconds": round(time.perf_counter() - started, 2)
                     })
-                    result_meta["pdf_bytes"] = pdf_bytes # Pass bytes to writer
+                    logger.info(f"PDF Saved for {paper_id}")
+                    result_meta["pdf_path"] = str(pdf_path) # Only the path goes to the writer
+                    result_meta["pdf_sha256"] = store.digest_for(paper_id)
+                    ledger.record_success(paper_id)
                     await extracted_queue.put(result_meta)
                 else:
-                    await unextracted_queue.put(result_meta)
+                    await put_failure(result_meta, ledger, unextracted_queue, dead_letter_queue)
 
         except Exception as e:
             print(f"[Worker {worker_id}] Critical Error: {e}")
             paper_info["error"] = str(e)
-            await unextracted_queue.put(paper_info)
+            await put_failure(paper_info, ledger, unextracted_queue, dead_letter_queue)
         
         finally:
-            task_queue.task_done()
-
-
-async def writer(pdf_dir:Path, queue: asyncio.Queue, meta_path: Path, save_pdfs: bool = False):
+            await scheduler.done(paper_info)
+
+
+async def put_failure(paper_info, ledger: RetryLedger, unextracted_queue: asyncio.Queue, dead_letter_queue: asyncio.Queue):
+    """Record a failed paper in the retry ledger and queue it with its retry schedule."""
+    outcome = ledger.record_failure(paper_info, paper_info.get("error"))
+    paper_info["error_class"] = outcome["error_class"]
+    paper_info["attempts"] = outcome["attempts"]
+    if outcome["dead"]:
+        paper_info["attempt_history"] = [
+            {"attempted_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(at)), "error_class": error_class, "error": error}
+            for at, error_class, error in ledger.history(paper_info.get("paper_id"))
+        ]
+        await dead_letter_queue.put(paper_info)
+    else:
+        paper_info["next_attempt_at"] = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(outcome["next_attempt_at"]))
+        await unextracted_queue.put(paper_info)
+
+
+async def writer(queue: asyncio.Queue, meta_path: Path):
     """
-    Writes results to JSONL files and saves PDF bytes to disk.
+    Writes results to JSONL files. The PDFs themselves are already on disk, streamed
+    there by the workers.
     """
     # Ensure directory exists
     meta_path.parent.mkdir(parents=True, exist_ok=True)
-    if save_pdfs and not pdf_dir.exists():
-        pdf_dir.mkdir(parents=True, exist_ok=True)
 
     while True:
         item = await queue.get()
@@ -404,18 +864,6 @@ async def writer(pdf_dir:Path, queue: asyncio.Queue, meta_path: Path, save_pdfs:
             return
 
         try:
-            # Save PDF Bytes if present
-            if save_pdfs and "pdf_bytes" in item:
-                pdf_bytes = item.pop("pdf_bytes") # Remove bytes from metadata
-                paper_id = item.get("paper_id")
-                
-                target_file = pdf_dir / f"{paper_id}.pdf"
-                # Write sync (fast enough for SSD) or use run_in_executor
-                target_file.write_bytes(pdf_bytes)
-                logger.info(f"PDF Saved for {paper_id}")
-                
-                item["pdf_path"] = str(target_file)
-
             # Write Metadata
             async with aiofiles.open(meta_path, "a", encoding="utf-8") as f:
                 await f.write(json.dumps(item) + "\n")
@@ -428,13 +876,13 @@ async def writer(pdf_dir:Path, queue: asyncio.Queue, meta_path: Path, save_pdfs:
 
 
 async def main():
-    # 1. Setup Queues
-    task_queue = asyncio.Queue()
-    extracted_queue = asyncio.Queue()
-    unextracted_queue = asyncio.Queue()
-
     ap = parse_args()
     num_workers = ap.num_workers
+
+    # 1. Setup Queues (bounded, so a slow writer holds the workers back instead of piling up results)
+    extracted_queue = asyncio.Queue(maxsize=2 * num_workers)
+    unextracted_queue = asyncio.Queue(maxsize=2 * num_workers)
+    dead_letter_queue = asyncio.Queue(maxsize=2 * num_workers)
     input_file = ap.paper_meta_file
     pdf_dir = ap.pdf_save_dir
     unextracted_dir = ap.unextracted_dir
@@ -442,6 +890,8 @@ async def main():
     prefix = Path(pdf_dir).name
     extracted_paper_meta_path = pdf_dir / f"extracted_paper_meta_{date.today():%Y-%m-%d}.json"
     unextracted_paper_meta_path = unextracted_dir / f"{prefix}_pdf_unextracted_paper_meta_{date.today():%Y-%m-%d}.json"
+    dead_letter_path = unextracted_dir / f"{prefix}_pdf_dead_letter_{date.today():%Y-%m-%d}.json"
+    retry_db_path = ap.retry_db or unextracted_dir / f"{prefix}_download_retries.sqlite"
     ap.log_dir.mkdir(parents=True, exist_ok=True)
     log_file_path = ap.log_dir / f"pdf_extraction_{date.today():%Y-%m-%d}.log"
     
@@ -455,40 +905,60 @@ async def main():
             )
     logger.info(f"Starting to process papers from {input_file}")
 
+    overrides = json.loads(ap.domain_config.read_text(encoding='utf-8')) if ap.domain_config else {}
+    scheduler = DomainScheduler(ap.domain_interval, ap.domain_concurrency, overrides, max_pending=ap.max_pending)
 
+    # Failed attempts and their retry schedule, kept across runs
+    ledger = RetryLedger(retry_db_path)
 
-    # 2. Start Loader
+    # 2. Start Loader; it runs alongside the workers and closes the scheduler at the end of the input
     logger.info("[System] Loading papers...")
-    loader_task = asyncio.create_task(load_papers_from_jsonl(input_file, task_queue))
-    
-    # Wait for loader to finish (simplifies poison pill logic)
-    await loader_task
-
-    # 3. Add Poison Pills for Workers
-    for _ in range(num_workers):
-        await task_queue.put(None)
+    if ap.retry_only:
+        loader_task = asyncio.create_task(load_due_retries(ledger, scheduler))
+    else:
+        loader_task = asyncio.create_task(load_papers_from_jsonl(input_file, scheduler, ledger))
 
-    # 4. Start Workers
+    # 3. Start Workers (sharing one pool of keep-alive sessions)
     logger.info(f"[System] Starting {num_workers} workers...")
+    # PDFs are stored once per content hash; '{paper_id}.pdf' files of earlier runs are moved in on request
+    store = PDFStore(pdf_dir)
+    if ap.import_existing:
+        await asyncio.to_thread(store.import_directory, pdf_dir)
+    sessions = SessionPool(max_clients=num_workers, max_per_host=ap.max_per_host)
+    budget = ByteBudget(ap.max_inflight_mb * 1024 * 1024)
+    strategies = DomainStrategyTable(ap.strategy_table, enabled=not ap.no_strategy_table)
+    link_cache = ResponseCache(ap.link_cache, ttl=ap.link_cache_ttl * 24 * 3600, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                               enabled=not ap.no_link_cache, refresh=ap.refresh_link_cache)
     workers = [
-        asyncio.create_task(worker_pdf_downloader(pdf_dir, task_queue, extracted_queue, unextracted_queue, i))
+        asyncio.create_task(worker_pdf_downloader(store, scheduler, extracted_queue, unextracted_queue, i, sessions, budget, strategies, link_cache,
+                                                   ledger, dead_letter_queue))
         for i in range(num_workers)
     ]
 
-    # 5. Start Writers
+    # 4. Start Writers
     logger.info("[System] Starting writers...")
-    extract_writer = asyncio.create_task(writer(pdf_dir,extracted_queue, extracted_paper_meta_path, save_pdfs=True))
-    unextract_writer = asyncio.create_task(writer(pdf_dir,unextracted_queue, unextracted_paper_meta_path, save_pdfs=False))
+    extract_writer = asyncio.create_task(writer(extracted_queue, extracted_paper_meta_path))
+    unextract_writer = asyncio.create_task(writer(unextracted_queue, unextracted_paper_meta_path))
+    dead_letter_writer = asyncio.create_task(writer(dead_letter_queue, dead_letter_path))
 
-    # 6. Wait for Workers to finish
-    await asyncio.gather(*workers)
-    logger.info("[System] All workers finished.")
-
-    # 7. Signal Writers to finish
+    # 5. Wait for the Loader and Workers to finish
+    try:
+        await asyncio.gather(loader_task, *workers)
+    finally:
+        await sessions.close()
+        strategies.close()
+        link_cache.close()
+        store.close()
+    logger.info(f"[System] All workers finished. PDF store: {store.stats()}")
+    logger.info(f"[System] Retry ledger: {ledger.stats()}")
+    ledger.close()
+
+    # 6. Signal Writers to finish
     await extracted_queue.put(None)
     await unextracted_queue.put(None)
+    await dead_letter_queue.put(None)
     
-    await asyncio.gather(extract_writer, unextract_writer)
+    await asyncio.gather(extract_writer, unextract_writer, dead_letter_writer)
     logger.info("[System] Extraction pipeline complete.")
 
 if __name__ == "__main__":
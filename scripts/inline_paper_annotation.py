@@ -19,6 +19,7 @@ from exllamav2.generator import ExLlamaV2DynamicGenerator, ExLlamaV2Sampler
 
 from LLM_Agent.inference import inline_llm_call 
 from LLM_Agent.util.tokenizer_args import universal_encode, prompt_logic
+from modules.pdf_store import read_index
 
 
 resize_lock = threading.RLock()
@@ -34,6 +35,7 @@ def parse_args():
     ap.add_argument("--max-ctx", type=int, default=122880, help="Maximum context window size (Default: 122880).")
     ap.add_argument("--max-new", type=int, default=1024, help="Maximum new tokens to generate (Default: 1024).")
     ap.add_argument("--chunk-size", type=int, default=8192, help="Chunk size for attention processing (Default: 8192).")
+    ap.add_argument("--pdf-index", type=Path, default=None, help="pdf_index.tsv of the download.py PDF store. Papers OCR'd from its objects/ dir are named by PDF hash; each is annotated once and written under every paper id that maps to it.")
     return ap.parse_args()
 
 def setup_logging(log_dir: Path):
@@ -170,16 +172,32 @@ Do NOT use markdown code fences (```json). Just output the raw text and JSON.
     formatted_prompt = prompt_logic_dict['format_func'](header_prompt, paper_content, footer_prompt)
     return formatted_prompt, is_truncated
 
-def load_md_papers(input_path: Path) -> List[Dict[str, str]]:
+def load_md_papers(input_path: Path, pdf_index: Dict[str, List[str]] | None = None) -> List[Dict]:
+    """
+    One entry per .md file. The file stem is the paper id, unless `pdf_index` (from
+    `read_index`) maps it, as a PDF hash, to the paper ids sharing that PDF.
+    """
     list_of_papers = []
     for filename in os.listdir(input_path):
         if not filename.endswith(".md"): 
             continue
         paper_path = input_path / filename
+        paper_ids = (pdf_index or {}).get(paper_path.stem)
+        if pdf_index is not None and not paper_ids:
+            logging.warning(f"{filename} is not in the PDF index; annotating it under its file name")
         with paper_path.open("r", encoding="utf-8") as f:
-            list_of_papers.append({"paper_id": paper_path.stem, "paper_text": f.read()})
+            list_of_papers.append({
+                "paper_id": paper_path.stem,
+                "paper_ids": paper_ids or [paper_path.stem],
+                "paper_text": f.read(),
+            })
     return list_of_papers
 
+
+def per_paper(record: Dict, paper_ids: List[str]) -> List[Dict]:
+    """A copy of the annotation `record` for every paper id sharing the PDF."""
+    return [{**record, "paper_id": paper_id} for paper_id in paper_ids]
+
 def main():
     args = parse_args()
     
@@ -231,11 +249,13 @@ def main():
     t.start()
 
     # Process Papers
-    papers = load_md_papers(args.input_dir)
+    pdf_index = read_index(args.pdf_index) if args.pdf_index else None
+    papers = load_md_papers(args.input_dir, pdf_index)
     print(f"Loaded {len(papers)} papers from {args.input_dir}")
 
     for paper in papers:
         paper_id = paper['paper_id']
+        paper_ids = paper['paper_ids']
         paper_text = paper['paper_text']
         
         encoded_paper = universal_encode(paper_text, tokenizer)
@@ -243,12 +263,12 @@ def main():
 
         if paper_token_len >= 135000:
             print(f'Paper {paper_id} Too Big ({paper_token_len}), Risk of losing context')
-            annotated_q.put({
+            annotated_q.put(per_paper({
                 'paper_id': paper_id, 
                 'trials': [], 
                 'truncated': True, 
                 'error': 'Paper Too Big (>135k), annotate manually'
-            })
+            }, paper_ids))
             continue
         
         paper_with_prompt, truncated_flag = ensure_context_length(paper_text, tokenizer, prompt_logic, max_prompt_tokens)
@@ -258,10 +278,10 @@ def main():
             records = inline_llm_call(generator, tokenizer, sampler, args.max_new, paper_with_prompt, paper_id)
             records['truncated'] = truncated_flag
             print(f"Successfully Annotated {paper_id}")
-            annotated_q.put(records)
+            annotated_q.put(per_paper(records, paper_ids))
         except Exception as e:
             print(f"Error annotating {paper_id}: {str(e)}")
-            annotated_q.put({'paper_id': paper_id, 'trials': [], 'truncated': truncated_flag, 'error': str(e)})
+            annotated_q.put(per_paper({'paper_id': paper_id, 'trials': [], 'truncated': truncated_flag, 'error': str(e)}, paper_ids))
 
     # Shutdown
     annotated_q.put(SENTINEL)
@@ -20,7 +20,7 @@ def parse_args():
     ap.add_argument("--gpu-memory-utilization", type=float, default=0.95, help="Fraction of GPU memory to use (0–1, default: 0.9)")
     ap.add_argument("--out-dir", type=Path, required=False, default=Path('./pdfsoutput'), help="Directory to write outputs/logs")
     ap.add_argument("--markdown", action="store_true", required=False, help="If set, save outputs in Markdown format")
-    ap.add_argument("--input-dir", type=Path, required=True, help="Directory containing PDFs")
+    ap.add_argument("--input-dir", type=Path, required=True, help="Directory containing PDFs, or the --pdf_save_dir of download.py (its objects/ dir is used; outputs are named by PDF hash, see pdf_index.tsv)")
     ap.add_argument("--recursive", action="store_true", help="Recurse into subdirectories for PDFs")
     ap.add_argument("--pattern", required=False, default=None, help="Optional additional Path.match() pattern to filter PDFs")
     ap.add_argument("--log_dir", type=Path, required=False, default=('./localworkspace'),help='Default will be ./localworkspace')
@@ -169,6 +169,20 @@ def run_olmocr_pipeline(port: int, input_dir: Path, out_dir: Path, markdown: boo
     print("[INFO] Pipeline finished successfully")
     print(f"[INFO] Done. Outputs in: {out_dir}")
 
+# Layout written by download.py (modules.pdf_store): unique PDFs in objects/<sha256>.pdf,
+# paper ids in pdf_index.tsv. This env does not install the project, hence the literals.
+STORE_INDEX = "pdf_index.tsv"
+STORE_OBJECTS = "objects"
+
+
+def resolve_pdf_dir(input_dir: Path) -> Path:
+    """The directory holding the PDFs: `objects/` when `input_dir` is a PDF store."""
+    if (input_dir / STORE_INDEX).exists() and (input_dir / STORE_OBJECTS).is_dir():
+        print(f"[INFO] {input_dir} is a PDF store; reading {input_dir / STORE_OBJECTS} (map outputs back with {input_dir / STORE_INDEX})")
+        return input_dir / STORE_OBJECTS
+    return input_dir
+
+
 def list_pdfs(base: Path, recursive: bool, pattern: str | None):
     if recursive:
         it = base.rglob("*.pdf")
@@ -203,9 +217,10 @@ def main():
 
 
 
-    pdfs = list_pdfs(args.input_dir, recursive=args.recursive, pattern=args.pattern)
+    pdf_dir = resolve_pdf_dir(args.input_dir)
+    pdfs = list_pdfs(pdf_dir, recursive=args.recursive, pattern=args.pattern)
     if not pdfs:
-        print(f"[ERROR] No PDFs found in {args.input_dir}", file=sys.stderr)
+        print(f"[ERROR] No PDFs found in {pdf_dir}", file=sys.stderr)
         sys.exit(2)
 
     print("Found PDFS")
@@ -216,7 +231,7 @@ def main():
     try:
         run_olmocr_pipeline(
             port=args.port,
-            input_dir= args.input_dir,  
+            input_dir= pdf_dir,  
             out_dir=args.out_dir,
             markdown=args.markdown,
             log_fh=log_fh,
@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import logging
+from datetime import date
+from pathlib import Path
+from modules.crossref_client import AsyncCrossrefClient
+from modules.paper_to_doi import CROSSREF_BATCH_SIZE
+from modules.response_cache import configure_cache, DEFAULT_CACHE_PATH
+from modules.reference_resolver import extract_title_and_info, resolve_title
+from modules.title_index import TitleIndex, DEFAULT_THRESHOLD
+from modules.fan_out import bounded_map, DEFAULT_CONCURRENCY, ORDERS
+from modules.record_io import iter_records
+from modules.pull_checkpoint import resume_rows, finish_resume
+from modules.pull_io import batched, json_writer
+
+logger = logging.getLogger(__name__)
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Resolve papers with Crossref: by DOI first, then by the title in their citation")
+    ap.add_argument('--dir', type=Path, required=True, help='dir of the file with the papers - will also be where the output file will be saved')
+    ap.add_argument('--paper_file', type=Path, required=True, help='path of the file (JSONL or a JSON array)')
+    ap.add_argument('--log_dir', type=Path, required=False, default=Path('./localworkspace'), help='Default will be ./localworkspace')
+    ap.add_argument('--cache_path', type=Path, required=False, default=DEFAULT_CACHE_PATH, help='SQLite file used to cache Crossref responses between runs')
+    ap.add_argument('--no_cache', action='store_true', help='Bypass the response cache entirely')
+    ap.add_argument('--refresh_cache', action='store_true', help='Ignore cached responses and overwrite them with fresh ones')
+    ap.add_argument('--timeout', type=float, required=False, default=30.0, help='Per-request timeout in seconds')
+    ap.add_argument('--batch_size', type=int, required=False, default=CROSSREF_BATCH_SIZE, help='Rows per batch; their DOIs are resolved with one Crossref request')
+    ap.add_argument('--concurrency', type=int, required=False, default=DEFAULT_CONCURRENCY, help='Batches in flight at once (pacing still follows the Crossref rate limit)')
+    ap.add_argument('--order', choices=ORDERS, required=False, default='input', help='Write results in input order or as they complete (Default: input)')
+    ap.add_argument('--title_index', type=Path, required=False, default=None, help='Directory of the local title index checked before Crossref title search (created if missing)')
+    ap.add_argument('--title_threshold', type=float, required=False, default=DEFAULT_THRESHOLD, help='Minimum similarity for a title index match')
+    ap.add_argument('--output_file', type=Path, required=False, default=None, help='Results file (Default: <dir>/paper_info_<date>.json). Pass the same file again with --resume')
+    ap.add_argument('--resume', action='store_true', help='Skip papers already in --output_file (required) and append to it instead of overwriting it')
+    ap.add_argument('--retry_errors', action='store_true', help='With --resume, look up again the papers whose error is not "No Error"')
+    args = ap.parse_args()
+    # The default output name carries the date, so resuming without it would quietly start over
+    if args.resume and (args.output_file is None or not args.output_file.exists()):
+        ap.error('--resume needs --output_file pointing at the results file of the earlier run')
+    return args
+
+
+def build_result(row, paper_info, match_source, error):
+    paper_info = paper_info or {}
+    return {
+        'paper_id': row.get('recordid.'),
+        'cross_ref_paper_title': paper_info.get('title', ''),
+        'paper_citation': row.get('citation'),
+        'paper_abstract': row.get('abstract'),
+        'cross_ref_paper_doi': paper_info.get('doi', ''),
+        'cross_ref_paper_link': paper_info.get('document_link', ''),
+        'cross_ref_paper_license': paper_info.get('license', ''),
+        'match_source': match_source,
+        'error': error
+    }
+
+
+async def lookup_title(row, client, title_index=None):
+    """Title fallback for one row. Returns (paper_info, match_source, error)."""
+    cleaned_title = extract_title_and_info(row.get('citation') or '')
+    if not cleaned_title:
+        return None, None, 'Could Not extract title from citation'
+
+    try:
+        paper_info, match_source = await resolve_title(client, cleaned_title, title_index, with_source=True)
+    except Exception as e:
+        return None, None, f"Title lookup failed: {e}"
+    if not paper_info:
+        return None, None, 'No Information found'
+    return paper_info, match_source, 'No Error'
+
+
+async def pulling_batch(rows, client, title_index=None):
+    # Every DOI of the batch in one filter=doi:... request ...
+    dois = [str(row.get('DOI')) if row.get('DOI') else None for row in rows]
+    infos = await client.get_info_from_dois(dois, addLicense=True)
+
+    # ... then the rows it did not resolve go to title search, concurrently
+    fallback = [i for i, info in enumerate(infos) if not info]
+    titled = await asyncio.gather(*(lookup_title(rows[i], client, title_index) for i in fallback))
+    titled = dict(zip(fallback, titled))
+
+    results = []
+    for i, (row, paper_info) in enumerate(zip(rows, infos)):
+        if paper_info:
+            result = build_result(row, paper_info, 'doi', 'No Error')
+        else:
+            paper_info, match_source, error = titled[i]
+            result = build_result(row, paper_info, match_source, error)
+        logger.info(f"Paper {row.get('recordid.')}: {result['match_source'] or result['error']}")
+        results.append(result)
+    return results
+
+
+async def pulling_info(row_data, queue, client, title_index=None, batch_size=CROSSREF_BATCH_SIZE,
+                       concurrency=DEFAULT_CONCURRENCY, order='input'):
+    async for results in bounded_map(lambda batch: pulling_batch(batch, client, title_index),
+                                     batched(row_data, batch_size), concurrency=concurrency, order=order):
+        for result in results:
+            await queue.put(result)
+    await queue.put(None)  # Signal that processing is done
+
+
+async def main():
+    args = parse_args()
+    file_path = args.dir / args.paper_file
+    result_path = args.output_file or args.dir / f"paper_info_{date.today():%Y-%m-%d}.json"
+
+    args.log_dir.mkdir(parents=True, exist_ok=True)
+    log_file_path = args.log_dir / f"paper_info_extraction_{date.today():%Y-%m-%d}.log"
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file_path),
+            logging.StreamHandler()
+        ]
+    )
+
+    configure_cache(path=args.cache_path, enabled=not args.no_cache, refresh=args.refresh_cache)
+
+    logger.info(f"Starting to process papers from {file_path}")
+
+    row_data = iter_records(file_path)
+
+    resumed_at = None
+    if args.resume:
+        row_data, resumed_at = resume_rows(row_data, result_path, retry_errors=args.retry_errors)
+
+    queue = asyncio.Queue(maxsize=1000)
+
+    title_index = TitleIndex(args.title_index, threshold=args.title_threshold) if args.title_index else None
+
+    async with AsyncCrossrefClient(concurrency=args.concurrency, timeout=args.timeout) as client:
+        _, counts = await asyncio.gather(
+            pulling_info(row_data, queue, client, title_index, batch_size=args.batch_size,
+                         concurrency=args.concurrency, order=args.order),
+            json_writer(result_path, queue, mode='a' if args.resume else 'w', count_field='match_source')
+        )
+
+    if title_index is not None:
+        title_index.save()
+        logger.info(f"Title index: {title_index.stats()}")
+
+    if args.resume:
+        finish_resume(result_path, resumed_at, retry_errors=args.retry_errors)
+
+    logger.info(f"Match sources: {counts}")
+    logger.info(f"Finished processing. Results saved to {result_path}")
+
+if __name__ == "__main__":
+    asyncio.run(main())
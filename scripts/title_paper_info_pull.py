@@ -1,10 +1,16 @@
-import json
 import argparse
 import asyncio
 import logging
 from datetime import date
 from pathlib import Path
-from modules.paper_to_doi import get_article_info_from_title
+from modules.crossref_client import AsyncCrossrefClient
+from modules.response_cache import configure_cache, DEFAULT_CACHE_PATH
+from modules.reference_resolver import extract_title_and_info, resolve_title
+from modules.title_index import TitleIndex, DEFAULT_THRESHOLD
+from modules.fan_out import bounded_map, DEFAULT_CONCURRENCY, ORDERS
+from modules.record_io import iter_records
+from modules.pull_checkpoint import resume_rows, finish_resume
+from modules.pull_io import json_writer
 
 logger = logging.getLogger(__name__)
 
@@ -14,94 +20,85 @@ def parse_args():
     ap.add_argument('--dir', type=Path,required=True, help='dir of the file with the doi of the papers - will also be where the output file will be saved')
     ap.add_argument('--paper_file', type=Path, required=True , help='path of the file')
     ap.add_argument('--log_dir', type=Path, required=False, default=Path('./localworkspace'),help='Default will be ./localworkspace')
-    return ap.parse_args()
-
-
+    ap.add_argument('--cache_path', type=Path, required=False, default=DEFAULT_CACHE_PATH, help='SQLite file used to cache Crossref responses between runs')
+    ap.add_argument('--no_cache', action='store_true', help='Bypass the response cache entirely')
+    ap.add_argument('--refresh_cache', action='store_true', help='Ignore cached responses and overwrite them with fresh ones')
+    ap.add_argument('--timeout', type=float, required=False, default=30.0, help='Per-request timeout in seconds')
+    ap.add_argument('--title_index', type=Path, required=False, default=None, help='Directory of the local title index checked before Crossref (created if missing)')
+    ap.add_argument('--title_threshold', type=float, required=False, default=DEFAULT_THRESHOLD, help='Minimum similarity for a title index match')
+    ap.add_argument('--concurrency', type=int, required=False, default=DEFAULT_CONCURRENCY, help='Lookups in flight at once (pacing still follows the Crossref rate limit)')
+    ap.add_argument('--order', choices=ORDERS, required=False, default='input', help='Write results in input order or as they complete (Default: input)')
+    ap.add_argument('--output_file', type=Path, required=False, default=None, help='Results file (Default: <dir>/paper_journal_info_<date>.json). Pass the same file again with --resume')
+    ap.add_argument('--resume', action='store_true', help='Skip papers already in --output_file (required) and append to it instead of overwriting it')
+    ap.add_argument('--retry_errors', action='store_true', help='With --resume, look up again the papers whose error is not "No Error"')
+    args = ap.parse_args()
+    # The default output name carries the date, so resuming without it would quietly start over
+    if args.resume and (args.output_file is None or not args.output_file.exists()):
+        ap.error('--resume needs --output_file pointing at the results file of the earlier run')
+    return args
+
+
+
+async def pulling_row(row, client, title_index=None):
+    logger.info(f"Processing paper: {row.get('recordid.')}")
+    cleaned_title = extract_title_and_info(row.get('citation') or '')
+    if not cleaned_title: 
+        logger.info("Could not extract title from citation")
+        result = {
+        'paper_id': row.get('recordid.'),
+        'cross_ref_paper_title': '',
+        'cross_ref_paper_doi': '',
+        'cross_ref_paper_link': '',
+        'paper_citation': row.get('citation'),
+        'paper_abstract' : row.get('abstract'),
+        'error': 'Could Not extract title from citation'
+    }
+        return result
+        
+    paper_info = await resolve_title(client, str(cleaned_title), title_index) or {}
+    if paper_info:
+        logger.info(f"Found Information for paper {row.get('recordid.')}")
+        result = {
+        'paper_id': row.get('recordid.'),
+        'cross_ref_paper_title': paper_info.get('title', ''),
+        'cross_ref_paper_doi': paper_info.get('doi', ''),
+        'cross_ref_paper_link': paper_info.get('document_link', ''),
+        'paper_citation': row.get('citation'),
+        'paper_abstract' : row.get('abstract'),
+        'error': 'No Error'
+    }
 
-def extract_title_and_info(citation: str) -> str:
-    # Split the citation by period
-    parts = [p.strip() for p in citation.split('.') if p.strip()]
-    
-    # Expect: [authors, title, journal/info, ...]
-    if len(parts) >= 3:
-        # Join title and journal/info
-        return f"{parts[1]}. {parts[2]}.{parts[3]}"
-    elif len(parts) == 2:
-        # If no journal info, return just the title
-        return parts[1]
     else:
-        return ""
-
 
+        logging.info(f"No information found for paper: {row.get('recordid.')}")
+        result = {
+        'paper_id': row.get('recordid.'),
+        'cross_ref_paper_title': '',
+        'cross_ref_paper_doi': '',
+        'cross_ref_paper_link': '',
+        'paper_citation': row.get('citation'),
+        'paper_abstract' : row.get('abstract'),
+        'error': 'No Information found'
+    }
+    
+    return result
 
 
-async def pulling_info (row_data , queue): 
-    
-    for row in row_data: 
-        logger.info(f"Processing paper: {row.get('recordid.')}")
-        cleaned_title = extract_title_and_info(row.get('citation'))
-        if not cleaned_title: 
-            logger.info("Could not extract title from citation")
-            result = {
-            'paper_id': row.get('recordid.'),
-            'cross_ref_paper_title': paper_info.get('title', ''),
-            'cross_ref_paper_doi': paper_info.get('doi', ''),
-            'cross_ref_paper_link': paper_info.get('document_link', ''),
-            'paper_citation': row.get('citation'),
-            'paper_abstract' : row.get('abstract'),
-            'error': 'Could Not extract title from citation'
-        }
-            
-        paper_info = await asyncio.to_thread(get_article_info_from_title, str(cleaned_title)) or {}
-        if paper_info:
-            logger.info(f"Found Information for paper {row[0]}")
-            result = {
-            'paper_id': row.get('recordid.'),
-            'cross_ref_paper_title': paper_info.get('title', ''),
-            'cross_ref_paper_doi': paper_info.get('doi', ''),
-            'cross_ref_paper_link': paper_info.get('document_link', ''),
-            'paper_citation': row.get('citation'),
-            'paper_abstract' : row.get('abstract'),
-            'error': 'No Error'
-        }
-
-        else:
-
-            logging.info(f"No information found for paper: {row.get('recordid.')}")
-            result = {
-            'paper_id': row.get('recordid.'),
-            'cross_ref_paper_title': paper_info.get('title', ''),
-            'cross_ref_paper_doi': '',
-            'cross_ref_paper_link': '',
-            'paper_citation': row.get('citation'),
-            'paper_abstract' : row.get('abstract'),
-            'error': 'No Information found'
-        }
-        
+async def pulling_info (row_data , queue, client, title_index=None, concurrency=DEFAULT_CONCURRENCY, order='input'):
+    # Up to `concurrency` rows are looked up at once
+    async for result in bounded_map(lambda row: pulling_row(row, client, title_index), row_data,
+                                    concurrency=concurrency, order=order):
         await queue.put(result)
-        
+
     await queue.put(None)  # Signal that processing is done
     
     
-async def json_writer(file_path, queue): 
-    with open(file_path, 'w', encoding='utf-8') as new_file:
-        
-        while True:
-            row = await queue.get()
-            if row is None:
-                break
-                
-            json_string = json.dumps(row, ensure_ascii=False)
-            new_file.write(json_string + '\n')
-            
-            
-            
 async def main():
 
     args = parse_args()
     file_dir = args.dir
     file_path = file_dir / args.paper_file
-    result_path = file_dir / f"paper_journal_info_{date.today():%Y-%m-%d}.json"
+    result_path = args.output_file or file_dir / f"paper_journal_info_{date.today():%Y-%m-%d}.json"
 
 
     args.log_dir.mkdir(parents=True, exist_ok=True)
@@ -117,19 +114,34 @@ async def main():
         ]
     )
     
+    configure_cache(path=args.cache_path, enabled=not args.no_cache, refresh=args.refresh_cache)
+
     logger.info("Loaded Env File successfully.")
     logger.info(f"Starting to process papers from {file_path}")
 
-    with open(file_path, 'r', encoding='utf-8') as paper_file: 
-        for line in paper_file: 
-            row_data = json.loads(line)
+    # Rows are parsed lazily and handed to the lookups as they are read (JSONL or a JSON array)
+    row_data = iter_records(file_path)
+
+    resumed_at = None
+    if args.resume:
+        row_data, resumed_at = resume_rows(row_data, result_path, retry_errors=args.retry_errors)
     
-    queue = asyncio.Queue()
+    queue = asyncio.Queue(maxsize=1000)
     
-    await asyncio.gather(
-        pulling_info(row_data, queue),
-        json_writer(result_path, queue)
-    )
+    title_index = TitleIndex(args.title_index, threshold=args.title_threshold) if args.title_index else None
+
+    async with AsyncCrossrefClient(concurrency=args.concurrency, timeout=args.timeout) as client:
+        await asyncio.gather(
+            pulling_info(row_data, queue, client, title_index, concurrency=args.concurrency, order=args.order),
+            json_writer(result_path, queue, mode='a' if args.resume else 'w')
+        )
+
+    if title_index is not None:
+        title_index.save()
+        logger.info(f"Title index: {title_index.stats()}")
+
+    if args.resume:
+        finish_resume(result_path, resumed_at, retry_errors=args.retry_errors)
 
     logger.info(f"Finished processing. Results saved to {result_path}")
 
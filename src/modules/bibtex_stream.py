@@ -0,0 +1,211 @@
+import re
+
+# Fields kept by `clean_bibtex_entry`, matching what parse_bibtex has always returned
+BIBTEX_FIELDS = ("title", "url", "author", "doi", "keywords")
+
+# Entry types that carry no bibliographic record
+_SKIPPED_TYPES = {"comment", "preamble", "string"}
+
+_HEAD_RE = re.compile(r"@\s*([A-Za-z]\w*)\s*([{(])")
+_FIELD_NAME_RE = re.compile(r"\s*([^\s=,{}()\"#]+)\s*=\s*")
+_SIMPLE_FIELD_RE = re.compile(
+    r'\s*([^\s=,{}()"#]+)\s*=\s*(?:\{([^{}]*)\}|"([^"{}]*)"|([^\s,#{}()"]+))\s*(?:,|$)'
+)
+_BARE_VALUE_RE = re.compile(r"[^\s,#})]+")
+_DELIMS_RE = {"{": re.compile(r"[{}]"), "(": re.compile(r"[()]")}
+_BRACE_RE = _DELIMS_RE["{"]
+_QUOTE_OR_BRACE_RE = re.compile(r'["{}]')
+_WS_RE = re.compile(r"\s*")
+_LATEX_CMD_RE = re.compile(r"\{\\.*?\}")
+
+
+def _closing_brace(text, start):
+    """Index of the brace closing the one at `text[start]`, or -1 if unbalanced."""
+    depth = 0
+    for m in _BRACE_RE.finditer(text, start):
+        depth += 1 if m.group() == "{" else -1
+        if depth == 0:
+            return m.start()
+    return -1
+
+
+def _closing_quote(text, start):
+    """Index of the '"' closing the one at `text[start]`; quotes inside braces do not count."""
+    depth = 0
+    for m in _QUOTE_OR_BRACE_RE.finditer(text, start + 1):
+        c = m.group()
+        if c == "{":
+            depth += 1
+        elif c == "}":
+            depth -= 1
+        elif depth == 0:
+            return m.start()
+    return -1
+
+
+def parse_bibtex_entry(text):
+    """
+    Parse the text of one complete entry, '@type{key, field = value, ...}'.
+
+    Values may be brace-delimited (with nested braces), quoted, bare numbers/macros or
+    '#'-concatenations of those, and may span several lines.
+
+    Returns:
+        dict or None: {"ENTRYTYPE", "ID", <field>: <raw value>, ...} with lowercased
+            field names, or None for @comment/@preamble/@string and malformed entries.
+    """
+    head = _HEAD_RE.match(text)
+    if not head or head.group(1).lower() in _SKIPPED_TYPES:
+        return None
+
+    body_start = head.end()
+    body_end = text.rfind("}" if head.group(2) == "{" else ")")
+    if body_end < body_start:
+        return None
+    body = text[body_start:body_end]
+
+    key, _, rest = body.partition(",")
+    entry = {"ENTRYTYPE": head.group(1).lower(), "ID": key.strip()}
+
+    i, n = 0, len(rest)
+    while i < n:
+        simple = _SIMPLE_FIELD_RE.match(rest, i)
+        if simple:
+            # Single flat value: {...} without nested braces, "..." or a bare word
+            name, braced, quoted, bare = simple.groups()
+            entry[name.lower()] = braced if braced is not None else quoted if quoted is not None else bare
+            i = simple.end()
+            continue
+
+        name = _FIELD_NAME_RE.match(rest, i)
+        if not name:
+            break
+        i = name.end()
+
+        parts = []
+        while i < n:
+            c = rest[i]
+            if c == "{":
+                # Fast path for the common flat value; fall back to depth tracking when nested
+                end = rest.find("}", i + 1)
+                nested = rest.find("{", i + 1)
+                if nested != -1 and nested < end:
+                    end = _closing_brace(rest, i)
+                if end == -1:
+                    return None
+                parts.append(rest[i + 1:end])
+                i = end + 1
+            elif c == '"':
+                end = _closing_quote(rest, i)
+                if end == -1:
+                    return None
+                parts.append(rest[i + 1:end])
+                i = end + 1
+            else:
+                bare = _BARE_VALUE_RE.match(rest, i)
+                if not bare:
+                    break
+                parts.append(bare.group())
+                i = bare.end()
+
+            i = _WS_RE.match(rest, i).end()
+            if i < n and rest[i] == "#":
+                i = _WS_RE.match(rest, i + 1).end()
+                continue
+            break
+
+        entry[name.group(1).lower()] = "".join(parts)
+
+        comma = rest.find(",", i)
+        if comma == -1:
+            break
+        i = comma + 1
+
+    return entry
+
+
+def iter_bibtex_entries(file_path, encoding="utf-8"):
+    """
+    Stream the entries of a BibTeX file one at a time.
+
+    The file is read line by line and only the entry currently being read is held in
+    memory, so arbitrarily large exports are parsed in constant memory and in a single
+    linear pass. Text between entries is ignored, as BibTeX does.
+
+    Args:
+        file_path (str | Path): The BibTeX file.
+        encoding (str): File encoding.
+
+    Yields:
+        dict: Raw entries as returned by `parse_bibtex_entry`.
+    """
+    with open(file_path, "r", encoding=encoding) as fh:
+        parts = []   # Pieces of the entry being collected
+        depth = 0
+        delims = None
+        for line in fh:
+            while line:
+                if delims is None:
+                    # Outside an entry: look for the next '@type{'
+                    at = line.find("@")
+                    if at == -1:
+                        break
+                    head = _HEAD_RE.match(line, at)
+                    if not head:
+                        line = line[at + 1:]
+                        continue
+                    delims = _DELIMS_RE[head.group(2)]
+                    opening = head.group(2)
+                    closing = "}" if opening == "{" else ")"
+                    parts = [line[at:head.end()]]
+                    depth = 1
+                    line = line[head.end():]
+                    continue
+
+                # Inside an entry: track delimiter depth until the entry closes.
+                # Depth only returns to zero at the end of an entry, so a line that leaves it
+                # positive (and cannot start another entry) is taken whole without scanning.
+                balance = depth + line.count(opening) - line.count(closing)
+                if balance > 0 and "@" not in line:
+                    depth = balance
+                    parts.append(line)
+                    break
+
+                end = -1
+                for m in delims.finditer(line):
+                    depth += 1 if m.group() == opening else -1
+                    if depth == 0:
+                        end = m.end()
+                        break
+
+                if end == -1:
+                    parts.append(line)
+                    break
+
+                parts.append(line[:end])
+                entry = parse_bibtex_entry("".join(parts))
+                if entry is not None:
+                    yield entry
+                parts, delims = [], None
+                line = line[end:]
+
+
+def clean_bibtex_value(value):
+    """Strip LaTeX commands, braces and quotes from a field value and collapse whitespace."""
+    value = _LATEX_CMD_RE.sub("", value)
+    value = value.replace("{", "").replace("}", "").replace('"', "")
+    return " ".join(value.split())
+
+
+def clean_bibtex_entry(entry, fields=BIBTEX_FIELDS):
+    """
+    Reduce a raw entry to the cleaned dictionary `parse_bibtex` returns: only `fields`
+    are kept and 'author' is split into a list of names.
+    """
+    cleaned = {}
+    for name, value in entry.items():
+        if name not in fields:
+            continue
+        value = clean_bibtex_value(value)
+        cleaned[name] = value.split(" and ") if name == "author" else value
+    return cleaned
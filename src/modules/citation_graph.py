@@ -0,0 +1,250 @@
+import asyncio
+import json
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from modules.crossref_client import AsyncCrossrefClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SPARQL_BATCH = 50     # OMIDs per VALUES clause
+DEFAULT_CONCURRENCY = 4       # SPARQL queries in flight
+CHECKPOINT_EVERY = 20         # Batches between two state checkpoints
+
+_EDGES_FILE = "edges.tsv"
+_STATE_FILE = "state.json"
+_IDS_FILE = "ids.txt"
+
+
+class CitationGraph:
+    """
+    Citation graph in compressed sparse row form.
+
+    Node i is `ids[i]` (an OMID such as 'br/0612058700'); the entities citing it are
+    `indices[indptr[i]:indptr[i + 1]]`. Two int arrays plus the id table keep millions of
+    edges in a few bytes each, and `load` memory-maps the arrays.
+
+    Args:
+        ids (list): Node identifiers, position = node number.
+        indptr (np.ndarray): int64 array of length len(ids) + 1.
+        indices (np.ndarray): int32 array of citing node numbers.
+    """
+
+    def __init__(self, ids, indptr, indices):
+        self.ids = list(ids)
+        self.indptr = indptr
+        self.indices = indices
+        self._positions = None
+
+    @classmethod
+    def from_edges(cls, edges, nodes=()):
+        """
+        Build the graph from (cited, citing) identifier pairs. Duplicate edges are dropped;
+        `nodes` adds identifiers that should be present even without edges (e.g. seeds).
+        """
+        positions = {node: i for i, node in enumerate(dict.fromkeys(nodes))}
+        cited, citing = [], []
+        for a, b in edges:
+            cited.append(positions.setdefault(a, len(positions)))
+            citing.append(positions.setdefault(b, len(positions)))
+
+        n = len(positions)
+        if cited:
+            pairs = np.unique(np.stack([np.asarray(cited, dtype=np.int64), np.asarray(citing, dtype=np.int64)], axis=1), axis=0)
+        else:
+            pairs = np.empty((0, 2), dtype=np.int64)
+        # np.unique sorts the rows, so pairs are already grouped by cited node
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pairs[:, 0], minlength=n), out=indptr[1:])
+        indices = pairs[:, 1].astype(np.int32)
+
+        graph = cls(positions.keys(), indptr, indices)
+        graph._positions = positions
+        return graph
+
+    @property
+    def num_nodes(self):
+        return len(self.ids)
+
+    @property
+    def num_edges(self):
+        return len(self.indices)
+
+    def node(self, omid):
+        """Node number of `omid`, or None if it is not in the graph."""
+        if self._positions is None:
+            self._positions = {omid: i for i, omid in enumerate(self.ids)}
+        return self._positions.get(omid)
+
+    def citing(self, omid):
+        """OMIDs of the entities citing `omid`."""
+        i = self.node(omid)
+        if i is None:
+            return []
+        return [self.ids[j] for j in self.indices[self.indptr[i]:self.indptr[i + 1]]]
+
+    def in_degree(self):
+        """Number of citations received by every node, as an array aligned with `ids`."""
+        return np.diff(self.indptr)
+
+    def transpose(self):
+        """Graph with the edges reversed (node -> the entities it cites)."""
+        rows = np.repeat(np.arange(self.num_nodes, dtype=np.int64), np.diff(self.indptr))
+        order = np.argsort(self.indices, kind="stable")
+        indptr = np.zeros(self.num_nodes + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=self.num_nodes), out=indptr[1:])
+        graph = CitationGraph(self.ids, indptr, rows[order].astype(np.int32))
+        graph._positions = self._positions
+        return graph
+
+    def save(self, directory):
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "indptr.npy", self.indptr)
+        np.save(directory / "indices.npy", self.indices)
+        with open(directory / _IDS_FILE, "w", encoding="utf-8") as f:
+            f.write("\n".join(self.ids))
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        directory = Path(directory)
+        mode = "r" if mmap else None
+        indptr = np.load(directory / "indptr.npy", mmap_mode=mode)
+        indices = np.load(directory / "indices.npy", mmap_mode=mode)
+        with open(directory / _IDS_FILE, "r", encoding="utf-8") as f:
+            ids = f.read().split("\n") if len(indptr) > 1 else []
+        return cls(ids, indptr, indices)
+
+
+def _write_json_atomic(path, data):
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    os.replace(tmp, path)
+
+
+def _read_edges(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            cited, _, citing = line.rstrip("\n").partition("\t")
+            if citing:
+                yield cited, citing
+
+
+async def _seed_omids(client, seed_dois):
+    omids = await client.resolve_identifiers(seed_dois, kind="doi")
+    for doi in seed_dois:
+        if omids.get(doi) is None:
+            logger.info(f"[Crawler] No OMID for seed {doi}")
+    return list(dict.fromkeys(o for o in omids.values() if o))
+
+
+async def crawl_citations(seed_dois,
+                          depth,
+                          out_dir,
+                          client=None,
+                          batch_size=DEFAULT_SPARQL_BATCH,
+                          concurrency=DEFAULT_CONCURRENCY):
+    """
+    Breadth-first expansion of the citation neighbourhood of `seed_dois` over OpenCitations.
+
+    Each level takes the OMIDs discovered at the previous level and fetches the entities
+    citing them with batched SPARQL queries (`batch_size` OMIDs per VALUES clause,
+    `concurrency` queries at once). Every node is expanded once.
+
+    Edges are appended to `out_dir/edges.tsv` as they arrive and the crawl state is
+    checkpointed to `out_dir/state.json`, so rerunning with the same `out_dir` resumes
+    where an interrupted crawl stopped. The finished graph is written to `out_dir` as
+    CSR arrays plus an id table (see `CitationGraph.load`).
+
+    Args:
+        seed_dois (list): DOIs to start from.
+        depth (int): Number of citation hops to follow.
+        out_dir (str | Path): Directory for edges, checkpoint and the final graph.
+        client (AsyncCrossrefClient | None): Client to use; a private one is opened if omitted.
+        batch_size (int): OMIDs per SPARQL query.
+        concurrency (int): SPARQL queries in flight.
+
+    Returns:
+        CitationGraph: The crawled graph.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    edges_path = out_dir / _EDGES_FILE
+    state_path = out_dir / _STATE_FILE
+
+    own_client = client is None
+    if own_client:
+        client = AsyncCrossrefClient()
+
+    try:
+        if state_path.exists():
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            logger.info(f"[Crawler] Resuming at level {state['level']} "
+                        f"({len(state['expanded'])}/{len(state['frontier'])} expanded)")
+        else:
+            frontier = await _seed_omids(client, seed_dois)
+            state = {"level": 0, "seeds": frontier, "frontier": frontier, "expanded": [], "next_frontier": [],
+                     "visited": frontier}
+            edges_path.write_text("", encoding="utf-8")
+            _write_json_atomic(state_path, state)
+
+        visited = set(state["visited"])
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def expand(batch):
+            async with semaphore:
+                try:
+                    return batch, await client.get_citing_entities_many(batch), None
+                except Exception as e:
+                    return batch, [], str(e)
+
+        with open(edges_path, "a", encoding="utf-8") as edges_file:
+            while state["level"] < depth and state["frontier"]:
+                expanded = set(state["expanded"])
+                next_frontier = list(state["next_frontier"])
+                todo = [omid for omid in state["frontier"] if omid not in expanded]
+                batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+                logger.info(f"[Crawler] Level {state['level'] + 1}/{depth}: {len(todo)} nodes in {len(batches)} queries")
+
+                for done, finished in enumerate(asyncio.as_completed([expand(b) for b in batches]), start=1):
+                    batch, pairs, error = await finished
+                    if error is not None:
+                        # Left unexpanded so a resumed run retries it
+                        logger.info(f"[Crawler] SPARQL batch failed: {error}")
+                        continue
+
+                    edges_file.writelines(f"{cited}\t{citing}\n" for cited, citing in pairs)
+                    for _, citing in pairs:
+                        if citing not in visited:
+                            visited.add(citing)
+                            next_frontier.append(citing)
+                    expanded.update(batch)
+
+                    if done % CHECKPOINT_EVERY == 0:
+                        edges_file.flush()
+                        state.update(expanded=list(expanded), next_frontier=next_frontier, visited=list(visited))
+                        _write_json_atomic(state_path, state)
+
+                edges_file.flush()
+                if len(expanded) < len(state["frontier"]):
+                    state.update(expanded=list(expanded), next_frontier=next_frontier, visited=list(visited))
+                    _write_json_atomic(state_path, state)
+                    raise RuntimeError(f"{len(state['frontier']) - len(expanded)} nodes could not be expanded; "
+                                       "rerun to resume the crawl")
+
+                state = {"level": state["level"] + 1, "seeds": state["seeds"], "frontier": next_frontier,
+                         "expanded": [], "next_frontier": [], "visited": list(visited)}
+                _write_json_atomic(state_path, state)
+    finally:
+        if own_client:
+            await client.aclose()
+
+    graph = CitationGraph.from_edges(_read_edges(edges_path), nodes=state["seeds"])
+    graph.save(out_dir)
+    logger.info(f"[Crawler] Graph saved to {out_dir}: {graph.num_nodes} nodes, {graph.num_edges} edges")
+    return graph
@@ -0,0 +1,259 @@
+import asyncio
+import importlib.util
+
+import httpx
+
+from modules.response_cache import get_default_cache
+from modules.identifier_index import get_default_identifier_index
+from modules.paper_to_doi import (
+    CROSSREF_BATCH_SIZE,
+    OPENCITATIONS_META_URL,
+    OPENCITATIONS_SPARQL_URL,
+    REQUEST_TIMEOUT,
+    SPARQL_HEADERS,
+    USER_AGENT,
+    batch_doi_url,
+    citing_entities_many_query,
+    citing_entities_query,
+    doi_url,
+    parse_citing_entities,
+    parse_citing_pairs,
+    parse_doi_metadata,
+    parse_doi_response,
+    parse_omid_metadata,
+    parse_title_response,
+    plan_doi_batches,
+    rate_limiter_for,
+    store_batch_items,
+    title_search_url,
+)
+
+# httpx only speaks HTTP/2 when the optional `h2` package is installed
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class AsyncCrossrefClient:
+    """
+    Asynchronous counterpart of the lookups in `paper_to_doi`, backed by one pooled
+    httpx.AsyncClient so that many concurrent lookups share a few keep-alive
+    connections (multiplexed over HTTP/2 when `h2` is installed).
+
+    Responses go through the same on-disk cache as the synchronous functions, and
+    results / error behaviour match them one to one. Cache reads and writes (SQLite)
+    run in worker threads so that they never block the other lookups on the loop.
+
+    Args:
+        concurrency (int): Maximum number of requests in flight at once.
+        max_connections (int): Size of the connection pool.
+        max_keepalive_connections (int): Idle connections kept open for reuse.
+        timeout (float): Per-request timeout in seconds.
+        http2 (bool | None): Force HTTP/2 on or off. Defaults to on when available.
+        cache (ResponseCache | None): Cache to use. Defaults to the process-wide cache.
+
+    Example:
+        async with AsyncCrossrefClient(concurrency=100) as client:
+            infos = await asyncio.gather(*(client.get_info_from_doi(d) for d in dois))
+    """
+
+    def __init__(self,
+                 concurrency=50,
+                 max_connections=20,
+                 max_keepalive_connections=10,
+                 timeout=REQUEST_TIMEOUT,
+                 http2=None,
+                 cache=None):
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._cache = cache
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE if http2 is None else http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            ),
+            timeout=httpx.Timeout(timeout),
+            headers={"User-Agent": USER_AGENT},
+            follow_redirects=True,
+        )
+
+    @property
+    def cache(self):
+        return self._cache if self._cache is not None else get_default_cache()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def aclose(self):
+        await self._client.aclose()
+
+    async def fetch_json(self, url):
+        """
+        Async version of `paper_to_doi.fetch_json`: rate-limited GET that bypasses the cache.
+
+        Returns:
+            tuple: (status_code, decoded JSON or None)
+
+        Raises:
+            httpx.HTTPError: If the request itself fails.
+        """
+        limiter = rate_limiter_for(url)
+        async with self._semaphore:
+            if limiter is not None:
+                await limiter.acquire_async()
+            response = await self._client.get(url)
+        if limiter is not None:
+            await asyncio.to_thread(limiter.update_from_headers, response.headers, response.status_code)
+
+        data = response.json() if response.status_code == 200 else None
+        return response.status_code, data
+
+    async def get_json(self, url):
+        """
+        Async version of `paper_to_doi.cached_get_json`.
+
+        Returns:
+            tuple: (status_code, decoded JSON or None)
+
+        Raises:
+            httpx.HTTPError: If the request itself fails.
+        """
+        hit = await asyncio.to_thread(self.cache.get, url)
+        if hit is not None:
+            return hit
+
+        status, data = await self.fetch_json(url)
+        await asyncio.to_thread(self.cache.store_response, url, status, data)
+        return status, data
+
+    async def get_article_info_from_title(self, title):
+        """Async version of `paper_to_doi.get_article_info_from_title`."""
+        url = title_search_url(title)
+        try:
+            status, data = await self.get_json(url)
+        except (httpx.HTTPError, ValueError):
+            return None
+        if status != 200:
+            return None
+        return parse_title_response(data, title)
+
+    async def get_info_from_doi(self, doi, returnTitle=True, addLicense=False):
+        """Async version of `paper_to_doi.get_info_from_doi`."""
+        url = doi_url(doi)
+        try:
+            status, data = await self.get_json(url)
+        except (httpx.HTTPError, ValueError):
+            return None
+        if status != 200:
+            return None
+        return parse_doi_response(data, doi, returnTitle=returnTitle, addLicense=addLicense)
+
+    async def get_info_from_dois(self, dois, returnTitle=True, addLicense=False, batch_size=CROSSREF_BATCH_SIZE):
+        """
+        Async version of `paper_to_doi.get_info_from_dois`. Batches are fetched
+        concurrently and misses fall back to concurrent single lookups.
+
+        Returns:
+            list: One `get_info_from_doi` result (dict or None) per input DOI, in input order.
+        """
+        responses, batches = await asyncio.to_thread(plan_doi_batches, dois, self.cache, batch_size)
+
+        async def fetch_batch(batch):
+            try:
+                status, data = await self.fetch_json(batch_doi_url(batch))
+            except (httpx.HTTPError, ValueError):
+                return {}
+            if status != 200 or not data:
+                return {}
+            return await asyncio.to_thread(store_batch_items, data, self.cache)
+
+        for found in await asyncio.gather(*(fetch_batch(b) for b in batches)):
+            responses.update(found)
+
+        # Not returned by any batch: single lookups, which also cache the misses
+        missing = {}
+        for doi in dois:
+            if doi and doi.strip().lower() not in responses:
+                missing.setdefault(doi.strip().lower(), doi.strip())
+        singles = await asyncio.gather(*(
+            self.get_info_from_doi(doi, returnTitle=returnTitle, addLicense=addLicense)
+            for doi in missing.values()
+        ))
+        fallback = dict(zip(missing, singles))
+
+        results = []
+        for doi in dois:
+            key = doi.strip().lower() if doi else None
+            if key is None:
+                results.append(None)
+            elif key in responses:
+                status, data = responses[key]
+                results.append(parse_doi_response(data, doi, returnTitle, addLicense) if status == 200 else None)
+            else:
+                results.append(fallback[key])
+        return results
+
+    async def get_omid_from_doi(self, doi):
+        """Async version of `paper_to_doi.get_omid_from_doi`. Raises on failure like the original."""
+        index = get_default_identifier_index()
+        known, omid = await asyncio.to_thread(index.omid_for, doi)
+        if known:
+            if omid is None:
+                raise Exception("No metadata found for the given DOI")
+            return omid
+        status, metadata = await self.get_json(f"{OPENCITATIONS_META_URL}/doi:{doi}")
+        if status != 200:
+            raise Exception(f"Failed to fetch metadata: {status}")
+        await asyncio.to_thread(index.add_metadata, metadata, queried=[doi], kind="doi")
+        return parse_omid_metadata(metadata)
+
+    async def get_doi_from_omid(self, omid):
+        """Async version of `paper_to_doi.get_doi_from_omid`. Raises on failure like the original."""
+        index = get_default_identifier_index()
+        known, doi = await asyncio.to_thread(index.doi_for, omid)
+        if known:
+            if doi is None:
+                raise Exception("No metadata found for the given OMID")
+            return doi
+        status, metadata = await self.get_json(f"{OPENCITATIONS_META_URL}/omid:{omid}")
+        if status != 200:
+            raise Exception(f"Failed to fetch metadata: {status}")
+        await asyncio.to_thread(index.add_metadata, metadata, queried=[omid], kind="omid")
+        return parse_doi_metadata(metadata)
+
+    async def resolve_identifiers(self, ids, kind="doi"):
+        """
+        Bulk DOI -> OMID (kind='doi') or OMID -> DOI (kind='omid') conversion through the
+        identifier index; only unknown identifiers are looked up, several per request.
+
+        Returns:
+            dict: Each input identifier -> its counterpart, or None.
+        """
+        return await get_default_identifier_index().resolve_many_async(ids, self, kind=kind)
+
+    async def get_citing_entities(self, omid, sparql_url=OPENCITATIONS_SPARQL_URL):
+        """Async version of `paper_to_doi.get_citing_entities`. Not cached."""
+        async with self._semaphore:
+            response = await self._client.post(
+                sparql_url,
+                content=citing_entities_query(omid).encode('utf-8'),
+                headers=SPARQL_HEADERS,
+            )
+        if response.status_code != 200:
+            raise Exception(f"Failed to run SPARQL query: {response.status_code}")
+        return parse_citing_entities(response.json())
+
+    async def get_citing_entities_many(self, omids, sparql_url=OPENCITATIONS_SPARQL_URL):
+        """Async version of `paper_to_doi.get_citing_entities_many`. Not cached."""
+        if not omids:
+            return []
+        async with self._semaphore:
+            response = await self._client.post(
+                sparql_url,
+                content=citing_entities_many_query(omids).encode('utf-8'),
+                headers=SPARQL_HEADERS,
+            )
+        if response.status_code != 200:
+            raise Exception(f"Failed to run SPARQL query: {response.status_code}")
+        return parse_citing_pairs(response.json())
@@ -0,0 +1,211 @@
+import logging
+import multiprocessing as mp
+import os
+import time
+from multiprocessing.connection import wait
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 600  # seconds per document
+
+_converter = None
+
+
+def get_document_converter():
+    """
+    Return the process-wide docling DocumentConverter, created on first use.
+
+    Building a converter loads the layout models, which costs more than converting a
+    short paper, so one instance is kept per process and reused for every document.
+    docling is imported here so that modules using the lookups alone do not need it.
+    """
+    global _converter
+    if _converter is None:
+        from docling.document_converter import DocumentConverter
+        _converter = DocumentConverter()
+    return _converter
+
+
+def convert_to_markdown(docfile):
+    return get_document_converter().convert(str(docfile)).document.export_to_markdown()
+
+
+def _worker_main(conn):
+    """Worker loop: convert each path received on `conn` and send back (task_id, markdown, error)."""
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        task_id, docfile = task
+        try:
+            conn.send((task_id, convert_to_markdown(docfile), None))
+        except Exception as e:
+            conn.send((task_id, None, f"{e.__class__.__name__}: {e}"))
+    conn.close()
+
+
+class _Worker:
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None        # (task_id, docfile) being converted
+        self.deadline = None
+
+    def submit(self, task_id, docfile, timeout):
+        self.task = (task_id, docfile)
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.conn.send(self.task)
+
+    def stop(self, kill=False):
+        if kill:
+            self.process.kill()
+        else:
+            try:
+                self.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class DocumentConversionPool:
+    """
+    Pool of worker processes converting documents to markdown with docling.
+
+    Each worker keeps one warm DocumentConverter for its whole life, so the models are
+    loaded once per worker rather than once per document. A worker that exceeds
+    `timeout` on a document (or dies) is killed and replaced, and that document is
+    reported as failed; the others are unaffected.
+
+    Args:
+        workers (int | None): Number of worker processes. Defaults to the CPU count.
+        timeout (float | None): Seconds allowed per document; None disables the limit.
+        start_method (str): multiprocessing start method. 'spawn' avoids forking a
+            parent that may already hold model or thread state.
+
+    Example:
+        with DocumentConversionPool(workers=4) as pool:
+            for docfile, markdown, error in pool.imap_unordered(pdfs):
+                ...
+    """
+
+    def __init__(self, workers=None, timeout=DEFAULT_TIMEOUT, start_method="spawn"):
+        self.workers = workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self._context = mp.get_context(start_method)
+        self._pool = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _spawn(self):
+        worker = _Worker(self._context)
+        self._pool.append(worker)
+        return worker
+
+    def _replace(self, worker):
+        self._pool.remove(worker)
+        worker.stop(kill=True)
+        return self._spawn()
+
+    def imap_unordered(self, docfiles):
+        """
+        Convert `docfiles` and yield (docfile, markdown, error) as each one finishes.
+        `markdown` is None and `error` a message when the conversion failed or timed out.
+        """
+        pending = list(enumerate(docfiles))[::-1]
+        while len(self._pool) < min(self.workers, len(pending)):
+            self._spawn()
+
+        idle = list(self._pool)
+        busy = {}
+        while pending or busy:
+            while idle and pending:
+                worker = idle.pop()
+                task_id, docfile = pending.pop()
+                worker.submit(task_id, docfile, self.timeout)
+                busy[worker.conn] = worker
+
+            deadlines = [w.deadline for w in busy.values() if w.deadline is not None]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait(list(busy), timeout=wait_for)
+
+            for conn in ready:
+                worker = busy.pop(conn)
+                docfile = worker.task[1]
+                try:
+                    _, markdown, error = conn.recv()
+                except (EOFError, OSError):
+                    # The worker died mid-document (e.g. a crash in a native library)
+                    logger.info(f"[Conversion] Worker died on {docfile}, restarting it")
+                    idle.append(self._replace(worker))
+                    yield docfile, None, "Worker process died"
+                    continue
+                worker.task = None
+                idle.append(worker)
+                yield docfile, markdown, error
+
+            now = time.monotonic()
+            for conn, worker in list(busy.items()):
+                if worker.deadline is not None and worker.deadline <= now:
+                    del busy[conn]
+                    docfile = worker.task[1]
+                    logger.info(f"[Conversion] {docfile} timed out after {self.timeout}s, restarting its worker")
+                    idle.append(self._replace(worker))
+                    yield docfile, None, f"Timed out after {self.timeout}s"
+
+    def close(self):
+        for worker in self._pool:
+            worker.stop(kill=worker.task is not None)
+        self._pool = []
+
+
+def convert_documents(docfiles, workers=None, timeout=DEFAULT_TIMEOUT, title_index=None, resolve=True):
+    """
+    Convert documents in parallel and stream `process_document_to_dict`-style results.
+
+    Conversion runs in a `DocumentConversionPool`; splitting the markdown and resolving
+    the DOIs of the paper and its references happen in this process while the workers
+    carry on with the next documents.
+
+    Args:
+        docfiles (iterable): Paths of the documents (PDF or anything docling reads).
+        workers (int | None): Number of worker processes. Defaults to the CPU count.
+        timeout (float | None): Seconds allowed per document conversion.
+        title_index (TitleIndex | None): Local index consulted before Crossref.
+        resolve (bool): If False, skip the network lookups; 'bibliography' then holds the
+            raw reference strings and 'title' is None.
+
+    Yields:
+        dict: {"file", "title", "doi", "body", "bibliography", "error"} in completion order.
+    """
+    # Imported here because paper_to_doi itself imports this module
+    from modules.paper_to_doi import document_dict_from_markdown
+
+    with DocumentConversionPool(workers=workers, timeout=timeout) as pool:
+        for docfile, markdown, error in pool.imap_unordered(docfiles):
+            result = {"file": str(docfile), "title": None, "doi": None, "body": None, "bibliography": None,
+                      "error": error}
+            if markdown is not None:
+                try:
+                    result.update(document_dict_from_markdown(markdown, title_index=title_index, resolve=resolve))
+                except Exception as e:
+                    result["error"] = f"{e.__class__.__name__}: {e}"
+            yield result
+
+
+def convert_directory(directory, pattern="*.pdf", **kwargs):
+    """`convert_documents` over the files in `directory` matching `pattern` (searched recursively)."""
+    return convert_documents(sorted(Path(directory).rglob(pattern)), **kwargs)
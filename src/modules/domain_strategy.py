@@ -0,0 +1,160 @@
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_STRATEGY_PATH = Path(os.environ.get(
+    "RHEUM_DOWNLOAD_STRATEGIES",
+    Path.home() / ".cache" / "rheum_project" / "download_strategies.sqlite",
+))
+
+# Outcomes kept in memory between two writes to disk
+_FLUSH_EVERY = 50
+
+
+class _Stats:
+    __slots__ = ("successes", "failures", "seconds", "last_success_at")
+
+    def __init__(self, successes=0, failures=0, seconds=0.0, last_success_at=None):
+        self.successes = successes
+        self.failures = failures
+        self.seconds = seconds
+        self.last_success_at = last_success_at
+
+    @property
+    def attempts(self):
+        return self.successes + self.failures
+
+    def score(self):
+        """Success rate with one success and one failure of prior, so 0.5 when unseen."""
+        return (self.successes + 1) / (self.attempts + 2)
+
+    def latency(self):
+        return self.seconds / self.attempts if self.attempts else float("inf")
+
+
+class DomainStrategyTable:
+    """
+    Persistent record of what works on each publisher domain.
+
+    For every (domain, kind, choice), e.g. ('onlinelibrary.wiley.com', 'mask', 'chrome120')
+    or (..., 'strategy', 'smart'), it keeps the successes, failures, total seconds and
+    the time of the last success. `order` sorts the candidates of a new attempt by that
+    history (smoothed success rate, then mean latency), so once a domain is known its
+    first attempt is usually the one that works; choices never tried keep their default
+    position. Outcomes are held in memory and added to the stored counts every few
+    records and on `close`, so concurrent runs sharing the file do not overwrite each other.
+
+    Args:
+        path (str | Path): Location of the SQLite file. Parent directories are created.
+        enabled (bool): If False `order` returns the defaults and nothing is written.
+    """
+
+    def __init__(self, path=DEFAULT_STRATEGY_PATH, enabled=True):
+        self.path = Path(path)
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._conn = None
+        self._stats = None  # (domain, kind, choice) -> _Stats
+        self._unsaved = {}  # (domain, kind, choice) -> _Stats of the outcomes not yet written
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS outcomes (
+                    domain TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    choice TEXT NOT NULL,
+                    successes INTEGER NOT NULL,
+                    failures INTEGER NOT NULL,
+                    seconds REAL NOT NULL,
+                    last_success_at REAL,
+                    PRIMARY KEY (domain, kind, choice)
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load(self):
+        # One row per domain and choice: small enough to keep in memory for the whole run
+        if self._stats is None:
+            rows = self._connect().execute(
+                "SELECT domain, kind, choice, successes, failures, seconds, last_success_at FROM outcomes"
+            ).fetchall()
+            self._stats = {(domain, kind, choice): _Stats(*values) for domain, kind, choice, *values in rows}
+        return self._stats
+
+    def order(self, domain, kind, choices):
+        """`choices` sorted best first for `domain`; ties keep their given order."""
+        choices = list(choices)
+        if not self.enabled or not domain:
+            return choices
+        with self._lock:
+            stats = self._load()
+            known = {c: stats[(domain, kind, c)] for c in choices if (domain, kind, c) in stats}
+        unseen = _Stats()
+        return sorted(choices, key=lambda c: (-known.get(c, unseen).score(), known.get(c, unseen).latency()))
+
+    def record(self, domain, kind, choice, success, seconds=0.0):
+        """Count one attempt of `choice` on `domain` and how long it took."""
+        if not self.enabled or not domain:
+            return
+        with self._lock:
+            stats = self._load()
+            key = (domain, kind, choice)
+            for entry in (stats.setdefault(key, _Stats()), self._unsaved.setdefault(key, _Stats())):
+                if success:
+                    entry.successes += 1
+                    entry.last_success_at = time.time()
+                else:
+                    entry.failures += 1
+                entry.seconds += seconds
+            if sum(s.attempts for s in self._unsaved.values()) >= _FLUSH_EVERY:
+                self._flush()
+
+    def stats(self, domain=None):
+        """{(domain, kind, choice): {successes, failures, mean_seconds, last_success_at}}."""
+        with self._lock:
+            items = list(self._load().items())
+        return {
+            key: {"successes": s.successes, "failures": s.failures,
+                  "mean_seconds": round(s.latency(), 3) if s.attempts else None,
+                  "last_success_at": s.last_success_at}
+            for key, s in items if domain is None or key[0] == domain
+        }
+
+    def _flush(self):
+        if not self._unsaved:
+            return
+        conn = self._connect()
+        conn.executemany(
+            "INSERT INTO outcomes (domain, kind, choice, successes, failures, seconds, last_success_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(domain, kind, choice) DO UPDATE SET "
+            "successes = successes + excluded.successes, failures = failures + excluded.failures, "
+            "seconds = seconds + excluded.seconds, "
+            "last_success_at = COALESCE(excluded.last_success_at, last_success_at)",
+            [(*key, s.successes, s.failures, s.seconds, s.last_success_at) for key, s in self._unsaved.items()],
+        )
+        conn.commit()
+        self._unsaved = {}
+
+    def flush(self):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._flush()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
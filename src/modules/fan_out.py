@@ -0,0 +1,92 @@
+import asyncio
+
+DEFAULT_CONCURRENCY = 10
+# Items that may be taken from the input but not yet yielded, per unit of concurrency.
+# Bounds the reorder buffer when one slow item holds back the ones after it.
+WINDOW_PER_WORKER = 4
+
+ORDERS = ("input", "completion")
+
+_DONE = object()
+
+
+async def bounded_map(fn, items, concurrency=DEFAULT_CONCURRENCY, order="input", window=None):
+    """
+    Apply the coroutine function `fn` to every element of `items` with up to
+    `concurrency` calls in flight, yielding the results as an async generator.
+
+    `concurrency` worker tasks pull from `items` lazily, so the input may be a generator
+    over a large file. With order='input' results come out in input order through a
+    reorder buffer; with order='completion' each is yielded as soon as it finishes. In
+    both cases at most `window` items are in flight or buffered at any time.
+
+    Args:
+        fn (callable): `async def fn(item)`. An exception it raises, or one raised while
+            reading `items`, is re-raised here and the remaining calls are cancelled.
+        items (iterable): Input elements.
+        concurrency (int): Number of calls in flight.
+        order (str): 'input' or 'completion'.
+        window (int | None): Bound on started-but-not-yielded items. Defaults to
+            `concurrency * WINDOW_PER_WORKER`.
+
+    Yields:
+        The return value of `fn` for each item.
+    """
+    if order not in ORDERS:
+        raise ValueError(f"order must be one of {ORDERS}, got {order!r}")
+    concurrency = max(1, concurrency)
+    window = max(window or concurrency * WINDOW_PER_WORKER, concurrency)
+
+    source = enumerate(items)
+    slots = asyncio.Semaphore(window)
+    finished = asyncio.Queue()
+
+    async def worker():
+        try:
+            while True:
+                await slots.acquire()
+                try:
+                    index, item = next(source)
+                except StopIteration:
+                    slots.release()
+                    return
+                except Exception as e:
+                    # Reading the input failed (e.g. a malformed line in a streamed file)
+                    await finished.put((None, None, e))
+                    return
+                try:
+                    await finished.put((index, await fn(item), None))
+                except Exception as e:
+                    await finished.put((index, None, e))
+                    return
+        finally:
+            await finished.put(_DONE)
+
+    workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+    running = len(workers)
+    buffer = {}
+    next_index = 0
+    try:
+        while running:
+            entry = await finished.get()
+            if entry is _DONE:
+                running -= 1
+                continue
+
+            index, result, error = entry
+            if error is not None:
+                raise error
+
+            if order == "completion":
+                slots.release()
+                yield result
+                continue
+
+            buffer[index] = result
+            while next_index in buffer:
+                slots.release()
+                yield buffer.pop(next_index)
+                next_index += 1
+    finally:
+        for task in workers:
+            task.cancel()
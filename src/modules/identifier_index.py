@@ -0,0 +1,311 @@
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_INDEX_PATH = Path(os.environ.get(
+    "RHEUM_ID_INDEX",
+    Path.home() / ".cache" / "rheum_project" / "identifiers.sqlite",
+))
+DEFAULT_NEGATIVE_TTL = 3 * 24 * 3600  # Identifiers OpenCitations did not know: 3 days
+
+# Identifiers per OpenCitations Meta request ('doi:a__doi:b__...'); keeps URLs well under server limits
+META_BATCH_SIZE = 20
+
+# SQLite caps the number of host parameters per statement
+_SQL_CHUNK = 500
+
+_DOI_RE = re.compile(r"(?:^|\s)doi:(\S+)")
+_OMID_RE = re.compile(r"(?:^|\s)omid:br/(\d+)")
+
+def normalize_doi(doi):
+    return doi.strip().lower()
+
+
+def normalize_omid(omid):
+    """'omid:br/0612058700', 'br/0612058700' or '0612058700' -> 'br/0612058700'."""
+    omid = omid.strip()
+    if omid.startswith("omid:"):
+        omid = omid[5:]
+    return omid if omid.startswith("br/") else f"br/{omid}"
+
+
+def meta_identifiers_url(ids, kind, base_url):
+    """OpenCitations Meta URL looking up several identifiers of one kind at once."""
+    if kind == "omid":
+        ids = [normalize_omid(i) for i in ids]
+    return f"{base_url}/" + "__".join(f"{kind}:{i}" for i in ids)
+
+
+def parse_meta_identifiers(metadata):
+    """
+    All (doi, omid) pairs found in an OpenCitations Meta response.
+
+    Each record's 'id' field lists its identifiers ('doi:10.x/y omid:br/06... pmid:...');
+    a record with several DOIs gives one pair per DOI.
+    """
+    pairs = []
+    for record in metadata or []:
+        id_field = record.get("id", "")
+        omid = _OMID_RE.search(id_field)
+        if not omid:
+            continue
+        dois = _DOI_RE.findall(id_field) or ([record["doi"]] if record.get("doi") else [])
+        pairs.extend((normalize_doi(doi), f"br/{omid.group(1)}") for doi in dois)
+    return pairs
+
+
+class IdentifierIndex:
+    """
+    Persistent two-way DOI <-> OMID map.
+
+    Filled from every OpenCitations Meta response seen by the lookup functions, it
+    answers repeated and bulk conversions without a network round trip. Identifiers
+    OpenCitations did not know are stored as negative entries that expire after
+    `negative_ttl`. Both directions are WITHOUT ROWID tables clustered on their key,
+    so millions of pairs cost a few tens of bytes each on disk and only the SQLite
+    page cache in memory.
+
+    Args:
+        path (str | Path): Location of the SQLite file. Parent directories are created.
+        negative_ttl (float): Lifetime in seconds of negative entries.
+        enabled (bool): If False every lookup misses and nothing is written.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH, negative_ttl=DEFAULT_NEGATIVE_TTL, enabled=True):
+        self.path = Path(path)
+        self.negative_ttl = negative_ttl
+        self.enabled = enabled
+
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            # value NULL = negative entry, checked_at tells when it expires
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS doi_to_omid (
+                    doi TEXT PRIMARY KEY,
+                    omid TEXT,
+                    checked_at REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS omid_to_doi (
+                    omid TEXT PRIMARY KEY,
+                    doi TEXT,
+                    checked_at REAL NOT NULL
+                ) WITHOUT ROWID
+            """)
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _key(kind, identifier):
+        if kind == "doi":
+            return normalize_doi(identifier)
+        if kind == "omid":
+            return normalize_omid(identifier)
+        raise ValueError(f"Unknown identifier kind: {kind}")
+
+    def add_pairs(self, pairs):
+        """Record (doi, omid) pairs in both directions."""
+        if not self.enabled:
+            return
+        now = time.time()
+        rows = [(normalize_doi(doi), normalize_omid(omid), now) for doi, omid in pairs]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            conn.executemany("INSERT OR REPLACE INTO doi_to_omid (doi, omid, checked_at) VALUES (?, ?, ?)", rows)
+            # Keep the first DOI seen for an OMID; records with several DOIs should not flip it
+            conn.executemany(
+                "INSERT INTO omid_to_doi (omid, doi, checked_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(omid) DO UPDATE SET doi = excluded.doi, checked_at = excluded.checked_at "
+                "WHERE omid_to_doi.doi IS NULL",
+                [(omid, doi, checked_at) for doi, omid, checked_at in rows],
+            )
+            conn.commit()
+
+    def add_missing(self, ids, kind):
+        """Record identifiers of `kind` that OpenCitations has no counterpart for."""
+        if not self.enabled:
+            return
+        now = time.time()
+        rows = [(self._key(kind, i), now) for i in ids]
+        if not rows:
+            return
+        table, column, other = ("doi_to_omid", "doi", "omid") if kind == "doi" else ("omid_to_doi", "omid", "doi")
+        with self._lock:
+            conn = self._connect()
+            # Renew an earlier miss, but never overwrite a known pair with one
+            conn.executemany(
+                f"INSERT INTO {table} ({column}, checked_at) VALUES (?, ?) "
+                f"ON CONFLICT({column}) DO UPDATE SET checked_at = excluded.checked_at "
+                f"WHERE {table}.{other} IS NULL",
+                rows,
+            )
+            conn.commit()
+
+    def add_metadata(self, metadata, queried=(), kind="doi"):
+        """
+        Record the pairs of a Meta response. Identifiers in `queried` that the response
+        does not mention are stored as misses.
+        """
+        pairs = parse_meta_identifiers(metadata)
+        self.add_pairs(pairs)
+        found = {doi for doi, _ in pairs} if kind == "doi" else {omid for _, omid in pairs}
+        self.add_missing([i for i in queried if self._key(kind, i) not in found], kind)
+        return pairs
+
+    def lookup_many(self, ids, kind="doi"):
+        """
+        Look up identifiers of `kind` ('doi' or 'omid') without touching the network.
+
+        Returns:
+            dict: Known identifiers (as given) -> their counterpart, or None for live
+                negative entries. Unknown identifiers are absent.
+        """
+        if not self.enabled:
+            return {}
+        table, column, other = ("doi_to_omid", "doi", "omid") if kind == "doi" else ("omid_to_doi", "omid", "doi")
+        keys = {}
+        for i in ids:
+            if i:
+                keys.setdefault(self._key(kind, i), []).append(i)
+
+        expired_before = time.time() - self.negative_ttl
+        found = {}
+        unique = list(keys)
+        with self._lock:
+            conn = self._connect()
+            for start in range(0, len(unique), _SQL_CHUNK):
+                chunk = unique[start:start + _SQL_CHUNK]
+                rows = conn.execute(
+                    f"SELECT {column}, {other}, checked_at FROM {table} "
+                    f"WHERE {column} IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, value, checked_at in rows:
+                    if value is None and checked_at < expired_before:
+                        continue
+                    for original in keys[key]:
+                        found[original] = value
+        return found
+
+    def omid_for(self, doi):
+        """(known, omid) for one DOI; omid is None for a stored miss."""
+        found = self.lookup_many([doi], "doi")
+        return (doi in found), found.get(doi)
+
+    def doi_for(self, omid):
+        """(known, doi) for one OMID; doi is None for a stored miss."""
+        found = self.lookup_many([omid], "omid")
+        return (omid in found), found.get(omid)
+
+    def resolve_many(self, ids, kind="doi", batch_size=META_BATCH_SIZE):
+        """
+        Convert many identifiers at once. Only identifiers the index does not know are
+        sent to OpenCitations Meta, `batch_size` per request, and the answers (including
+        misses) are stored.
+
+        Args:
+            ids (list): DOIs (kind='doi') or OMIDs (kind='omid').
+            kind (str): Kind of the input identifiers.
+            batch_size (int): Identifiers per Meta request.
+
+        Returns:
+            dict: Each input identifier -> its counterpart, or None if there is none or
+                the lookup failed.
+        """
+        # Imported here because paper_to_doi itself imports this module
+        from modules.paper_to_doi import OPENCITATIONS_META_URL, cached_get_json
+
+        resolved = self.lookup_many(ids, kind)
+        for batch in self._unknown_batches(ids, kind, resolved, batch_size):
+            try:
+                status, metadata = cached_get_json(meta_identifiers_url(batch, kind, OPENCITATIONS_META_URL))
+            except Exception:
+                continue
+            if status == 200:
+                self._record_batch(metadata, batch, kind, resolved)
+        return self._answers(ids, kind, resolved)
+
+    async def resolve_many_async(self, ids, client, kind="doi", batch_size=META_BATCH_SIZE):
+        """`resolve_many` through an `AsyncCrossrefClient`, with the batches fetched concurrently."""
+        from modules.paper_to_doi import OPENCITATIONS_META_URL
+
+        resolved = self.lookup_many(ids, kind)
+
+        async def fetch(batch):
+            try:
+                return batch, await client.get_json(meta_identifiers_url(batch, kind, OPENCITATIONS_META_URL))
+            except Exception:
+                return batch, (None, None)
+
+        batches = self._unknown_batches(ids, kind, resolved, batch_size)
+        for batch, (status, metadata) in await asyncio.gather(*(fetch(b) for b in batches)):
+            if status == 200:
+                self._record_batch(metadata, batch, kind, resolved)
+        return self._answers(ids, kind, resolved)
+
+    def _unknown_batches(self, ids, kind, resolved, batch_size):
+        # One request per normalized identifier; other spellings of it are answered by `_answers`
+        unknown = list({self._key(kind, i): i for i in reversed(ids) if i and i not in resolved}.values())
+        return [unknown[i:i + batch_size] for i in range(0, len(unknown), batch_size)]
+
+    def _answers(self, ids, kind, resolved):
+        by_key = {self._key(kind, i): value for i, value in resolved.items()}
+        return {i: by_key.get(self._key(kind, i)) if i else None for i in ids}
+
+    def _record_batch(self, metadata, batch, kind, resolved):
+        pairs = self.add_metadata(metadata, queried=batch, kind=kind)
+        answers = {}
+        for doi, omid in pairs:
+            if kind == "doi":
+                answers.setdefault(doi, omid)
+            else:
+                answers.setdefault(omid, doi)
+        for i in batch:
+            resolved[i] = answers.get(self._key(kind, i))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self):
+        """Number of known DOIs (positive and negative entries)."""
+        with self._lock:
+            (count,) = self._connect().execute("SELECT COUNT(*) FROM doi_to_omid").fetchone()
+        return count
+
+
+_default_index = None
+
+
+def get_default_identifier_index():
+    """Return the process-wide index shared by the OpenCitations lookups in `paper_to_doi`."""
+    global _default_index
+    if _default_index is None:
+        _default_index = IdentifierIndex()
+    return _default_index
+
+
+def configure_identifier_index(**kwargs):
+    """Replace the process-wide index. Accepts the same keyword arguments as `IdentifierIndex`."""
+    global _default_index
+    if _default_index is not None:
+        _default_index.close()
+    _default_index = IdentifierIndex(**kwargs)
+    return _default_index
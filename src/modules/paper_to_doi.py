@@ -1,7 +1,324 @@
-# from docling.document_converter import DocumentConverter
-import requests, re, time, os
+import requests, re, os
+from urllib.parse import quote
+from modules.response_cache import get_default_cache
+from modules.rate_limit import get_crossref_rate_limiter
+from modules.bibtex_stream import clean_bibtex_entry, iter_bibtex_entries
+from modules.identifier_index import get_default_identifier_index
+from modules.reference_segmenter import segment_references
+from modules.document_conversion import convert_to_markdown
+
+CROSSREF_WORKS_URL = "https://api.crossref.org/works"
+OPENCITATIONS_META_URL = "https://opencitations.net/meta/api/v1/metadata"
+OPENCITATIONS_SPARQL_URL = "https://opencitations.net/index/sparql"
+REQUEST_TIMEOUT = 30 # seconds
+
+# Batch lookups: DOIs per filter=doi:... request and the fields projected with select=
+CROSSREF_BATCH_SIZE = 50
+CROSSREF_BATCH_SELECT = "DOI,title,link,license"
+
+# Crossref routes requests that identify a contact address to its "polite" pool
+CROSSREF_MAILTO = os.environ.get("CROSSREF_MAILTO")
+USER_AGENT = f"rheum-project/0.1 (mailto:{CROSSREF_MAILTO})" if CROSSREF_MAILTO else "rheum-project/0.1"
+
+SPARQL_HEADERS = {
+    "Content-Type": "application/sparql-query",
+    "Accept": "application/sparql-results+json"
+}
+
+_session = None
+
+def get_session():
+    """
+    Return the module-wide requests.Session so that synchronous lookups reuse
+    keep-alive connections instead of opening a new TCP+TLS connection per call.
+    """
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.headers.update({"User-Agent": USER_AGENT})
+    return _session
+
+def rate_limiter_for(url):
+    """Return the shared rate limiter governing `url`, or None if the host is not limited."""
+    if url.startswith(CROSSREF_WORKS_URL):
+        return get_crossref_rate_limiter()
+    return None
+
+def fetch_json(url):
+    """
+    Rate-limited GET of a JSON endpoint, bypassing the response cache.
+
+    Returns:
+        tuple: (status_code, decoded JSON or None)
+
+    Raises:
+        requests.exceptions.RequestException: If the request itself fails.
+    """
+    limiter = rate_limiter_for(url)
+    if limiter is not None:
+        limiter.acquire()
+
+    response = get_session().get(url, timeout=REQUEST_TIMEOUT)
+    if limiter is not None:
+        limiter.update_from_headers(response.headers, response.status_code)
+
+    data = response.json() if response.status_code == 200 else None
+    return response.status_code, data
+
+def cached_get_json(url):
+    """
+    GET a JSON endpoint through the shared response cache.
+
+    Successful responses are cached, 404s and empty results are cached as misses,
+    anything else (5xx, 429, connection errors) is not cached.
+
+    Args:
+        url (str): The URL to fetch.
+
+    Returns:
+        tuple: (status_code, decoded JSON or None)
+
+    Raises:
+        requests.exceptions.RequestException: If the request itself fails.
+    """
+    cache = get_default_cache()
+    hit = cache.get(url)
+    if hit is not None:
+        return hit
+
+    status, data = fetch_json(url)
+    cache.store_response(url, status, data)
+    return status, data
+
+def doi_url(doi):
+    """
+    Crossref URL of a single work; also the cache key of its metadata. DOIs are
+    case-insensitive, so the URL is lowercased to give one cache entry per work.
+    """
+    return f"{CROSSREF_WORKS_URL}/{doi.strip().lower()}"
+
+def title_search_url(title):
+    """Crossref bibliographic search URL returning the single best match for `title`."""
+    return f"{CROSSREF_WORKS_URL}?query.bibliographic={title}&rows=1"
+
+def batch_doi_url(dois):
+    """
+    Crossref search URL returning every work in `dois`, restricted to the fields we parse.
+    Each DOI is percent-encoded ('&', '#', ';', '+' would otherwise break the query);
+    DOIs containing a comma cannot be batched (see `plan_doi_batches`).
+    """
+    filters = ",".join(f"doi:{quote(doi, safe='/:')}" for doi in dois)
+    return f"{CROSSREF_WORKS_URL}?filter={filters}&select={CROSSREF_BATCH_SELECT}&rows={len(dois)}"
+
+def plan_doi_batches(dois, cache, batch_size=CROSSREF_BATCH_SIZE):
+    """
+    Split DOIs into those already answered by the cache and batches still to fetch.
+
+    Args:
+        dois (list): DOIs to resolve. Duplicates (case-insensitive) are looked up once.
+        cache (ResponseCache): Cache holding per-DOI responses.
+        batch_size (int): Maximum number of DOIs per batch request.
+
+    Returns:
+        tuple: (responses, batches) where `responses` maps lowercased DOI -> cached
+            (status, data) and `batches` is a list of DOI lists to fetch.
+    """
+    responses = {}
+    pending = []
+    seen = set()
+    for doi in (d.strip() for d in dois if d):
+        key = doi.lower()
+        if key in seen:
+            continue
+        seen.add(key)
+        hit = cache.get(doi_url(doi))
+        if hit is not None:
+            responses[key] = hit
+        elif "," not in doi: # A comma would split the filter value, resolve those one by one
+            pending.append(doi)
+
+    batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    return responses, batches
+
+def store_batch_items(data, cache):
+    """
+    Index the works of a batch response by lowercased DOI and cache each of them
+    under its single-DOI URL so later single lookups are served locally.
+    """
+    found = {}
+    for item in data.get("message", {}).get("items", []):
+        doi = item.get("DOI")
+        if not doi:
+            continue
+        single = {"status": "ok", "message": item}
+        cache.set(doi_url(doi), 200, single)
+        found[doi.lower()] = (200, single)
+    return found
+
+def select_document_link(links):
+    """
+    Pick the best document link from a Crossref `link` list: text/html first,
+    then application/pdf, then any URL ending in .pdf.
+    """
+    document_link = None
+
+    # Iterate through links once to find the best document link
+    for link in links:
+        content_type = link.get("content-type")
+        url_link = link.get("URL")
+
+        # Prioritize text/html
+        if content_type == "text/html":
+            document_link = url_link
+            break
+        # Fallback to application/pdf
+        elif content_type == "application/pdf" and document_link is None:
+            document_link = url_link
+        # Fallback to any .pdf URL
+        elif url_link and url_link.endswith(".pdf") and document_link is None:
+            document_link = url_link
+
+    return document_link
+
+def parse_title_response(data, title):
+    """
+    Build the `get_article_info_from_title` result from a Crossref search response.
 
-CROSSREF_API_WAIT = 1/50 +0.05
+    Args:
+        data (dict): Decoded body of a /works?query.bibliographic= response.
+        title (str): The title string that was searched for.
+
+    Returns:
+        dict or None: {"title", "doi", "document_link"} for the top hit, or None.
+    """
+    if data.get("status") == "ok":
+        items = data.get("message", {}).get("items", [])
+        if items:
+            # Get the first item
+            item = items[0]
+            doi = item.get("DOI")
+
+            # Construct the result
+            result = {"title": title, "doi": doi}
+            result["document_link"] = select_document_link(item.get("link", []))
+            return result
+
+    return None
+
+def parse_doi_response(data, doi, returnTitle=True, addLicense=False):
+    """
+    Build the `get_info_from_doi` result from a Crossref /works/{doi} response.
+
+    Args:
+        data (dict): Decoded response body.
+        doi (str): Document Object Identifier
+        returnTitle (bool): If True, include the title in the result.
+        addLicense (bool): If True, include the license information.
+
+    Returns:
+        dict or None: See `get_info_from_doi`.
+    """
+    message = data.get('message', {})
+    result = {"doi": doi}
+
+    # Title retrieval
+    if returnTitle:
+        title = message.get('title', [None])
+        result['title'] = title[0] if title else None
+
+    # Document link selection
+    document_link = select_document_link(message.get('link', []))
+
+    # Add document link if found
+    if document_link:
+        result['document_link'] = document_link
+
+        # Add license if requested
+        if addLicense:
+            license_info = message.get('license')
+            if license_info:
+                result['license'] = license_info
+
+    # Determine final return value
+    if returnTitle:
+        return result
+    else:
+        if 'document_link' in result:
+            new_result = {'document_link': result['document_link']}
+            if addLicense and 'license' in result:
+                new_result['license'] = result['license']
+            return new_result
+        else:
+            return None
+
+def parse_omid_metadata(metadata):
+    """
+    Extract the OMID ('br/<number>') from an OpenCitations Meta response.
+
+    Raises:
+        Exception: If no metadata is found, or the OMID is not found in the metadata.
+    """
+    if not metadata:
+        raise Exception("No metadata found for the given DOI")
+
+    id_field = metadata[0].get("id", "")
+
+    omid_match = re.search(r"omid:br/(\d+)", id_field)
+    if not omid_match:
+        raise Exception("OMID not found in the metadata")
+
+    return f"br/{omid_match.group(1)}"
+
+def parse_doi_metadata(metadata):
+    """
+    Extract the DOI from an OpenCitations Meta response.
+
+    Raises:
+        Exception: If no metadata is found, or the DOI is not found in the metadata.
+    """
+    if not metadata:
+        raise Exception("No metadata found for the given OMID")
+
+    doi_field = metadata[0].get("doi", "")
+    if not doi_field:
+        raise Exception("DOI not found in the metadata")
+
+    return doi_field
+
+def citing_entities_query(omid):
+    """SPARQL query listing the entities that cite `omid`."""
+    return f"""
+    PREFIX cito:<http://purl.org/spar/cito/>
+    SELECT ?citation ?citing_entity WHERE {{
+        ?citation a cito:Citation .
+        ?citation cito:hasCitingEntity ?citing_entity .
+        ?citation cito:hasCitedEntity <https://w3id.org/oc/meta/{omid}>
+    }}
+    """
+
+def citing_entities_many_query(omids):
+    """SPARQL query listing (cited, citing) pairs for every OMID in `omids`, passed in one VALUES clause."""
+    values = " ".join(f"<https://w3id.org/oc/meta/{omid}>" for omid in omids)
+    return f"""
+    PREFIX cito:<http://purl.org/spar/cito/>
+    SELECT ?cited ?citing_entity WHERE {{
+        VALUES ?cited {{ {values} }}
+        ?citation a cito:Citation .
+        ?citation cito:hasCitingEntity ?citing_entity .
+        ?citation cito:hasCitedEntity ?cited
+    }}
+    """
+
+def parse_citing_pairs(results):
+    """Convert SPARQL JSON bindings of `citing_entities_many_query` into (cited, citing) OMID pairs."""
+    return [
+        ("/".join(i["cited"]["value"].split("/")[-2:]), "/".join(i["citing_entity"]["value"].split("/")[-2:]))
+        for i in results["results"]["bindings"]
+    ]
+
+def parse_citing_entities(results):
+    """Convert SPARQL JSON bindings into '<prefix>/<suffix>' OMIDs."""
+    return ["/".join(i["citing_entity"]["value"].split("/")[-2:]) for i in results["results"]["bindings"]]
 
 def get_article_info_from_title(title):
     """
@@ -12,54 +329,16 @@ def get_article_info_from_title(title):
     :param title: A string representing the title of the research paper.
     :return: A dictionary containing the title, DOI, and document_link, or None if no document link is found.
     """
-    url = f"https://api.crossref.org/works?query.bibliographic={title}&rows=1"
+    url = title_search_url(title)
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        if data.get("status") == "ok":
-            items = data.get("message", {}).get("items", [])
-            if items:
-                # Get the first item
-                item = items[0]
-                doi = item.get("DOI")
-
-                # Get all links from the item
-                links = item.get("link", [])
-
-                document_link = None
-
-                # Iterate through links once to find the best document link
-                for link in links:
-                    content_type = link.get("content-type")
-                    url_link = link.get("URL")
-
-                    # Prioritize text/html
-                    if content_type == "text/html":
-                        document_link = url_link
-                        break
-                    # Fallback to application/pdf
-                    elif content_type == "application/pdf" and document_link is None:
-                        document_link = url_link
-                    # Fallback to any .pdf URL
-                    elif url_link and url_link.endswith(".pdf") and document_link is None:
-                        document_link = url_link
-
-                # Construct the result
-                result = {"title": title, "doi": doi}
-
-                if document_link:
-                    result["document_link"] = document_link
-                else: result["document_link"] = None
-
-                return result
+        status, data = cached_get_json(url)
+        if status != 200:
+            return None
+        return parse_title_response(data, title)
 
     except requests.exceptions.RequestException:
         return None
 
-    return None
-
 def get_info_from_doi(doi, returnTitle=True, addLicense=False):
     """
     Retrieve information from a DOI using the Crossref API, including title, document link, and license.
@@ -72,108 +351,116 @@ def get_info_from_doi(doi, returnTitle=True, addLicense=False):
     Returns:
         dict or None: A dictionary containing the requested information or None if no document link is found and returnTitle is False.
     """
-    url = f"https://api.crossref.org/works/{doi}"
+    url = doi_url(doi)
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-
-        result = {"doi": doi}
-
-        # Title retrieval
-        if returnTitle:
-            title = data.get('message', {}).get('title', [None])
-            result['title'] = title[0] if title else None
-
-        # Document link selection
-        document_link = None
-        links = data.get('message', {}).get('link', [])
-
-        for link in links:
-            content_type = link.get('content-type')
-            url_link = link.get('URL')
-
-            if content_type == 'text/html':
-                document_link = url_link
-                break
-            elif content_type == 'application/pdf' and document_link is None:
-                document_link = url_link
-            elif url_link and url_link.endswith('.pdf') and document_link is None:
-                document_link = url_link
-
-        # Add document link if found
-        if document_link:
-            result['document_link'] = document_link
-
-            # Add license if requested
-            if addLicense:
-                license_info = data.get('message', {}).get('license')
-                if license_info:
-                    result['license'] = license_info
-
-        # Determine final return value
-        if returnTitle:
-            return result
-        else:
-            if 'document_link' in result:
-                new_result = {'document_link': result['document_link']}
-                if addLicense and 'license' in result:
-                    new_result['license'] = result['license']
-                return new_result
-            else:
-                return None
+        status, data = cached_get_json(url)
+        if status != 200:
+            return None
+        return parse_doi_response(data, doi, returnTitle=returnTitle, addLicense=addLicense)
 
     except requests.exceptions.RequestException:
         return None
 
-def parse_bibtex(file_path):
+def get_info_from_dois(dois, returnTitle=True, addLicense=False, batch_size=CROSSREF_BATCH_SIZE):
+    """
+    Batched version of `get_info_from_doi`.
+
+    DOIs are resolved with Crossref `filter=doi:...` queries of up to `batch_size` works,
+    projected with `select=` to the fields we use. DOIs already cached are answered
+    locally and anything a batch does not return falls back to a single lookup.
+
+    Args:
+        dois (list): Document Object Identifiers.
+        returnTitle (bool): If True, include the title in the result. Default is True.
+        addLicense (bool): If True, include the license information. Default is False.
+        batch_size (int): Maximum number of DOIs per request.
+
+    Returns:
+        list: One `get_info_from_doi` result (dict or None) per input DOI, in input order.
+    """
+    cache = get_default_cache()
+    responses, batches = plan_doi_batches(dois, cache, batch_size)
+
+    for batch in batches:
+        try:
+            status, data = fetch_json(batch_doi_url(batch))
+        except requests.exceptions.RequestException:
+            continue
+        if status == 200 and data:
+            responses.update(store_batch_items(data, cache))
+
+    results = []
+    fallback = {}
+    for doi in dois:
+        key = doi.strip().lower() if doi else None
+        if key is None:
+            results.append(None)
+        elif key in responses:
+            status, data = responses[key]
+            results.append(parse_doi_response(data, doi, returnTitle, addLicense) if status == 200 else None)
+        else:
+            # Not returned by any batch: single lookup, which also caches the miss
+            if key not in fallback:
+                fallback[key] = get_info_from_doi(doi.strip(), returnTitle=returnTitle, addLicense=addLicense)
+            results.append(fallback[key])
+    return results
+
+def parse_bibtex(file_path, title_index=None, resolve_missing=True):
     """
     Parses a BibTeX file and returns a list of dictionaries, where each
     dictionary contains the key-value pairs from one BibTeX entry.
     
     Args:
         file_path (str): The path to the BibTeX file to parse.
+        title_index (TitleIndex, optional): Local title index consulted before Crossref.
+        resolve_missing (bool): If True, look up a DOI on Crossref for entries without one.
 
     Returns:
         list: A list of dictionaries, where each dictionary contains the
             key-value pairs from one BibTeX entry.
     """
+    entries = (clean_bibtex_entry(entry) for entry in iter_bibtex_entries(file_path))
+    if resolve_missing:
+        entries = enrich_bibtex_entries(entries, title_index=title_index)
+    return list(entries)
 
-    with open(file_path, 'r', encoding='utf-8') as f:
-        raw_text = f.read()
-    
-    raw_text = re.split("\@\w+\{", raw_text)
-    articles = [i.strip() for i in raw_text if i.strip()]
-
-    # Split each article into lines and strip whitespace from each line
-    processed_articles = [[i.strip() for i in entry.splitlines()] for entry in articles]
-
-    final_tex_dicts = []
-    for item in processed_articles:
-        key_value_pairs = [i.split(' = ') for i in item[1:] if ' = ' in i]
-
-        element_dict = {}
-        for element in key_value_pairs:
-            # Remove latex classes
-            feature_values = re.sub(r'\{\\.*?\}', '', element[1])
-            # Remove braces and quotes from the value
-            feature_values = feature_values.replace('{', '').replace('}', '').replace('"', '').rstrip(',')
-
-            # Add the key-value pair to the dictionary
-            if element[0] in ["title", "url", "author", "doi", "keywords"]:
-                # Handle special cases for 'author' field
-                element_dict[element[0]] = feature_values.split(" and ") if element[0]=="author" else feature_values
-        
-        if not element_dict.get("doi"):
-
-            title_dict = get_article_info_from_title(element_dict.get("title"))
+def enrich_bibtex_entries(entries, title_index=None, concurrency=20, batch_size=1000):
+    """
+    Fill in DOI and document link for entries that have no DOI, by title search.
 
-            if title_dict is not None:
-                element_dict.update(title_dict)
+    Works on any iterable (e.g. the `iter_bibtex_entries` stream): entries are taken
+    `batch_size` at a time, the ones without a DOI are resolved concurrently, and the
+    batch is yielded in its original order.
 
-        final_tex_dicts.append(element_dict)
+    Args:
+        entries (iterable): Cleaned BibTeX dictionaries, as from `clean_bibtex_entry`.
+        title_index (TitleIndex, optional): Local title index consulted before Crossref.
+        concurrency (int): Maximum number of lookups in flight.
+        batch_size (int): Number of entries buffered per resolution pass.
 
-    return final_tex_dicts
+    Yields:
+        dict: The entries, updated in place with the lookup result when one was found.
+    """
+    # Imported here because reference_resolver itself imports this module
+    from modules.reference_resolver import resolve_references
+
+    def resolve(batch):
+        missing = [entry for entry in batch if not entry.get("doi")]
+        resolved = resolve_references([entry.get("title") or "" for entry in missing],
+                                      concurrency=concurrency, title_index=title_index)
+        for entry, item in zip(missing, resolved):
+            if item["result"] is not None:
+                entry.update(item["result"])
+        return batch
+
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            yield from resolve(batch)
+            batch = []
+    if batch:
+        yield from resolve(batch)
 
 def get_omid_from_doi(doi):
     """
@@ -188,23 +475,20 @@ def get_omid_from_doi(doi):
     Raises:
         Exception: If the request fails, no metadata is found, or the OMID is not found in the metadata.
     """
-    url = f"https://opencitations.net/meta/api/v1/metadata/doi:{doi}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise Exception(f"Failed to fetch metadata: {response.status_code}")
-    metadata = response.json()
+    index = get_default_identifier_index()
+    known, omid = index.omid_for(doi)
+    if known:
+        if omid is None:
+            raise Exception("No metadata found for the given DOI")
+        return omid
 
-    if not metadata:
-        raise Exception("No metadata found for the given DOI")
-
-    id_field = metadata[0].get("id", "")
+    url = f"{OPENCITATIONS_META_URL}/doi:{doi}"
+    status, metadata = cached_get_json(url)
+    if status != 200:
+        raise Exception(f"Failed to fetch metadata: {status}")
 
-    omid_match = re.search(r"omid:br/(\d+)", id_field)
-    if not omid_match:
-        raise Exception("OMID not found in the metadata")
-
-    omid = f"br/{omid_match.group(1)}"
-    return omid
+    index.add_metadata(metadata, queried=[doi], kind="doi")
+    return parse_omid_metadata(metadata)
 
 def get_doi_from_omid(omid):
     """
@@ -219,23 +503,23 @@ def get_doi_from_omid(omid):
     Raises:
         Exception: If the request fails, no metadata is found, or the DOI is not found in the metadata.
     """
-    url = f"https://opencitations.net/meta/api/v1/metadata/omid:{omid}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        raise Exception(f"Failed to fetch metadata: {response.status_code}")
-    metadata = response.json()
+    index = get_default_identifier_index()
+    known, doi = index.doi_for(omid)
+    if known:
+        if doi is None:
+            raise Exception("No metadata found for the given OMID")
+        return doi
 
-    if not metadata:
-        raise Exception("No metadata found for the given OMID")
+    url = f"{OPENCITATIONS_META_URL}/omid:{omid}"
+    status, metadata = cached_get_json(url)
+    if status != 200:
+        raise Exception(f"Failed to fetch metadata: {status}")
 
-    doi_field = metadata[0].get("doi", "")
-    if not doi_field:
-        raise Exception("DOI not found in the metadata")
-
-    return doi_field
+    index.add_metadata(metadata, queried=[omid], kind="omid")
+    return parse_doi_metadata(metadata)
 
 def get_citing_entities(omid, 
-                        sparql_url="https://opencitations.net/index/sparql"
+                        sparql_url=OPENCITATIONS_SPARQL_URL
                         ):
     """
     Runs a SPARQL query to find citations for a given OMID.
@@ -250,38 +534,63 @@ def get_citing_entities(omid,
     Raises:
         Exception: If the request fails.
     """
-    sparql_query = f"""
-    PREFIX cito:<http://purl.org/spar/cito/>
-    SELECT ?citation ?citing_entity WHERE {{
-        ?citation a cito:Citation .
-        ?citation cito:hasCitingEntity ?citing_entity .
-        ?citation cito:hasCitedEntity <https://w3id.org/oc/meta/{omid}>
-    }}
+    sparql_query = citing_entities_query(omid)
+    response = get_session().post(sparql_url, data=sparql_query.encode('utf-8'), headers=SPARQL_HEADERS, timeout=REQUEST_TIMEOUT)
+
+    if response.status_code != 200:
+        raise Exception(f"Failed to run SPARQL query: {response.status_code}")
+
+    return parse_citing_entities(response.json())
+
+def get_citing_entities_many(omids,
+                             sparql_url=OPENCITATIONS_SPARQL_URL
+                             ):
     """
+    Batched version of `get_citing_entities`: one SPARQL query for many OMIDs.
+
+    Args:
+        omids (list): OpenCitations Metadata Identifiers in the format 'br/<number>'.
+        sparql_url (str): The URL of the SPARQL endpoint. Defaults to the OpenCitations SPARQL endpoint.
+
+    Returns:
+        list: (cited, citing) OMID pairs, one per citation.
 
-    headers = {
-        "Content-Type": "application/sparql-query",
-        "Accept": "application/sparql-results+json"
-    }
-    response = requests.post(sparql_url, data=sparql_query.encode('utf-8'), headers=headers)
+    Raises:
+        Exception: If the request fails.
+    """
+    if not omids:
+        return []
+    sparql_query = citing_entities_many_query(omids)
+    response = get_session().post(sparql_url, data=sparql_query.encode('utf-8'), headers=SPARQL_HEADERS, timeout=REQUEST_TIMEOUT)
 
     if response.status_code != 200:
         raise Exception(f"Failed to run SPARQL query: {response.status_code}")
 
-    results = response.json()
-    return ["/".join(i["citing_entity"]["value"].split("/")[-2:]) for i in results["results"]["bindings"]]
+    return parse_citing_pairs(response.json())
 
-def process_document_to_dict(docfile):
+def process_document_to_dict(docfile, title_index=None):
     """
     Process a document and convert it to markdown text with bibliography references.
     After processing, it finds the DOI for the references from the bibliography.
 
+    The docling converter is created once per process and reused across calls; use
+    `document_conversion.convert_documents` to process many documents in parallel.
+
     :param docfile: A string representing the file path of the document.
+    :param title_index: Optional TitleIndex consulted before sending references to Crossref.
     """
-    converter = DocumentConverter()
+    return document_dict_from_markdown(convert_to_markdown(docfile), title_index=title_index)
 
-    md_text = converter.convert(docfile).document.export_to_markdown()
+def document_dict_from_markdown(md_text, title_index=None, resolve=True):
+    """
+    Split the markdown of a converted document into body and bibliography and resolve
+    the DOIs of the paper and of its references.
 
+    :param md_text: Markdown exported by docling.
+    :param title_index: Optional TitleIndex consulted before sending references to Crossref.
+    :param resolve: If False no lookups are made: the title is None and the bibliography
+        holds the raw reference strings.
+    """
     # Try to split the markdown text into body and bibliography, if it fails, just return the markdown text
     textsplit = re.split(r'##+\s*(?:\*\*)?\s*references\s*(?:\*\*)?\s*[\n\r]*', md_text, flags=re.IGNORECASE)
 
@@ -290,7 +599,7 @@ def process_document_to_dict(docfile):
     matchobject = re.search(doiregex, textsplit[0]) # Search for DOI in the text body
     if matchobject:
         doi = matchobject.group(0)
-        title = get_info_from_doi(doi)["title"]
+        title = get_info_from_doi(doi)["title"] if resolve else None
     else:
         doi = None
         title = None
@@ -311,23 +620,19 @@ def process_document_to_dict(docfile):
             bibliography = bibliography[:separator_location]
 
 
-        # Convert the bibliography string to individual ref strings
-        # Regular expression to match a reference block
-        pattern = r'([A-Z][a-zA-Z]*[^\n]*\s*\(\d{4}\).*?)(?=\n[A-Z][a-zA-Z]*[^\n]*\s*\(\d{4}\)|\Z)'
-        
-        # Use re.DOTALL to allow '.' to match newlines
-        references = re.findall(pattern, bibliography.encode('utf-8').decode('utf-8'), re.DOTALL)
-        
-        # Clean up any extra whitespace or newlines
-        references = [ref.strip() for ref in references if ref.strip()]
+        # Convert the bibliography string to individual ref strings (numbered or author-year style)
+        references = segment_references(bibliography)
+        if not resolve:
+            return {"title" : title, "doi" : doi, "body": paper_body, "bibliography": references, }
         
 
         # TODO: do a similarity search for a query on the references itself before sending it to the crossref api in case I only need the references related to a particular query
 
-        refdois = []
-        for ref in references:
-            time.sleep(CROSSREF_API_WAIT) # Crossref api grace period
-            refdois.append(get_article_info_from_title(ref))
+        # Resolve all references concurrently; pacing is handled by the shared Crossref rate limiter
+        # (imported here because reference_resolver itself imports this module)
+        from modules.reference_resolver import resolve_references
+
+        refdois = [item["result"] for item in resolve_references(references, title_index=title_index)]
         
         # Combine the paper body and the bibliography with DOIs
         return {"title" : title, "doi" : doi, "body": paper_body, "bibliography": refdois, }
@@ -0,0 +1,167 @@
+import asyncio
+import html
+import logging
+import re
+from urllib.parse import urljoin
+
+logger = logging.getLogger(__name__)
+
+# Anchor texts of "download" buttons, checked before links ending in .pdf
+BUTTON_TEXTS = ('open', 'open pdf', 'download', 'download pdf')
+
+# How a link was found, in order of precedence
+LINK_STRATEGIES = ('meta', 'iframe', 'button', 'pdf_href')
+
+_HIDDEN_RE = re.compile(rb'<!--.*?-->|<(script|style)\b[^>]*>.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+# Quoted attribute values may contain '>'
+_TAG_RE = re.compile(rb'''<(meta|iframe|a)\b((?:[^>"']|"[^"]*"|'[^']*')*)>''', re.IGNORECASE)
+_ATTR_RE = re.compile(rb'''([^\s=/>"']+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>"']+)))?''')
+# A text node that on its own reads like one of BUTTON_TEXTS
+_BUTTON_TEXT_RE = re.compile(rb'>\s*(?:open|download)(?:\s+pdf)?\s*<', re.IGNORECASE)
+_FULL_RE = re.compile(rb'full', re.IGNORECASE)
+
+_UNDECIDED = object()
+
+
+def _attributes(raw):
+    """{name: value} of a raw start tag's attributes; the first occurrence of a name wins."""
+    attrs = {}
+    for m in _ATTR_RE.finditer(raw):
+        name = m.group(1).lower().decode('ascii', 'replace')
+        if name in attrs:
+            continue
+        value = next((g for g in m.group(2, 3, 4) if g is not None), b'')
+        attrs[name] = html.unescape(value.decode('utf-8', 'replace'))
+    return attrs
+
+
+def prescan_pdf_link(data, base_url):
+    """
+    Byte-level pass over a landing page that settles the common cases without parsing it.
+
+    Applies the strategies of `find_pdf_link_in_html` in the same order, and only returns
+    an answer the full parse would give as well: a `citation_pdf_url` meta tag, else the
+    first iframe whose src mentions pdf, else the first href ending in .pdf when no anchor
+    text could match an earlier strategy. Comments, scripts and styles are skipped.
+
+    Returns:
+        tuple | _UNDECIDED: (link, strategy), (None, None) when the page has no candidate
+        at all, or _UNDECIDED when only a parse can tell.
+    """
+    data = _HIDDEN_RE.sub(b'', data)
+
+    first_pdf_href = None
+    for m in _TAG_RE.finditer(data):
+        tag, raw = m.group(1).lower(), m.group(2).lower()
+        # Attributes are only decoded for the tags that can matter
+        if tag == b'meta':
+            if b'citation_pdf_url' not in raw:
+                continue
+            attrs = _attributes(m.group(2))
+            if attrs.get('name') == 'citation_pdf_url':
+                if attrs.get('content'):
+                    return urljoin(base_url, attrs['content']), 'meta'
+                return _UNDECIDED
+        elif tag == b'iframe':
+            if b'pdf' not in raw:
+                continue
+            src = _attributes(m.group(2)).get('src')
+            if src is not None and 'pdf' in src.lower():
+                # Only a meta tag outranks an iframe; make sure none follows
+                for rest in _TAG_RE.finditer(data, m.end()):
+                    if rest.group(1).lower() == b'meta' and b'citation_pdf_url' in rest.group(2).lower() and \
+                            _attributes(rest.group(2)).get('name') == 'citation_pdf_url':
+                        return _UNDECIDED
+                return urljoin(base_url, src), 'iframe'
+        elif first_pdf_href is None and b'.pdf' in raw:
+            href = _attributes(m.group(2)).get('href')
+            if href is not None and href.strip().lower().endswith('.pdf'):
+                first_pdf_href = (m.start(), href.strip())
+
+    # Anchor texts decide strategy 3 and half of strategy 4, which a byte scan cannot
+    # attribute to tags; any text that might match sends the page to the parser
+    if _BUTTON_TEXT_RE.search(data):
+        return _UNDECIDED
+    if first_pdf_href is None:
+        return (None, None) if not _FULL_RE.search(data) else _UNDECIDED
+    start, href = first_pdf_href
+    if _FULL_RE.search(data, 0, start):
+        return _UNDECIDED
+    return urljoin(base_url, href), 'pdf_href'
+
+
+def parse_pdf_link(data, base_url):
+    """The four strategies of `find_pdf_link_in_html` on an lxml tree. Returns (link, strategy)."""
+    import lxml.html
+
+    if isinstance(data, str):
+        doc = lxml.html.fromstring(data.encode('utf-8'), parser=lxml.html.HTMLParser(encoding='utf-8'))
+    else:
+        doc = lxml.html.fromstring(data)
+
+    # STRATEGY 1: Meta tags
+    for meta in doc.iter('meta'):
+        if meta.get('name') == 'citation_pdf_url':
+            if meta.get('content'):
+                return urljoin(base_url, meta.get('content')), 'meta'
+            break
+
+    # STRATEGY 2: Iframes
+    for iframe in doc.iter('iframe'):
+        src = iframe.get('src')
+        if src is not None and 'pdf' in src.lower():
+            return urljoin(base_url, src), 'iframe'
+
+    anchors = [(a, a.get('href')) for a in doc.iter('a') if a.get('href') is not None]
+
+    # STRATEGY 3: Buttons
+    for a_tag, href in anchors:
+        if a_tag.text_content().lower().strip() in BUTTON_TEXTS:
+            return urljoin(base_url, href), 'button'
+
+    # STRATEGY 4: Links ending in .pdf
+    for a_tag, href in anchors:
+        if href.strip().lower().endswith('.pdf'):
+            return urljoin(base_url, href.strip()), 'pdf_href'
+        text = a_tag.text_content().lower()
+        if 'pdf' in text and 'full' in text:
+            return urljoin(base_url, href), 'pdf_href'
+    return None, None
+
+
+def locate_pdf_link(html_content, base_url):
+    """
+    Find the PDF link of a landing page: the `citation_pdf_url` meta tag, else an iframe
+    whose src mentions pdf, else a "download"/"open" button, else a link ending in .pdf
+    (or a "full ... pdf" link).
+
+    Most publisher pages are settled by `prescan_pdf_link`, a regex pass over the raw
+    bytes; the rest are parsed with lxml.
+
+    Args:
+        html_content (bytes | str): The landing page. Bytes are preferred, lxml then
+            honours the page's own charset.
+        base_url (str): Final URL of the page, relative links are resolved against it.
+
+    Returns:
+        tuple: (absolute link, strategy from LINK_STRATEGIES), or (None, None).
+    """
+    try:
+        data = html_content.encode('utf-8') if isinstance(html_content, str) else html_content
+        found = prescan_pdf_link(data, base_url)
+        if found is not _UNDECIDED:
+            return found
+        return parse_pdf_link(html_content, base_url)
+    except Exception as e:
+        logger.info(f"[PDF link] Error parsing HTML: {e}")
+    return None, None
+
+
+def find_pdf_link_in_html(html_content, base_url):
+    """The link found by `locate_pdf_link`, or None."""
+    return locate_pdf_link(html_content, base_url)[0]
+
+
+async def find_pdf_link(html_content, base_url):
+    """`locate_pdf_link` in a worker thread, so large pages do not block the event loop."""
+    return await asyncio.to_thread(locate_pdf_link, html_content, base_url)
@@ -0,0 +1,175 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+INDEX_NAME = "pdf_index.tsv"
+OBJECTS_DIR = "objects"
+
+_HASH_BLOCK = 1 << 20
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(_HASH_BLOCK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def iter_index(index_path):
+    """(paper_id, sha256) of every well-formed line of a pdf_index.tsv, in file order."""
+    with open(index_path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            paper_id, _, digest = line.rstrip("\n").partition("\t")
+            if paper_id and len(digest) == 64:
+                yield paper_id, digest
+
+
+def read_index(index_path):
+    """
+    {sha256: [paper_id, ...]} of a store index, for the stages that read the stored PDFs
+    (or their OCR output, named after the hash) and need the papers back. A paper listed
+    more than once counts under its last hash.
+    """
+    digests = dict(iter_index(index_path))
+    papers = {}
+    for paper_id, digest in digests.items():
+        papers.setdefault(digest, []).append(paper_id)
+    return papers
+
+
+class PDFStore:
+    """
+    Content-addressed store of downloaded PDFs.
+
+    Each distinct PDF is kept once, as `<root>/objects/<sha256>.pdf`; the paper ids are
+    mapped to hashes by an append-only `<root>/pdf_index.tsv` (one 'paper_id<TAB>sha256'
+    line per paper) that is read into memory when the store is opened. A paper whose PDF
+    is already stored for another record, e.g. a reprint or a conference abstract, only
+    gets an index line, so the objects directory holds every unique PDF exactly once and
+    OCR / conversion can run on it directly; `read_index` maps the hashes back to papers.
+
+    Paper ids are kept as text, as in the index file; the methods accept str or int ids.
+
+    Args:
+        root (str | Path): Store directory. Created if missing.
+
+    Example:
+        store = PDFStore(pdf_dir)
+        part = store.temp_path(paper_id)
+        ...write the download to `part` while hashing it...
+        path, duplicate = store.commit(paper_id, part, digest)
+    """
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.objects_dir = self.root / OBJECTS_DIR
+        self.index_path = self.root / INDEX_NAME
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+
+        self._digests = {}   # paper_id -> sha256
+        self._papers = {}    # sha256 -> [paper_id, ...]
+        self._load()
+        self._index = open(self.index_path, "a", encoding="utf-8")
+
+    def _load(self):
+        if not self.index_path.exists():
+            return
+        for paper_id, digest in iter_index(self.index_path):
+            self._link(paper_id, digest)
+
+    def _link(self, paper_id, digest):
+        previous = self._digests.get(paper_id)
+        if previous == digest:
+            return
+        if previous is not None:
+            self._papers[previous].remove(paper_id)
+        self._digests[paper_id] = digest
+        self._papers.setdefault(digest, []).append(paper_id)
+
+    def __contains__(self, paper_id):
+        return str(paper_id) in self._digests
+
+    def __len__(self):
+        return len(self._digests)
+
+    def digest_for(self, paper_id):
+        return self._digests.get(str(paper_id))
+
+    def object_path(self, digest):
+        return self.objects_dir / f"{digest}.pdf"
+
+    def path_for(self, paper_id):
+        """Stored PDF of `paper_id`, or None."""
+        digest = self._digests.get(str(paper_id))
+        return self.object_path(digest) if digest else None
+
+    def papers_for(self, digest):
+        """Paper ids sharing the PDF `digest`."""
+        return list(self._papers.get(digest, ()))
+
+    def temp_path(self, paper_id):
+        """Where to write a download in progress: inside the store, so `commit` is a rename."""
+        return self.objects_dir / f".{paper_id}.part"
+
+    def commit(self, paper_id, temp_file, digest):
+        """
+        Move the finished download `temp_file` (whose SHA-256 is `digest`) into the store
+        and index it under `paper_id`. If the PDF is already stored the file is dropped.
+
+        Returns:
+            tuple: (path of the stored PDF, True if it was a duplicate).
+        """
+        paper_id = str(paper_id)
+        target = self.object_path(digest)
+        duplicate = target.exists()
+        if duplicate:
+            os.unlink(temp_file)
+        else:
+            os.replace(temp_file, target)
+        self._link(paper_id, digest)
+        self._index.write(f"{paper_id}\t{digest}\n")
+        self._index.flush()
+        return target, duplicate
+
+    def import_file(self, paper_id, path):
+        """Move an existing PDF (e.g. a '{paper_id}.pdf' of the old layout) into the store."""
+        return self.commit(paper_id, path, sha256_file(path))
+
+    def import_directory(self, directory, pattern="*.pdf"):
+        """
+        Import the '{paper_id}.pdf' files lying directly in `directory` that are not
+        indexed yet. Returns the number of files imported.
+        """
+        imported = 0
+        for path in sorted(Path(directory).glob(pattern)):
+            paper_id = path.stem
+            if paper_id in self._digests or not path.is_file():
+                continue
+            self.import_file(paper_id, path)
+            imported += 1
+        if imported:
+            logger.info(f"[PDF store] Imported {imported} PDFs from {directory}")
+        return imported
+
+    def unique(self):
+        """Yield (sha256, path, paper_ids) once per stored PDF."""
+        for digest, paper_ids in self._papers.items():
+            if paper_ids:
+                yield digest, self.object_path(digest), list(paper_ids)
+
+    def stats(self):
+        unique = sum(1 for ids in self._papers.values() if ids)
+        return {"papers": len(self._digests), "unique_pdfs": unique, "duplicates": len(self._digests) - unique}
+
+    def close(self):
+        self._index.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
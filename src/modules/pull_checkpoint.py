@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+SUCCESS = "No Error"  # `error` value of a row the pull scripts resolved
+
+
+def repair_tail(path):
+    """
+    Cut a partially written last line (left by a killed run) so that appended results
+    start on a fresh line. Returns the size of the file afterwards.
+    """
+    if not os.path.exists(path):
+        return 0
+    with open(path, "rb+") as fh:
+        fh.seek(0, os.SEEK_END)
+        size = fh.tell()
+        if size == 0:
+            return 0
+        fh.seek(size - 1)
+        if fh.read(1) == b"\n":
+            return size
+
+        # Walk back to the last newline in blocks
+        end = size
+        while end > 0:
+            start = max(0, end - 65536)
+            fh.seek(start)
+            block = fh.read(end - start)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                end = start + newline + 1
+                break
+            end = start
+        logger.info(f"[Checkpoint] Dropping a truncated last line from {path}")
+        fh.truncate(end)
+        return end
+
+
+def _iter_results(path, offset=0):
+    """Decoded result lines from byte `offset` on; unreadable lines are skipped."""
+    with open(path, "rb") as fh:
+        fh.seek(offset)
+        for line in fh:
+            try:
+                yield json.loads(line)
+            except (json.JSONDecodeError, UnicodeDecodeError):
+                continue
+
+
+def completed_ids(path, retry_errors=False, id_field="paper_id"):
+    """
+    Ids of the rows already present in a results file.
+
+    Args:
+        path (str | Path): JSONL results of a previous run.
+        retry_errors (bool): If True only rows that succeeded count as done, so rows
+            that failed are looked up again.
+        id_field (str): Field holding the row id.
+
+    Returns:
+        set: Row ids to skip.
+    """
+    if not os.path.exists(path):
+        return set()
+    done = set()
+    for result in _iter_results(path):
+        row_id = result.get(id_field)
+        if row_id is None:
+            continue
+        if not retry_errors or result.get("error") == SUCCESS:
+            done.add(row_id)
+    return done
+
+
+def drop_superseded(path, resumed_at, id_field="paper_id"):
+    """
+    Remove failed results written before byte `resumed_at` whose row has a newer result
+    after it, i.e. rows retried by a `retry_errors` run. The file is rewritten next to
+    the original and swapped in with os.replace.
+    """
+    rerun = {r.get(id_field) for r in _iter_results(path, resumed_at)}
+    rerun.discard(None)
+    if not rerun:
+        return 0
+
+    dropped = 0
+    tmp = f"{path}.tmp"
+    with open(path, "rb") as src, open(tmp, "wb") as dst:
+        offset = 0
+        for line in src:
+            old = offset < resumed_at
+            offset += len(line)
+            if old and line.strip():
+                try:
+                    result = json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    result = {}
+                if result.get(id_field) in rerun and result.get("error") != SUCCESS:
+                    dropped += 1
+                    continue
+            dst.write(line)
+    os.replace(tmp, path)
+    return dropped
+
+
+def resume_rows(rows, path, retry_errors=False, row_id_field="recordid."):
+    """
+    Prepare a resumed pull: repair the results file and skip the input rows it already
+    holds (see `completed_ids`).
+
+    Returns:
+        tuple: (generator of the rows still to look up, size of the results file before
+            the run, to be passed to `finish_resume`).
+    """
+    resumed_at = repair_tail(path)
+    done = completed_ids(path, retry_errors=retry_errors)
+    logger.info(f"Resuming {path}: skipping {len(done)} papers already done")
+    return (row for row in rows if row.get(row_id_field) not in done), resumed_at
+
+
+def finish_resume(path, resumed_at, retry_errors=False):
+    """After a resumed run, drop the failed results that `retry_errors` looked up again."""
+    if not retry_errors:
+        return 0
+    dropped = drop_superseded(path, resumed_at)
+    logger.info(f"Removed {dropped} earlier failed results that were retried")
+    return dropped
@@ -0,0 +1,44 @@
+import json
+
+
+def batched(rows, batch_size):
+    """Group an iterable of rows into lists of `batch_size` (the last one may be shorter)."""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def json_writer(file_path, queue, mode='w', flush_every=100, count_field=None):
+    """
+    Write the rows put on `queue` to `file_path` as JSON lines until a None arrives.
+
+    Args:
+        file_path (str | Path): Results file.
+        queue (asyncio.Queue): Rows to write, then None.
+        mode (str): 'w' to start the file over, 'a' to append to it (resume).
+        flush_every (int): Rows between flushes, so a killed run loses little.
+        count_field (str | None): Field whose values are tallied in the returned dict.
+
+    Returns:
+        dict: {value of `count_field`: rows}, empty without `count_field`.
+    """
+    counts = {}
+    with open(file_path, mode, encoding='utf-8') as new_file:
+        written = 0
+        while True:
+            row = await queue.get()
+            if row is None:
+                break
+
+            new_file.write(json.dumps(row, ensure_ascii=False) + '\n')
+            if count_field is not None:
+                counts[row.get(count_field)] = counts.get(row.get(count_field), 0) + 1
+            written += 1
+            if written % flush_every == 0:
+                new_file.flush()
+    return counts
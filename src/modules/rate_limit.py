@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows: fall back to per-process limiting
+    fcntl = None
+
+# Requests per second assumed until Crossref tells us otherwise via X-Rate-Limit-* headers
+CROSSREF_DEFAULT_RATE = 10.0
+# Fraction of the advertised limit we actually use, to absorb clock jitter between processes
+RATE_HEADROOM = 0.9
+# How long to hold off after a 429 that carries no Retry-After header
+DEFAULT_BACKOFF = 2.0
+
+CROSSREF_RATE_LIMIT_FILE = Path(os.environ.get(
+    "CROSSREF_RATE_LIMIT_FILE",
+    Path(tempfile.gettempdir()) / "rheum_project_crossref.ratelimit",
+))
+
+_INTERVAL_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$")
+_INTERVAL_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0, None: 1.0}
+
+
+def parse_interval(value):
+    """Parse an X-Rate-Limit-Interval value such as '1s' or '60s' into seconds."""
+    match = _INTERVAL_RE.match(str(value))
+    if not match:
+        return None
+    return float(match.group(1)) * _INTERVAL_UNITS[match.group(2)]
+
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket limiter usable from threads (`acquire`) and coroutines (`acquire_async`).
+
+    When `state_file` is given the bucket lives in that file and is updated under an
+    exclusive `flock`, so every process on the node that points at the same file draws
+    from one shared budget. The rate adapts to the limits the server advertises through
+    `update_from_headers`, and a 429 empties the bucket for the Retry-After period.
+
+    Args:
+        rate (float): Initial number of requests per second.
+        burst (float | None): Bucket capacity. Defaults to one second worth of tokens.
+        state_file (str | Path | None): Shared state file for cross-process coordination.
+        headroom (float): Fraction of the advertised rate to actually use.
+    """
+
+    def __init__(self, rate=CROSSREF_DEFAULT_RATE, burst=None, state_file=None, headroom=RATE_HEADROOM):
+        self.headroom = headroom
+        self.state_file = Path(state_file) if state_file is not None and fcntl is not None else None
+        self._lock = threading.Lock()
+        self._state = {
+            "rate": rate,
+            "burst": burst if burst is not None else max(rate, 1.0),
+            "tokens": burst if burst is not None else max(rate, 1.0),
+            "updated": time.time(),
+        }
+        if self.state_file is not None:
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            self.state_file.touch(exist_ok=True)
+
+    @property
+    def rate(self):
+        return self._with_state(lambda state: state["rate"])
+
+    def _with_state(self, fn):
+        """Run `fn(state)` under the in-process lock and, if shared, the file lock."""
+        with self._lock:
+            if self.state_file is None:
+                return fn(self._state)
+
+            with open(self.state_file, "r+", encoding="utf-8") as fh:
+                fcntl.flock(fh, fcntl.LOCK_EX)
+                try:
+                    raw = fh.read()
+                    state = json.loads(raw) if raw.strip() else dict(self._state)
+                    result = fn(state)
+                    fh.seek(0)
+                    fh.truncate()
+                    fh.write(json.dumps(state))
+                    fh.flush()
+                finally:
+                    fcntl.flock(fh, fcntl.LOCK_UN)
+            return result
+
+    @staticmethod
+    def _refill(state, now):
+        elapsed = max(0.0, now - state["updated"])
+        state["tokens"] = min(state["burst"], state["tokens"] + elapsed * state["rate"])
+        state["updated"] = now
+
+    def _take(self, state):
+        """Take a token if one is available; otherwise return how long to wait for one."""
+        self._refill(state, time.time())
+        if state["tokens"] >= 1.0:
+            state["tokens"] -= 1.0
+            return 0.0
+        return (1.0 - state["tokens"]) / state["rate"]
+
+    def try_acquire(self):
+        """
+        Non-blocking acquire.
+
+        Returns:
+            float: 0.0 if a token was taken, otherwise the seconds until one is available.
+        """
+        return self._with_state(self._take)
+
+    def acquire(self):
+        """Block the calling thread until a token is available."""
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        """
+        Suspend the calling coroutine until a token is available. The state file lock is
+        taken in a worker thread, so another process holding it never stalls the loop.
+        """
+        while True:
+            wait = await asyncio.to_thread(self.try_acquire)
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
+
+    def set_rate(self, rate):
+        """Change the refill rate; the bucket capacity follows (one second worth of tokens)."""
+        def _update(state):
+            self._refill(state, time.time())
+            state["rate"] = rate
+            state["burst"] = max(rate, 1.0)
+            state["tokens"] = min(state["tokens"], state["burst"])
+        self._with_state(_update)
+
+    def backoff(self, seconds):
+        """Empty the bucket so that no request is let through for `seconds`."""
+        def _update(state):
+            self._refill(state, time.time())
+            state["tokens"] = min(state["tokens"], 0.0) - seconds * state["rate"]
+        self._with_state(_update)
+
+    def update_from_headers(self, headers, status=None):
+        """
+        Adapt to the limits advertised by the server.
+
+        Args:
+            headers (Mapping): Response headers (requests / httpx header objects both work).
+            status (int | None): Response status. A 429 triggers a backoff of Retry-After seconds.
+        """
+        if status == 429:
+            retry_after = headers.get("Retry-After")
+            try:
+                seconds = float(retry_after) if retry_after is not None else DEFAULT_BACKOFF
+            except ValueError:
+                seconds = DEFAULT_BACKOFF
+            self.backoff(seconds)
+
+        limit = headers.get("X-Rate-Limit-Limit")
+        interval = parse_interval(headers.get("X-Rate-Limit-Interval", "1s"))
+        if not limit or not interval:
+            return
+        try:
+            advertised = float(limit) / interval
+        except ValueError:
+            return
+
+        rate = advertised * self.headroom
+        if abs(rate - self.rate) > 1e-6:
+            self.set_rate(rate)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_crossref_rate_limiter():
+    """Return the process-wide Crossref limiter, shared with other processes through CROSSREF_RATE_LIMIT_FILE."""
+    with _limiters_lock:
+        if "crossref" not in _limiters:
+            _limiters["crossref"] = TokenBucketRateLimiter(state_file=CROSSREF_RATE_LIMIT_FILE)
+        return _limiters["crossref"]
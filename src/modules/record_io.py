@@ -0,0 +1,111 @@
+import json
+
+CHUNK_SIZE = 1 << 16  # characters read at a time from a JSON array file
+
+_WHITESPACE = " \t\r\n"
+
+
+def _skip_whitespace(buf, pos):
+    while pos < len(buf) and buf[pos] in _WHITESPACE:
+        pos += 1
+    return pos
+
+
+def _iter_json_array(fh, chunk_size):
+    """
+    Yield the elements of a top-level JSON array one at a time, reading `fh` in chunks.
+    Only the element being decoded (plus one chunk) is held in memory.
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = fh.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf, pos = buf[pos:] + chunk, 0
+
+    def next_char():
+        nonlocal pos
+        pos = _skip_whitespace(buf, pos)
+        while pos >= len(buf) and not eof:
+            fill()
+            pos = _skip_whitespace(buf, pos)
+        return buf[pos] if pos < len(buf) else ""
+
+    if next_char() != "[":
+        raise ValueError("Expected a JSON array")
+    pos += 1
+
+    first = True
+    while True:
+        c = next_char()
+        if c == "]":
+            return
+        if not first:
+            if c != ",":
+                raise ValueError(f"Expected ',' or ']' in JSON array, got {c!r}")
+            pos += 1
+            next_char()
+        first = False
+
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # The value must be followed by ',' or ']'; otherwise it may be a number cut off
+            # at the end of the chunk ('3.5' of '3.5e3'), so read more and decode it again
+            following = _skip_whitespace(buf, end)
+            if not eof and (following == len(buf) or buf[following] not in ",]"):
+                fill()
+                continue
+            break
+        pos = end
+        yield item
+
+
+def iter_records(file_path, encoding="utf-8", chunk_size=CHUNK_SIZE):
+    """
+    Stream the records of a JSONL file or of a file holding one top-level JSON array.
+
+    The format is detected from the first non-blank character. Records are parsed
+    incrementally and yielded as soon as they are read, so memory stays flat however
+    large the file is and consumers can start working before it has been read fully.
+
+    Args:
+        file_path (str | Path): Input file.
+        encoding (str): File encoding.
+        chunk_size (int): Characters read at a time for JSON arrays.
+
+    Yields:
+        The decoded records (dicts for the paper files).
+
+    Raises:
+        json.JSONDecodeError / ValueError: On malformed input, with the line number for JSONL.
+    """
+    with open(file_path, "r", encoding=encoding) as fh:
+        first = ""
+        while True:
+            c = fh.read(1)
+            if not c or c not in _WHITESPACE:
+                first = c
+                break
+        fh.seek(0)
+
+        if first == "[":
+            yield from _iter_json_array(fh, chunk_size)
+            return
+
+        for line_number, line in enumerate(fh, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{file_path}:{line_number}: {e}") from e
@@ -0,0 +1,178 @@
+import asyncio
+import re
+
+from modules.crossref_client import AsyncCrossrefClient
+from modules.paper_to_doi import parse_title_response, title_search_url
+
+DEFAULT_CONCURRENCY = 20
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_reference(reference):
+    """Key used to deduplicate reference strings: case-folded with whitespace collapsed."""
+    return _WHITESPACE_RE.sub(" ", reference).strip().casefold()
+
+
+async def lookup_reference(client, reference):
+    """
+    Resolve one reference string with Crossref.
+
+    Unlike `get_article_info_from_title`, failures are raised instead of being turned
+    into None, so callers can tell "no match" (None) apart from "lookup failed".
+
+    Returns:
+        dict or None: {"title", "doi", "document_link"} for the best match, or None.
+
+    Raises:
+        Exception: If the request fails or Crossref answers with a non-200 status.
+    """
+    status, data = await client.get_json(title_search_url(reference))
+    if status != 200:
+        raise Exception(f"Crossref returned status {status}")
+    return parse_title_response(data, reference)
+
+
+def extract_title_and_info(citation):
+    """
+    Pull the title and journal part out of a formatted citation
+    ('Authors. Title. Journal. Info...') for use as a Crossref query.
+
+    Returns:
+        str: '<title>. <journal>.<info>', '<title>. <journal>' or '<title>' depending on
+            how many parts the citation has, or '' if it has no title part.
+    """
+    parts = [p.strip() for p in citation.split('.') if p.strip()]
+
+    # Expect: [authors, title, journal/info, ...]
+    if len(parts) >= 4:
+        return f"{parts[1]}. {parts[2]}.{parts[3]}"
+    elif len(parts) == 3:
+        return f"{parts[1]}. {parts[2]}"
+    elif len(parts) == 2:
+        # If no journal info, return just the title
+        return parts[1]
+    else:
+        return ""
+
+
+def result_from_index(match, reference):
+    """Shape a `TitleIndex.match` hit like a `get_article_info_from_title` result."""
+    return {"title": reference, "doi": match["doi"], "document_link": match.get("document_link")}
+
+
+async def resolve_title(client, title, title_index=None, with_source=False):
+    """
+    `get_article_info_from_title` through `client`, answered from `title_index` when it
+    has a match. Titles Crossref resolves are added to the index.
+
+    With `with_source=True` returns (result, source), source being 'title_index' or
+    'title' (None when nothing was found).
+    """
+    result, source = None, None
+    if title_index is not None:
+        match = title_index.match(title)
+        if match is not None:
+            result, source = result_from_index(match, title), 'title_index'
+
+    if source is None:
+        result = await client.get_article_info_from_title(title)
+        if result:
+            source = 'title'
+        if title_index is not None and result is not None and result.get("doi"):
+            title_index.add(title, result["doi"], result.get("document_link"))
+    return (result, source) if with_source else result
+
+
+async def iter_resolved_references(references, client=None, concurrency=DEFAULT_CONCURRENCY, title_index=None):
+    """
+    Resolve reference strings concurrently and yield each result as soon as it completes.
+
+    Identical references (after `normalize_reference`) are looked up once and reported
+    for every position they occupy. A failing lookup is reported in the `error` field of
+    its own results and does not affect the others. Request pacing is left to the
+    client's Crossref rate limiter.
+
+    Args:
+        references (list): Reference strings, e.g. bibliography entries or titles.
+        client (AsyncCrossrefClient | None): Client to use. A private one is opened and
+            closed if omitted.
+        concurrency (int): Maximum number of lookups in flight.
+        title_index (TitleIndex | None): Local index consulted before Crossref. Matches
+            skip the network; references Crossref resolves are added to it.
+
+    Yields:
+        dict: {"index", "reference", "result", "error"} where `index` is the position
+            in `references`, `result` is the lookup result (or None) and `error` is
+            None or the error message.
+    """
+    positions = {}
+    for index, reference in enumerate(references):
+        if not reference or not reference.strip():
+            yield {"index": index, "reference": reference, "result": None, "error": "Empty reference"}
+            continue
+        positions.setdefault(normalize_reference(reference), []).append(index)
+
+    if not positions:
+        return
+
+    own_client = client is None
+    if own_client:
+        client = AsyncCrossrefClient(concurrency=concurrency)
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def resolve(key, index):
+        reference = references[index].strip()
+        if title_index is not None:
+            match = title_index.match(reference)
+            if match is not None:
+                return key, result_from_index(match, reference), None
+
+        async with semaphore:
+            try:
+                result = await lookup_reference(client, reference)
+            except Exception as e:
+                return key, None, str(e) or e.__class__.__name__
+
+        if title_index is not None and result is not None and result.get("doi"):
+            title_index.add(reference, result["doi"], result.get("document_link"))
+        return key, result, None
+
+    tasks = [asyncio.create_task(resolve(key, indices[0])) for key, indices in positions.items()]
+    try:
+        for finished in asyncio.as_completed(tasks):
+            key, result, error = await finished
+            for index in positions[key]:
+                # Each position gets its own copy so callers can update results independently
+                yield {"index": index, "reference": references[index],
+                       "result": dict(result) if result is not None else None, "error": error}
+    finally:
+        for task in tasks:
+            task.cancel()
+        if own_client:
+            await client.aclose()
+
+
+async def resolve_references_async(references, client=None, concurrency=DEFAULT_CONCURRENCY, title_index=None):
+    """Collect `iter_resolved_references` into a list ordered like `references`."""
+    resolved = [None] * len(references)
+    async for item in iter_resolved_references(references, client=client, concurrency=concurrency,
+                                               title_index=title_index):
+        resolved[item["index"]] = item
+    return resolved
+
+
+def resolve_references(references, concurrency=DEFAULT_CONCURRENCY, title_index=None):
+    """
+    Synchronous entry point used by `parse_bibtex` and `process_document_to_dict`.
+
+    Must not be called from inside a running event loop; use
+    `resolve_references_async` / `iter_resolved_references` there instead.
+
+    Returns:
+        list: One {"index", "reference", "result", "error"} dict per input, in input order.
+    """
+    if not references:
+        return []
+    return asyncio.run(resolve_references_async(references, concurrency=concurrency, title_index=title_index))
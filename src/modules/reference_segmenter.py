@@ -0,0 +1,117 @@
+import re
+
+# Markdown list bullets docling puts in front of reference lines
+_BULLET_RE = re.compile(r"\s*(?:[-*+]\s+)?")
+
+# '[12] ' or '12. ' / '12) ' opening a reference, at the start of a line (optionally after a
+# bullet) or, for OCR output without line breaks, anywhere after whitespace
+_LINE_NUMBERED_RE = re.compile(r"^[ \t]*(?:[-*+][ \t]+)?(?:\[(\d{1,4})\]|(\d{1,4})[.)])\s+(?=\S)", re.MULTILINE)
+_INLINE_NUMBERED_RE = re.compile(r"(?:(?<=\s)|^)(?:\[(\d{1,4})\]|(\d{1,4})[.)])\s+(?=\S)")
+
+# A line that opens an author-year reference: capitalised surname ...
+_AUTHOR_RE = re.compile(r"[A-Z][A-Za-z'À-ɏ-]*")
+# ... followed, close enough to be part of the same reference head, by '(2019)' or '(2019a)'
+_YEAR_RE = re.compile(r"\(\d{4}[a-z]?\)")
+
+# Inside OCR'd text with no line breaks: 'Surname, I.' or 'Surname I' right after the end of
+# the previous reference
+_INLINE_AUTHOR_RE = re.compile(r"(?<=[.)])\s+(?=[A-Z][A-Za-z'À-ɏ-]+,?\s+[A-Z]\.?[\s,.])")
+
+# How far into a reference the year may appear
+YEAR_WINDOW = 300
+# Lines longer than this are assumed to hold several references run together
+LONG_LINE = 1000
+# Fraction of lines that must start with a number for the list to be read as numbered
+_NUMBERED_SHARE = 0.5
+
+
+def _numbered_references(text, marker_re=_LINE_NUMBERED_RE):
+    """Split on '1.' / '[1]' markers, keeping only markers that continue the 1, 2, 3, ... sequence."""
+    starts = []
+    expected = None
+    for m in marker_re.finditer(text):
+        number = int(m.group(1) or m.group(2))
+        if expected is None or number == expected:
+            starts.append((m.start(), m.end()))
+            expected = number + 1
+
+    references = []
+    for i, (_, body_start) in enumerate(starts):
+        end = starts[i + 1][0] if i + 1 < len(starts) else len(text)
+        references.append(text[body_start:end])
+    return references
+
+
+def _opens_reference(line, start):
+    return _AUTHOR_RE.match(line, start) is not None and _YEAR_RE.search(line, start, start + YEAR_WINDOW) is not None
+
+
+def _split_long_line(line):
+    """Split a line holding several author-year references, e.g. OCR output without line breaks."""
+    pieces, start = [], 0
+    for m in _INLINE_AUTHOR_RE.finditer(line):
+        if _YEAR_RE.search(line, m.end(), m.end() + YEAR_WINDOW):
+            pieces.append(line[start:m.start()])
+            start = m.end()
+    pieces.append(line[start:])
+    return pieces
+
+
+def _author_year_references(text):
+    """Start a new reference at every line (or run-together piece) opening with 'Surname ... (YYYY)'."""
+    references = []
+    current = None
+    for line in text.splitlines():
+        pieces = _split_long_line(line) if len(line) > LONG_LINE else (line,)
+        for piece in pieces:
+            start = _BULLET_RE.match(piece).end()
+            if _opens_reference(piece, start):
+                if current is not None:
+                    references.append("\n".join(current))
+                current = [piece[start:]]
+            elif current is not None:
+                # Continuation of the previous reference; text before the first one is dropped
+                current.append(piece)
+    if current is not None:
+        references.append("\n".join(current))
+    return references
+
+
+def is_numbered(text):
+    """True if most non-empty lines of `text` start with a '1.' or '[1]' style marker."""
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return False
+    numbered = sum(1 for line in lines if _LINE_NUMBERED_RE.match(line))
+    return numbered >= _NUMBERED_SHARE * len(lines)
+
+
+def segment_references(bibliography):
+    """
+    Split a bibliography (markdown or plain text) into individual reference strings.
+
+    Numbered lists ('1. ...', '[1] ...') are split on the markers opening their lines,
+    which must follow one another in sequence so that stray numbers are not mistaken
+    for new entries; when OCR lost the line breaks, markers anywhere in the text count.
+    Otherwise a reference starts at each line that opens with a capitalised author
+    name and carries a '(YYYY)' year near its start, the rule the previous regular
+    expression used; very long lines are first cut where a new 'Surname, I.' head
+    follows the end of a reference. Every pattern is applied once, left to right, so
+    the cost is linear in the length of the text.
+
+    Args:
+        bibliography (str): The bibliography section.
+
+    Returns:
+        list: Reference strings with surrounding whitespace and list markers removed.
+    """
+    if is_numbered(bibliography):
+        references = _numbered_references(bibliography)
+    else:
+        references = _author_year_references(bibliography)
+    if len(references) <= 1:
+        # A numbered list whose line breaks were lost in OCR
+        numbered = _numbered_references(bibliography, _INLINE_NUMBERED_RE)
+        if len(numbered) > len(references):
+            references = numbered
+    return [ref.strip() for ref in references if ref.strip()]
@@ -0,0 +1,219 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+DEFAULT_CACHE_PATH = Path(os.environ.get(
+    "RHEUM_HTTP_CACHE",
+    Path.home() / ".cache" / "rheum_project" / "http_cache.sqlite",
+))
+DEFAULT_TTL = 30 * 24 * 3600          # Positive answers: 30 days
+DEFAULT_NEGATIVE_TTL = 3 * 24 * 3600  # Misses (404 / empty results): 3 days
+DEFAULT_MAX_ENTRIES = 2_000_000
+
+# Status codes that mean "this identifier does not exist" and are safe to cache as misses
+NEGATIVE_CACHE_STATUSES = (404,)
+
+# Only refresh the LRU timestamp of a row once per hour so that hot reads stay reads
+_TOUCH_INTERVAL = 3600
+# How many writes between two eviction checks
+_EVICT_EVERY = 1000
+
+
+def is_empty_response(data):
+    """True for a 200 response that carries no result (empty Crossref search, empty OpenCitations list)."""
+    if not data:
+        return True
+    if isinstance(data, dict) and "items" in data.get("message", {}):
+        return not data["message"]["items"]
+    return False
+
+
+class ResponseCache:
+    """
+    SQLite backed cache of HTTP responses keyed by request URL.
+
+    Each row stores the status code and the decoded JSON payload of a response together
+    with an expiry time. Misses (404s, empty result sets) are stored as negative entries
+    with their own, shorter TTL. When the table grows past `max_entries` the least
+    recently used rows are evicted.
+
+    Args:
+        path (str | Path): Location of the SQLite file. Parent directories are created.
+        ttl (float): Lifetime in seconds of positive entries.
+        negative_ttl (float): Lifetime in seconds of negative entries.
+        max_entries (int): Upper bound on the number of rows kept on disk.
+        enabled (bool): If False the cache is bypassed entirely (no reads, no writes).
+        refresh (bool): If True reads always miss but fresh responses are still written,
+            which forces every entry touched by the run to be refetched.
+    """
+
+    def __init__(self,
+                 path=DEFAULT_CACHE_PATH,
+                 ttl=DEFAULT_TTL,
+                 negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES,
+                 enabled=True,
+                 refresh=False):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self.refresh = refresh
+
+        self._lock = threading.Lock()
+        self._writes = 0
+        self._conn = None
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    status INTEGER NOT NULL,
+                    payload TEXT,
+                    negative INTEGER NOT NULL,
+                    expires_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def get(self, key):
+        """
+        Look up a cached response.
+
+        Args:
+            key (str): Cache key, usually the request URL.
+
+        Returns:
+            tuple or None: (status, payload) if a live entry exists, otherwise None.
+        """
+        if not self.enabled or self.refresh:
+            return None
+
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT status, payload, expires_at, accessed_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            status, payload, expires_at, accessed_at = row
+            if expires_at < now:
+                conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                conn.commit()
+                return None
+
+            if now - accessed_at > _TOUCH_INTERVAL:
+                conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+                conn.commit()
+
+        return status, (json.loads(payload) if payload is not None else None)
+
+    def set(self, key, status, payload, negative=False):
+        """
+        Store a response.
+
+        Args:
+            key (str): Cache key, usually the request URL.
+            status (int): HTTP status code of the response.
+            payload: JSON-serialisable body of the response, or None.
+            negative (bool): Mark the entry as a miss so it expires after `negative_ttl`.
+        """
+        if not self.enabled:
+            return
+
+        now = time.time()
+        expires_at = now + (self.negative_ttl if negative else self.ttl)
+        encoded = json.dumps(payload, ensure_ascii=False) if payload is not None else None
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, status, payload, negative, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, status, encoded, int(negative), expires_at, now),
+            )
+            conn.commit()
+
+            self._writes += 1
+            if self._writes % _EVICT_EVERY == 0:
+                self._evict(conn)
+
+    def store_response(self, key, status, payload):
+        """
+        Store an HTTP response if it is cacheable. 200s are stored (as misses when the
+        body is empty), 404s are stored as misses, anything else (5xx, 429) is skipped.
+        """
+        if status == 200:
+            self.set(key, status, payload, negative=is_empty_response(payload))
+        elif status in NEGATIVE_CACHE_STATUSES:
+            self.set(key, status, None, negative=True)
+
+    def _evict(self, conn):
+        conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        (count,) = conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        if count > self.max_entries:
+            # Trim to 90% of the bound so eviction does not run on every subsequent write
+            excess = count - int(self.max_entries * 0.9)
+            conn.execute(
+                "DELETE FROM responses WHERE key IN "
+                "(SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            )
+        conn.commit()
+
+    def clear(self):
+        """Remove every entry from the cache."""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM responses")
+            conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._connect().execute("SELECT COUNT(*) FROM responses").fetchone()
+        return count
+
+
+_default_cache = None
+
+
+def get_default_cache():
+    """Return the process-wide cache shared by the lookup functions in `paper_to_doi`."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ResponseCache()
+    return _default_cache
+
+
+def configure_cache(**kwargs):
+    """
+    Replace the process-wide cache. Accepts the same keyword arguments as `ResponseCache`,
+    e.g. `configure_cache(enabled=False)` to bypass it or `configure_cache(refresh=True)`
+    to refetch everything while rewriting the stored entries.
+    """
+    global _default_cache
+    if _default_cache is not None:
+        _default_cache.close()
+    _default_cache = ResponseCache(**kwargs)
+    return _default_cache
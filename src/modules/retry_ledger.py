@@ -0,0 +1,208 @@
+import json
+import random
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+# Seconds before the first retry and attempts allowed, per class of failure. The delay
+# doubles with every further attempt; a paper failing `max_attempts` times is dead.
+RETRY_POLICIES = {
+    "forbidden": (6 * 3600, 4),      # 403 for every mask: blocks tend to last hours
+    "timeout": (10 * 60, 6),
+    "network": (10 * 60, 6),         # DNS, refused or reset connections
+    "server": (30 * 60, 6),          # 5xx and 429
+    "not_found": (24 * 3600, 2),     # 404 / 410 on the PDF or the landing page
+    "no_pdf_link": (3 * 24 * 3600, 2),
+    "not_pdf": (24 * 3600, 3),       # Paywall or challenge page in place of the PDF
+    "no_url": (0, 1),                # Nothing to fetch: dead at once
+    "other": (3600, 3),
+}
+JITTER = (0.5, 1.5)
+
+_STATUS_RE = re.compile(r"(?:PDF req|Landing page) failed \((\d{3})")
+
+
+def classify_error(error):
+    """Map the error message `download_one_paper` leaves on a paper to a RETRY_POLICIES class."""
+    error = str(error or "")
+    lowered = error.lower()
+    if "no urls provided" in lowered:
+        return "no_url"
+    if lowered.startswith("not a pdf"):
+        return "not_pdf"  # Checked first: the sniffed bytes it quotes may read '403 Forbidden'
+    if "no pdf link" in lowered:
+        return "no_pdf_link"
+    if "403" in error and "forbidden" in lowered:
+        return "forbidden"
+    if "timed out" in lowered or "curl: (28)" in lowered or "timeout" in lowered:
+        return "timeout"
+    status = _STATUS_RE.search(error)
+    if status:
+        code = int(status.group(1))
+        if code in (404, 410):
+            return "not_found"
+        if code == 429 or code >= 500:
+            return "server"
+        if code == 403:
+            return "forbidden"
+    if any(s in lowered for s in ("could not resolve", "connection refused", "connection reset",
+                                  "curl: (6)", "curl: (7)", "curl: (35)", "curl: (52)", "curl: (56)")):
+        return "network"
+    return "other"
+
+
+def retry_delay(error_class, attempts, rng=random):
+    """Seconds until the next attempt after `attempts` failures: exponential, with jitter."""
+    base, _ = RETRY_POLICIES[error_class]
+    return base * 2 ** (attempts - 1) * rng.uniform(*JITTER)
+
+
+class RetryLedger:
+    """
+    Durable attempt history of the papers download.py could not fetch.
+
+    Every failure is classified (`classify_error`) and logged with its message; the
+    paper then gets a next attempt time with exponential backoff and jitter by class
+    (RETRY_POLICIES), or is marked dead once its class allows no further attempt. A
+    success clears the paper. States are kept in memory for the run so that the loader
+    can check each input paper without a query; each outcome is written as it happens.
+
+    Paper ids are stored as text; every method takes them as str or int (numeric record
+    ids arrive as ints from JSON) and normalizes them with str().
+
+    Args:
+        path (str | Path): Location of the SQLite file. Parent directories are created.
+    """
+
+    PENDING, DEAD = "pending", "dead"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = None
+        self._states = None  # paper_id -> (state, attempts, next_attempt_at)
+
+    def _connect(self):
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS papers (
+                    paper_id TEXT PRIMARY KEY,
+                    paper_info TEXT NOT NULL,
+                    state TEXT NOT NULL,
+                    attempts INTEGER NOT NULL,
+                    error_class TEXT NOT NULL,
+                    next_attempt_at REAL
+                ) WITHOUT ROWID
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS attempts (
+                    paper_id TEXT NOT NULL,
+                    attempted_at REAL NOT NULL,
+                    error_class TEXT NOT NULL,
+                    error TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS attempts_paper ON attempts(paper_id)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _load(self):
+        if self._states is None:
+            rows = self._connect().execute(
+                "SELECT paper_id, state, attempts, next_attempt_at FROM papers"
+            ).fetchall()
+            self._states = {paper_id: (state, attempts, next_at) for paper_id, state, attempts, next_at in rows}
+        return self._states
+
+    def should_try(self, paper_id, now=None):
+        """False for a dead paper or one whose next attempt is not due yet."""
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._load().get(str(paper_id))
+        if entry is None:
+            return True
+        state, _, next_at = entry
+        return state == self.PENDING and (next_at or 0) <= now
+
+    def due(self, now=None):
+        """paper_info of every pending paper whose next attempt is due, soonest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT paper_info FROM papers WHERE state = ? AND next_attempt_at <= ? ORDER BY next_attempt_at",
+                (self.PENDING, now),
+            ).fetchall()
+        return [json.loads(info) for (info,) in rows]
+
+    def record_failure(self, paper_info, error):
+        """
+        Log a failed attempt and schedule the next one.
+
+        Returns:
+            dict: {"error_class", "attempts", "next_attempt_at", "dead"}; next_attempt_at is
+            None for a dead paper.
+        """
+        paper_id = str(paper_info.get("paper_id"))
+        error_class = classify_error(error)
+        now = time.time()
+        with self._lock:
+            states = self._load()
+            _, attempts, _ = states.get(paper_id, (None, 0, None))
+            attempts += 1
+            dead = attempts >= RETRY_POLICIES[error_class][1]
+            next_at = None if dead else now + retry_delay(error_class, attempts)
+            state = self.DEAD if dead else self.PENDING
+            info = {k: v for k, v in paper_info.items() if k in ("paper_id", "url_1", "url_2")}
+
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO papers (paper_id, paper_info, state, attempts, error_class, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (paper_id, json.dumps(info, ensure_ascii=False), state, attempts, error_class, next_at),
+            )
+            conn.execute("INSERT INTO attempts (paper_id, attempted_at, error_class, error) VALUES (?, ?, ?, ?)",
+                         (paper_id, now, error_class, str(error)))
+            conn.commit()
+            states[paper_id] = (state, attempts, next_at)
+        return {"error_class": error_class, "attempts": attempts, "next_attempt_at": next_at, "dead": dead}
+
+    def record_success(self, paper_id):
+        """Forget a paper that was fetched (its attempt log is kept)."""
+        paper_id = str(paper_id)
+        with self._lock:
+            states = self._load()
+            if paper_id not in states:
+                return
+            conn = self._connect()
+            conn.execute("DELETE FROM papers WHERE paper_id = ?", (paper_id,))
+            conn.commit()
+            del states[paper_id]
+
+    def history(self, paper_id):
+        """[(attempted_at, error_class, error), ...] of a paper, oldest first."""
+        with self._lock:
+            return self._connect().execute(
+                "SELECT attempted_at, error_class, error FROM attempts WHERE paper_id = ? ORDER BY attempted_at",
+                (str(paper_id),),
+            ).fetchall()
+
+    def stats(self):
+        """Paper counts by state and by error class of the last failure."""
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT state, error_class, COUNT(*) FROM papers GROUP BY state, error_class"
+            ).fetchall()
+        return {f"{state}/{error_class}": count for state, error_class, count in rows}
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
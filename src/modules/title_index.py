@@ -0,0 +1,390 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import unicodedata
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves from several processes are not serialized
+    fcntl = None
+
+# MinHash / LSH layout: NUM_PERM hash functions split into BANDS bands of ROWS rows.
+# Two titles become candidates when any band agrees, which happens with probability
+# 1 - (1 - J^ROWS)^BANDS for Jaccard similarity J (about 50% at J=0.5, >99% at J=0.8).
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+DEFAULT_THRESHOLD = 0.8
+
+_rng = np.random.RandomState(1)
+# One random 64-bit seed per hash function; the i-th hash of a token is mix(token ^ seed_i)
+_SEEDS = _rng.randint(0, np.iinfo(np.int64).max, size=NUM_PERM, dtype=np.int64).astype(np.uint64)
+_BAND_MULT = (_rng.randint(1, np.iinfo(np.int64).max, size=ROWS, dtype=np.int64).astype(np.uint64) | np.uint64(1))
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+_SIGNATURES = "signatures.npy"
+_BAND_KEYS = "band_keys.npy"
+_BAND_IDS = "band_ids.npy"
+_OFFSETS = "offsets.npy"
+_PAYLOAD = "payload.bin"
+# Name of the generation directory holding the live arrays; swapped in by `save`
+_CURRENT = "CURRENT"
+_GENERATION = "gen-{:06d}"
+_LOCK = "LOCK"
+
+# Elements copied at a time when merging the stored arrays into a new generation
+_COPY_CHUNK = 1 << 20
+
+
+def normalize_title(text):
+    """Lowercase, strip accents and punctuation; returns the set of word tokens."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+    return {token for token in _TOKEN_RE.findall(text) if len(token) > 1}
+
+
+def _mix64(z):
+    """splitmix64 finalizer; uint64 multiplication in numpy wraps, as intended."""
+    z = (z ^ (z >> np.uint64(30))) * _MIX_1
+    z = (z ^ (z >> np.uint64(27))) * _MIX_2
+    return z ^ (z >> np.uint64(31))
+
+
+def minhash_signature(text):
+    """MinHash signature (NUM_PERM uint32 values) of the normalized tokens of `text`, or None if it has none."""
+    tokens = normalize_title(text)
+    if not tokens:
+        return None
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(t.encode("utf-8"), digest_size=8).digest(), "little") for t in tokens),
+        dtype=np.uint64, count=len(tokens),
+    )
+    permuted = _mix64(hashes[:, None] ^ _SEEDS[None, :])
+    return (permuted.min(axis=0) >> np.uint64(32)).astype(np.uint32)
+
+
+def band_keys(signatures):
+    """LSH bucket key of every band of every signature, shape (BANDS, N) uint64."""
+    signatures = np.atleast_2d(signatures).astype(np.uint64)
+    banded = signatures.reshape(len(signatures), BANDS, ROWS)
+    # uint64 arithmetic wraps, which is fine for a hash
+    return (banded * _BAND_MULT).sum(axis=2, dtype=np.uint64).T
+
+
+def _load_array(path):
+    try:
+        return np.load(path, mmap_mode="r")
+    except ValueError: # numpy refuses to memory-map zero-sized arrays
+        return np.load(path)
+
+
+def _generation_dir(path):
+    """Directory of the live generation under `path`, or None if nothing is saved there."""
+    current = path / _CURRENT
+    if current.exists():
+        return path / current.read_text(encoding="utf-8").strip()
+    if (path / _SIGNATURES).exists():
+        return path  # Flat layout written before generations were introduced
+    return None
+
+
+def _generations(path):
+    return [d for d in path.glob("gen-*") if d.is_dir() and d.name[4:].isdigit()]
+
+
+@contextmanager
+def _save_lock(path):
+    """Exclusive `flock` on `<path>/LOCK`, held while a generation is written and swapped in."""
+    if fcntl is None:
+        yield
+        return
+    with open(path / _LOCK, "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _write_array(path, dtype, shape, fill):
+    """
+    Create the .npy file `path` and let `fill(out)` write it in place through a memory
+    map, so arrays larger than RAM can be written.
+    """
+    if 0 in shape:
+        np.save(path, np.empty(shape, dtype=dtype))
+        return
+    out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+    fill(out)
+    out.flush()
+    del out
+    with open(path, "rb+") as fh:
+        os.fsync(fh.fileno())
+
+
+def _copy(dst, dst_start, src, start, stop):
+    """dst[dst_start:...] = src[start:stop] along the first axis, about `_COPY_CHUNK` elements at a time."""
+    step = max(1, _COPY_CHUNK // max(1, int(np.prod(src.shape[1:]))))
+    for lo in range(start, stop, step):
+        hi = min(lo + step, stop)
+        dst[dst_start + lo - start:dst_start + hi - start] = src[lo:hi]
+
+
+def _interleave(out, old, new, positions):
+    """
+    Fill `out` with the elements of `old` in order and those of `new` at `positions`
+    (increasing indexes into `out`), copying `old` in chunks.
+    """
+    previous = 0
+    for i, position in enumerate(positions):
+        stop = int(position) - i
+        _copy(out, previous + i, old, previous, stop)
+        previous = stop
+    _copy(out, previous + len(new), old, previous, len(old))
+    if len(new):
+        out[positions] = new
+
+
+class TitleIndex:
+    """
+    Persistent MinHash/LSH index of reference titles already resolved to DOIs.
+
+    The on-disk part is a directory of flat arrays (signatures, per-band sorted bucket
+    keys, record offsets) plus a blob of JSON records, all opened with memory mapping,
+    so loading is O(1) and millions of titles cost little resident memory. Titles
+    added since the last `save` live in a small in-memory delta.
+
+    Each `save` writes a complete generation directory (`gen-NNNNNN/`) and then points
+    the `CURRENT` file at it, so a reader only ever sees one generation's arrays.
+
+    A query is answered when a candidate shares an LSH bucket with it and their
+    estimated Jaccard similarity is at least `threshold`.
+
+    Args:
+        path (str | Path | None): Index directory. None gives a purely in-memory index.
+        threshold (float): Minimum estimated Jaccard similarity for a match.
+    """
+
+    def __init__(self, path=None, threshold=DEFAULT_THRESHOLD):
+        self.path = Path(path) if path is not None else None
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+
+        self._signatures = np.empty((0, NUM_PERM), dtype=np.uint32)
+        self._band_keys = np.empty((BANDS, 0), dtype=np.uint64)
+        self._band_ids = np.empty((BANDS, 0), dtype=np.uint32)
+        self._offsets = np.zeros(1, dtype=np.uint64)
+        self._payload = b""
+        self._payload_file = None
+        self._dir = None  # Directory of the loaded generation
+
+        self._new_signatures = []
+        self._new_records = []
+        self._new_buckets = {}
+
+        if self.path is not None and _generation_dir(self.path) is not None:
+            self._load()
+
+    @classmethod
+    def load(cls, path, threshold=DEFAULT_THRESHOLD):
+        return cls(path, threshold=threshold)
+
+    def _load(self):
+        self._dir = _generation_dir(self.path)
+        self._signatures = _load_array(self._dir / _SIGNATURES)
+        self._band_keys = _load_array(self._dir / _BAND_KEYS)
+        self._band_ids = _load_array(self._dir / _BAND_IDS)
+        self._offsets = _load_array(self._dir / _OFFSETS)
+        if os.path.getsize(self._dir / _PAYLOAD):
+            self._payload_file = open(self._dir / _PAYLOAD, "rb")
+            self._payload = mmap.mmap(self._payload_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @property
+    def _stored(self):
+        return len(self._signatures)
+
+    def __len__(self):
+        return self._stored + len(self._new_records)
+
+    def _record(self, idx):
+        if idx < self._stored:
+            start, end = int(self._offsets[idx]), int(self._offsets[idx + 1])
+            return json.loads(self._payload[start:end])
+        return self._new_records[idx - self._stored]
+
+    def _signature(self, idx):
+        if idx < self._stored:
+            return self._signatures[idx]
+        return self._new_signatures[idx - self._stored]
+
+    def add(self, title, doi, document_link=None):
+        """
+        Add a title that resolved to `doi`. Returns False if the title has no usable tokens.
+        """
+        signature = minhash_signature(title)
+        if signature is None or not doi:
+            return False
+
+        idx = len(self)
+        self._new_signatures.append(signature)
+        self._new_records.append({"title": title, "doi": doi, "document_link": document_link})
+        for band, key in enumerate(band_keys(signature)[:, 0]):
+            self._new_buckets.setdefault((band, int(key)), []).append(idx)
+        return True
+
+    def _candidates(self, keys):
+        candidates = set()
+        for band in range(BANDS):
+            key = keys[band]
+            if self._stored:
+                row = self._band_keys[band]
+                lo = np.searchsorted(row, key, side="left")
+                hi = np.searchsorted(row, key, side="right")
+                candidates.update(int(i) for i in self._band_ids[band][lo:hi])
+            candidates.update(self._new_buckets.get((band, int(key)), ()))
+        return candidates
+
+    def match(self, text):
+        """
+        Find the indexed title most similar to `text`.
+
+        Returns:
+            dict or None: {"title", "doi", "document_link", "similarity"} of the best
+                candidate above the threshold, otherwise None. Updates the hit counters.
+        """
+        signature = minhash_signature(text) if text else None
+        best, best_score = None, self.threshold
+        if signature is not None:
+            for idx in self._candidates(band_keys(signature)[:, 0]):
+                score = float(np.mean(self._signature(idx) == signature))
+                if score >= best_score:
+                    best, best_score = idx, score
+
+        if best is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        record = dict(self._record(best))
+        record["similarity"] = best_score
+        return record
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {"titles": len(self), "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate}
+
+    def save(self, path=None):
+        """
+        Merge the in-memory delta into the on-disk arrays.
+
+        The stored arrays are streamed into a new generation directory through memory
+        maps (only the delta is sorted in memory), then `CURRENT` is switched to it with
+        one os.replace, so a crash leaves either the old generation or the new one in
+        place, never a mix. Saves are serialized by a file lock; one that finds a newer
+        generation written by another process merges its delta on top of that one.
+        Generations other than the current one are removed.
+        """
+        path = Path(path) if path is not None else self.path
+        if path is None:
+            raise ValueError("No path given for the title index")
+        path.mkdir(parents=True, exist_ok=True)
+
+        with _save_lock(path):
+            latest = _generation_dir(path)
+            if path == self.path and latest is not None and latest != self._dir:
+                self.close()
+                self._load()  # Base the merge on what the other process saved
+
+            if self._new_records or latest is None or path != self.path:
+                self._write_generation(path)
+            for stale in _generations(path):
+                if stale != _generation_dir(path):
+                    shutil.rmtree(stale, ignore_errors=True)
+
+        self.path = path
+        self._new_signatures, self._new_records, self._new_buckets = [], [], {}
+        self._load()
+
+    def _write_generation(self, path):
+        stored, added = self._stored, len(self._new_records)
+        total = stored + added
+        new_signatures = np.stack(self._new_signatures) if added else np.empty((0, NUM_PERM), dtype=np.uint32)
+        new_keys = band_keys(new_signatures) if added else np.empty((BANDS, 0), dtype=np.uint64)
+        new_payload = [json.dumps(r, ensure_ascii=False).encode("utf-8") for r in self._new_records]
+        lengths = np.fromiter((len(p) for p in new_payload), dtype=np.uint64, count=added)
+
+        numbers = [int(d.name[4:]) for d in _generations(path)]
+        generation = _GENERATION.format(max(numbers, default=0) + 1)
+        target = path / generation
+        target.mkdir()
+
+        # Per band: the delta sorted by key and where it lands among the stored keys
+        # (after equal stored keys, as a stable sort of the whole would put it)
+        merges = []
+        for band in range(BANDS):
+            order = np.argsort(new_keys[band], kind="stable")
+            keys = new_keys[band][order]
+            positions = np.searchsorted(self._band_keys[band], keys, side="right") + np.arange(added)
+            merges.append((keys, (stored + order).astype(np.uint32), positions))
+
+        def fill_signatures(out):
+            _copy(out, 0, self._signatures, 0, stored)
+            out[stored:] = new_signatures
+
+        def fill_keys(out):
+            for band, (keys, _, positions) in enumerate(merges):
+                _interleave(out[band], self._band_keys[band], keys, positions)
+
+        def fill_ids(out):
+            for band, (_, ids, positions) in enumerate(merges):
+                _interleave(out[band], self._band_ids[band], ids, positions)
+
+        def fill_offsets(out):
+            _copy(out, 0, self._offsets, 0, stored + 1)
+            out[stored + 1:] = self._offsets[stored] + np.cumsum(lengths, dtype=np.uint64)
+
+        _write_array(target / _SIGNATURES, np.uint32, (total, NUM_PERM), fill_signatures)
+        _write_array(target / _BAND_KEYS, np.uint64, (BANDS, total), fill_keys)
+        _write_array(target / _BAND_IDS, np.uint32, (BANDS, total), fill_ids)
+        _write_array(target / _OFFSETS, np.uint64, (total + 1,), fill_offsets)
+
+        with open(target / _PAYLOAD, "wb") as fh:
+            if stored:
+                with open(self._dir / _PAYLOAD, "rb") as src:
+                    shutil.copyfileobj(src, fh)
+            for chunk in new_payload:
+                fh.write(chunk)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        pointer = path / f"{_CURRENT}.tmp"
+        with open(pointer, "w", encoding="utf-8") as fh:
+            fh.write(generation)
+            fh.flush()
+            os.fsync(fh.fileno())
+
+        self.close()
+        os.replace(pointer, path / _CURRENT)
+
+    def close(self):
+        """Release the memory maps of the on-disk part."""
+        if isinstance(self._payload, mmap.mmap):
+            self._payload.close()
+        self._payload = b""
+        if self._payload_file is not None:
+            self._payload_file.close()
+            self._payload_file = None
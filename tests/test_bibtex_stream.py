@@ -0,0 +1,60 @@
+from modules.bibtex_stream import clean_bibtex_entry, iter_bibtex_entries, parse_bibtex_entry
+
+BIBTEX = r"""
+Exported by a reference manager @ some date.
+
+@comment{ignored}
+@string{jr = "J Rheumatol"}
+
+@article{smith2020,
+  title = {Methotrexate in {Early} Rheumatoid
+           Arthritis},
+  author = "Smith, Anne and Doe, John",
+  year = 2020,
+  journal = jr # " Suppl",
+  doi = {10.1000/xyz123}
+}
+@inproceedings(lee2019, title = "A {"}quoted{"} title", keywords = {gout, urate})
+@book{broken,
+  title = {Unbalanced
+"""
+
+
+def write(tmp_path, text):
+    path = tmp_path / "refs.bib"
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_iter_bibtex_entries_streams_complete_entries(tmp_path):
+    entries = list(iter_bibtex_entries(write(tmp_path, BIBTEX)))
+    assert [e["ID"] for e in entries] == ["smith2020", "lee2019"]
+
+    smith, lee = entries
+    assert smith["ENTRYTYPE"] == "article"
+    assert " ".join(smith["title"].split()) == "Methotrexate in {Early} Rheumatoid Arthritis"
+    assert smith["author"] == "Smith, Anne and Doe, John"
+    assert smith["year"] == "2020"
+    assert smith["journal"] == "jr Suppl"
+    assert smith["doi"] == "10.1000/xyz123"
+
+    assert lee["ENTRYTYPE"] == "inproceedings"
+    assert lee["title"] == 'A {"}quoted{"} title'
+    assert lee["keywords"] == "gout, urate"
+
+
+def test_entries_sharing_a_line(tmp_path):
+    entries = list(iter_bibtex_entries(write(tmp_path, "@misc{a, title={One}}@misc{b, title={Two}}\n")))
+    assert [(e["ID"], e["title"]) for e in entries] == [("a", "One"), ("b", "Two")]
+
+
+def test_parse_bibtex_entry_skips_non_records():
+    assert parse_bibtex_entry("@preamble{ \"x\" }") is None
+    assert parse_bibtex_entry("not an entry") is None
+
+
+def test_clean_bibtex_entry():
+    entry = parse_bibtex_entry(
+        r"@article{k, title = {The {\em Role} of {IL-6}}, author = {Smith, A. and Doe, J.}, pages = {1--2}}"
+    )
+    assert clean_bibtex_entry(entry) == {"title": "The of IL-6", "author": ["Smith, A.", "Doe, J."]}
@@ -0,0 +1,60 @@
+from modules import domain_strategy
+from modules.domain_strategy import DomainStrategyTable
+
+MASKS = ["chrome120", "safari17_0", "edge101"]
+
+
+def test_order_prefers_what_worked_and_keeps_default_order_otherwise(tmp_path):
+    table = DomainStrategyTable(tmp_path / "strategies.sqlite")
+    assert table.order("wiley.com", "mask", MASKS) == MASKS
+
+    table.record("wiley.com", "mask", "chrome120", success=False, seconds=2.0)
+    table.record("wiley.com", "mask", "edge101", success=True, seconds=1.0)
+    assert table.order("wiley.com", "mask", MASKS) == ["edge101", "safari17_0", "chrome120"]
+    # Other domains and kinds are unaffected
+    assert table.order("tandfonline.com", "mask", MASKS) == MASKS
+    assert table.order("wiley.com", "strategy", MASKS) == MASKS
+    table.close()
+
+
+def test_equal_success_rate_is_broken_by_latency(tmp_path):
+    table = DomainStrategyTable(tmp_path / "strategies.sqlite")
+    table.record("wiley.com", "mask", "chrome120", success=True, seconds=5.0)
+    table.record("wiley.com", "mask", "safari17_0", success=True, seconds=1.0)
+    assert table.order("wiley.com", "mask", MASKS) == ["safari17_0", "chrome120", "edge101"]
+    table.close()
+
+
+def test_outcomes_are_added_to_stored_counts(tmp_path):
+    path = tmp_path / "strategies.sqlite"
+    first, second = DomainStrategyTable(path), DomainStrategyTable(path)
+    first.order("wiley.com", "mask", MASKS)
+    second.order("wiley.com", "mask", MASKS)
+    first.record("wiley.com", "mask", "edge101", success=True, seconds=1.0)
+    second.record("wiley.com", "mask", "edge101", success=False, seconds=3.0)
+    first.close()
+    second.close()
+
+    stats = DomainStrategyTable(path).stats("wiley.com")
+    entry = stats[("wiley.com", "mask", "edge101")]
+    assert (entry["successes"], entry["failures"], entry["mean_seconds"]) == (1, 1, 2.0)
+    assert entry["last_success_at"] is not None
+
+
+def test_outcomes_are_flushed_every_few_records(tmp_path, monkeypatch):
+    monkeypatch.setattr(domain_strategy, "_FLUSH_EVERY", 3)
+    path = tmp_path / "strategies.sqlite"
+    table = DomainStrategyTable(path)
+    for _ in range(3):
+        table.record("wiley.com", "strategy", "smart", success=True)
+    assert DomainStrategyTable(path).stats()[("wiley.com", "strategy", "smart")]["successes"] == 3
+    table.close()
+
+
+def test_disabled_table_writes_nothing(tmp_path):
+    path = tmp_path / "strategies.sqlite"
+    table = DomainStrategyTable(path, enabled=False)
+    table.record("wiley.com", "mask", "edge101", success=True)
+    assert table.order("wiley.com", "mask", MASKS) == MASKS
+    table.close()
+    assert not path.exists()
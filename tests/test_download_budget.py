@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+
+from download import UNKNOWN_SIZE_RESERVATION, ByteBudget, expected_size
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_reserve_waits_until_budget_is_released():
+    async def scenario():
+        budget = ByteBudget(100)
+        events = []
+
+        async def download(name, size, hold):
+            async with budget.reserve(size):
+                events.append(f"start {name}")
+                await hold.wait()
+            events.append(f"end {name}")
+
+        hold_a, hold_b = asyncio.Event(), asyncio.Event()
+        a = asyncio.create_task(download("a", 60, hold_a))
+        await asyncio.sleep(0)
+        b = asyncio.create_task(download("b", 60, hold_b))
+        await asyncio.sleep(0.01)
+        assert events == ["start a"] and budget.used == 60
+
+        hold_a.set()
+        hold_b.set()
+        await asyncio.gather(a, b)
+        assert events == ["start a", "end a", "start b", "end b"]
+        assert budget.used == 0
+
+    run(scenario())
+
+
+def test_resize_never_waits_and_shrinking_wakes_waiters():
+    async def scenario():
+        budget = ByteBudget(100)
+        async with budget.reserve(50) as reservation:
+            await asyncio.wait_for(reservation.resize(90), 1)
+            assert budget.used == 90
+
+            second = budget.reserve(30)
+            waiting = asyncio.create_task(second.__aenter__())
+            await asyncio.sleep(0.01)
+            assert not waiting.done()
+
+            await reservation.resize(20)
+            await asyncio.wait_for(waiting, 1)
+            assert budget.used == 50
+        assert budget.used == 30
+        await second.__aexit__(None, None, None)
+        assert budget.used == 0
+
+    run(scenario())
+
+
+def test_reservations_are_capped_at_the_limit():
+    async def scenario():
+        budget = ByteBudget(100)
+        async with budget.reserve(500) as reservation:
+            assert reservation.size == 100
+            await reservation.resize(10_000)
+            assert budget.used == 100
+        assert budget.used == 0
+
+    run(scenario())
+
+
+def test_reservation_is_released_when_the_download_fails():
+    async def scenario():
+        budget = ByteBudget(100)
+        with pytest.raises(RuntimeError):
+            async with budget.reserve(40) as reservation:
+                await reservation.resize(70)
+                raise RuntimeError("connection reset")
+        return budget.used
+
+    assert run(scenario()) == 0
+
+
+def test_expected_size_falls_back_without_content_length():
+    assert expected_size(FakeResponse({"Content-Length": "1234"})) == 1234
+    assert expected_size(FakeResponse({})) == UNKNOWN_SIZE_RESERVATION
+    assert expected_size(FakeResponse({"Content-Length": "chunked"})) == UNKNOWN_SIZE_RESERVATION
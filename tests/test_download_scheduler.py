@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+import download
+from download import DomainScheduler
+
+
+def paper(n, host):
+    return {"paper_id": n, "url_1": f"https://{host}/article/{n}"}
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_get_rotates_over_domains():
+    async def scenario():
+        scheduler = DomainScheduler(default_interval=0, default_concurrency=10)
+        for n, host in enumerate(["a.org", "a.org", "a.org", "b.org", "c.org"]):
+            await scheduler.put(paper(n, host))
+        await scheduler.close()
+        order = []
+        while (item := await scheduler.get()) is not None:
+            order.append(item["paper_id"])
+        return order
+
+    assert run(scenario()) == [0, 3, 4, 1, 2]
+
+
+def test_domain_concurrency_cap_and_done():
+    async def scenario():
+        scheduler = DomainScheduler(default_interval=0, default_concurrency=1)
+        first, second = paper(1, "a.org"), paper(2, "a.org")
+        await scheduler.put(first)
+        await scheduler.put(second)
+        assert await scheduler.get() is first
+
+        waiting = asyncio.create_task(scheduler.get())
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+
+        await scheduler.done(first)
+        assert await asyncio.wait_for(waiting, 1) is second
+
+    run(scenario())
+
+
+def test_overrides_apply_to_subdomains():
+    scheduler = DomainScheduler(default_interval=1.0, default_concurrency=2,
+                                overrides={"example.org": {"min_interval": 5.0}, "www.example.org": {"max_concurrency": 1}})
+    assert scheduler.interval("www.example.org") == 5.0
+    assert scheduler.concurrency("www.example.org") == 1
+    assert scheduler.concurrency("cdn.example.org") == 2
+    assert scheduler.interval("other.org") == 1.0
+
+
+def test_pick_skips_domains_inside_their_interval(monkeypatch):
+    monkeypatch.setattr(download.random, "uniform", lambda a, b: 1.0)
+
+    async def scenario():
+        scheduler = DomainScheduler(default_interval=10.0, default_concurrency=5)
+        await scheduler.pace("https://a.org/x")
+        start = scheduler._next_request["a.org"] - 10.0
+        await scheduler.put(paper(1, "a.org"))
+        await scheduler.put(paper(2, "b.org"))
+
+        item, wait = scheduler._pick(start + 1.0)
+        assert item["paper_id"] == 2
+        item, wait = scheduler._pick(start + 1.0)
+        assert item is None and wait == pytest.approx(9.0)
+        item, wait = scheduler._pick(start + 10.0)
+        assert item["paper_id"] == 1
+
+    run(scenario())
+
+
+def test_pace_spaces_requests_to_one_host(monkeypatch):
+    monkeypatch.setattr(download.random, "uniform", lambda a, b: 1.0)
+    sleeps = []
+
+    async def fake_sleep(seconds):
+        sleeps.append(seconds)
+
+    monkeypatch.setattr(download.asyncio, "sleep", fake_sleep)
+
+    async def scenario():
+        scheduler = DomainScheduler(default_interval=2.0)
+        await scheduler.pace("https://a.org/1")
+        await scheduler.pace("https://a.org/2")
+        await scheduler.pace("https://b.org/1")
+
+    run(scenario())
+    assert len(sleeps) == 1 and sleeps[0] == pytest.approx(2.0, abs=0.1)
+
+
+def test_put_blocks_at_max_pending():
+    async def scenario():
+        scheduler = DomainScheduler(default_interval=0, max_pending=2)
+        await scheduler.put(paper(1, "a.org"))
+        await scheduler.put(paper(2, "b.org"))
+        blocked = asyncio.create_task(scheduler.put(paper(3, "c.org")))
+        await asyncio.sleep(0.01)
+        assert not blocked.done() and len(scheduler) == 2
+
+        await scheduler.get()
+        await asyncio.wait_for(blocked, 1)
+        assert len(scheduler) == 2
+
+    run(scenario())
+
+
+def test_close_releases_waiting_workers():
+    async def scenario():
+        scheduler = DomainScheduler(default_interval=0)
+        workers = [asyncio.create_task(scheduler.get()) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        await scheduler.close()
+        return await asyncio.wait_for(asyncio.gather(*workers), 1)
+
+    assert run(scenario()) == [None, None, None]
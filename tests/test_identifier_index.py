@@ -0,0 +1,51 @@
+import pytest
+
+from modules import identifier_index
+from modules.identifier_index import IdentifierIndex, parse_meta_identifiers
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(identifier_index.time, "time", clock)
+    return clock
+
+
+def test_expired_miss_is_renewed_when_checked_again(tmp_path, clock):
+    index = IdentifierIndex(tmp_path / "ids.sqlite", negative_ttl=100)
+    index.add_missing(["10.1/Gone"], "doi")
+    assert index.lookup_many(["10.1/gone"], "doi") == {"10.1/gone": None}
+
+    clock.now += 101
+    assert index.lookup_many(["10.1/gone"], "doi") == {}
+
+    # OpenCitations was asked again and still does not know it
+    index.add_missing(["10.1/gone"], "doi")
+    assert index.lookup_many(["10.1/gone"], "doi") == {"10.1/gone": None}
+    assert index.omid_for("10.1/gone") == (True, None)
+
+
+def test_miss_never_overwrites_a_known_pair(tmp_path, clock):
+    index = IdentifierIndex(tmp_path / "ids.sqlite")
+    index.add_pairs([("10.1/a", "br/061")])
+    index.add_missing(["10.1/a"], "doi")
+    index.add_missing(["br/061"], "omid")
+    assert index.lookup_many(["10.1/A"], "doi") == {"10.1/A": "br/061"}
+    assert index.lookup_many(["061"], "omid") == {"061": "10.1/a"}
+
+
+def test_add_metadata_records_pairs_and_misses(tmp_path, clock):
+    metadata = [{"id": "doi:10.1/A omid:br/062 pmid:1"}]
+    assert parse_meta_identifiers(metadata) == [("10.1/a", "br/062")]
+
+    index = IdentifierIndex(tmp_path / "ids.sqlite")
+    index.add_metadata(metadata, queried=["10.1/a", "10.1/b"], kind="doi")
+    assert index.lookup_many(["10.1/a", "10.1/b"], "doi") == {"10.1/a": "br/062", "10.1/b": None}
@@ -0,0 +1,21 @@
+from urllib.parse import parse_qs, urlsplit
+
+from modules.paper_to_doi import batch_doi_url, doi_url, plan_doi_batches
+from modules.response_cache import ResponseCache
+
+
+def test_batch_doi_url_encodes_each_doi():
+    dois = ["10.1002/(SICI)1097-0258(19980815/30)17:15/16<1661::AID-SIM968>3.0.CO;2-2", "10.1/a&b#c+d"]
+    query = parse_qs(urlsplit(batch_doi_url(dois)).query)
+    assert query["filter"] == [",".join(f"doi:{doi}" for doi in dois)]
+    assert query["rows"] == ["2"]
+
+
+def test_plan_doi_batches_keeps_comma_dois_out_of_batches(tmp_path):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    cache.set(doi_url("10.1/cached"), 200, {"status": "ok", "message": {}})
+    dois = ["10.1/Cached", "10.1/a", "10.1/A", "10.1/x,y", None, "10.1/b"]
+
+    responses, batches = plan_doi_batches(dois, cache, batch_size=1)
+    assert set(responses) == {"10.1/cached"}
+    assert batches == [["10.1/a"], ["10.1/b"]]
@@ -0,0 +1,69 @@
+import hashlib
+
+from modules.pdf_store import PDFStore, read_index
+
+
+def add(store, paper_id, body):
+    part = store.temp_path(paper_id)
+    part.write_bytes(body)
+    return store.commit(paper_id, part, hashlib.sha256(body).hexdigest())
+
+
+def test_integer_paper_id_survives_reload(tmp_path):
+    body = b"%PDF-1.4 test"
+    with PDFStore(tmp_path) as store:
+        add(store, 42, body)
+
+    with PDFStore(tmp_path) as store:
+        assert 42 in store
+        assert store.path_for(42).read_bytes() == body
+        assert store.digest_for(42) == hashlib.sha256(body).hexdigest()
+
+
+def test_duplicate_pdf_is_stored_once(tmp_path):
+    body = b"%PDF-1.4 reprint"
+    with PDFStore(tmp_path) as store:
+        first, duplicate = add(store, 1, body)
+        assert not duplicate
+        second, duplicate = add(store, 2, body)
+        assert duplicate and second == first
+        add(store, 3, b"%PDF-1.4 other")
+
+        assert store.papers_for(hashlib.sha256(body).hexdigest()) == ["1", "2"]
+        assert store.stats() == {"papers": 3, "unique_pdfs": 2, "duplicates": 1}
+        assert not list(store.objects_dir.glob(".*.part"))
+        assert len(list(store.objects_dir.glob("*.pdf"))) == 2
+
+
+def test_read_index_uses_the_last_hash_of_a_paper(tmp_path):
+    old, new = b"%PDF-1.4 old", b"%PDF-1.4 new"
+    with PDFStore(tmp_path) as store:
+        add(store, 1, old)
+        add(store, 2, old)
+        add(store, 1, new)
+        index_path = store.index_path
+    with open(index_path, "a", encoding="utf-8") as fh:
+        fh.write("3\tnot-a-hash\n")
+
+    assert read_index(index_path) == {
+        hashlib.sha256(old).hexdigest(): ["2"],
+        hashlib.sha256(new).hexdigest(): ["1"],
+    }
+    with PDFStore(tmp_path) as store:
+        assert store.papers_for(hashlib.sha256(old).hexdigest()) == ["2"]
+        assert 3 not in store
+
+
+def test_import_directory_skips_indexed_papers(tmp_path):
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    (legacy / "10.pdf").write_bytes(b"%PDF-1.4 ten")
+    (legacy / "11.pdf").write_bytes(b"%PDF-1.4 eleven")
+
+    with PDFStore(tmp_path / "store") as store:
+        add(store, 11, b"%PDF-1.4 eleven, downloaded again")
+        assert store.import_directory(legacy) == 1
+        assert store.path_for(10).read_bytes() == b"%PDF-1.4 ten"
+        assert not (legacy / "10.pdf").exists()
+        assert (legacy / "11.pdf").exists()
+        assert store.import_directory(legacy) == 0
@@ -0,0 +1,77 @@
+import json
+
+from modules.pull_checkpoint import completed_ids, finish_resume, repair_tail, resume_rows
+
+
+def write_results(path, results, tail=""):
+    path.write_text("".join(json.dumps(r) + "\n" for r in results) + tail, encoding="utf-8")
+
+
+def test_repair_tail_drops_truncated_last_line(tmp_path):
+    path = tmp_path / "results.json"
+    write_results(path, [{"paper_id": 1, "error": "No Error"}], tail='{"paper_id": 2, "err')
+    intact = len(json.dumps({"paper_id": 1, "error": "No Error"})) + 1
+
+    assert repair_tail(path) == intact
+    assert path.read_text(encoding="utf-8").endswith("}\n")
+    assert repair_tail(path) == intact
+    assert repair_tail(tmp_path / "missing.json") == 0
+
+
+def test_repair_tail_without_any_complete_line(tmp_path):
+    path = tmp_path / "results.json"
+    path.write_text('{"paper_id": 1', encoding="utf-8")
+    assert repair_tail(path) == 0
+    assert path.read_bytes() == b""
+
+
+def test_completed_ids_with_and_without_retry_errors(tmp_path):
+    path = tmp_path / "results.json"
+    write_results(path, [
+        {"paper_id": 1, "error": "No Error"},
+        {"paper_id": 2, "error": "No DOI"},
+        {"error": "No Error"},
+    ], tail="not json\n")
+
+    assert completed_ids(path) == {1, 2}
+    assert completed_ids(path, retry_errors=True) == {1}
+    assert completed_ids(tmp_path / "missing.json") == set()
+
+
+def test_resume_with_retry_errors_replaces_failed_results(tmp_path):
+    path = tmp_path / "results.json"
+    write_results(path, [
+        {"paper_id": 1, "error": "No Error"},
+        {"paper_id": 2, "error": "No information found"},
+        {"paper_id": 3, "error": "No information found"},
+    ], tail='{"paper_id": 4')
+    rows = [{"recordid.": i} for i in range(1, 6)]
+
+    remaining, resumed_at = resume_rows(iter(rows), path, retry_errors=True)
+    assert [row["recordid."] for row in remaining] == [2, 3, 4, 5]
+
+    # Paper 2 now resolves, paper 3 fails again and paper 5 is new
+    with open(path, "a", encoding="utf-8") as fh:
+        for result in ({"paper_id": 2, "error": "No Error"},
+                       {"paper_id": 3, "error": "No information found"},
+                       {"paper_id": 5, "error": "No Error"}):
+            fh.write(json.dumps(result) + "\n")
+
+    assert finish_resume(path, resumed_at, retry_errors=True) == 2
+    results = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert results == [
+        {"paper_id": 1, "error": "No Error"},
+        {"paper_id": 2, "error": "No Error"},
+        {"paper_id": 3, "error": "No information found"},
+        {"paper_id": 5, "error": "No Error"},
+    ]
+
+
+def test_finish_resume_keeps_everything_without_retry_errors(tmp_path):
+    path = tmp_path / "results.json"
+    write_results(path, [{"paper_id": 1, "error": "No DOI"}])
+    remaining, resumed_at = resume_rows(iter([{"recordid.": 1}, {"recordid.": 2}]), path)
+    assert [row["recordid."] for row in remaining] == [2]
+    before = path.read_bytes()
+    assert finish_resume(path, resumed_at) == 0
+    assert path.read_bytes() == before
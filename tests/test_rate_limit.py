@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from modules import rate_limit
+from modules.rate_limit import TokenBucketRateLimiter, parse_interval
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "time", clock)
+    return clock
+
+
+@pytest.mark.parametrize("value, seconds", [("1s", 1.0), ("60s", 60.0), ("500ms", 0.5), ("2m", 120.0), ("3", 3.0), ("soon", None)])
+def test_parse_interval(value, seconds):
+    assert parse_interval(value) == seconds
+
+
+def test_burst_then_refill(clock):
+    limiter = TokenBucketRateLimiter(rate=2.0)
+    assert limiter.try_acquire() == 0.0
+    assert limiter.try_acquire() == 0.0
+    assert limiter.try_acquire() == pytest.approx(0.5)
+
+    clock.now += 0.5
+    assert limiter.try_acquire() == 0.0
+
+
+def test_429_backs_off_for_retry_after(clock):
+    limiter = TokenBucketRateLimiter(rate=10.0)
+    limiter.update_from_headers({"Retry-After": "3"}, status=429)
+    assert limiter.try_acquire() == pytest.approx(3.1)
+
+    clock.now += 3.2
+    assert limiter.try_acquire() == 0.0
+
+
+def test_rate_follows_advertised_limit(clock):
+    limiter = TokenBucketRateLimiter(rate=10.0, headroom=0.5)
+    limiter.update_from_headers({"X-Rate-Limit-Limit": "100", "X-Rate-Limit-Interval": "2s"}, status=200)
+    assert limiter.rate == pytest.approx(25.0)
+
+
+@pytest.mark.skipif(rate_limit.fcntl is None, reason="needs fcntl")
+def test_state_file_shares_the_budget_between_limiters(tmp_path, clock):
+    first = TokenBucketRateLimiter(rate=1.0, state_file=tmp_path / "bucket")
+    second = TokenBucketRateLimiter(rate=1.0, state_file=tmp_path / "bucket")
+    assert first.try_acquire() == 0.0
+    assert second.try_acquire() == pytest.approx(1.0)
+
+
+def test_acquire_async_waits_for_a_token(monkeypatch):
+    limiter = TokenBucketRateLimiter(rate=1.0)
+    waits = iter([0.25, 0.0])
+    monkeypatch.setattr(limiter, "try_acquire", lambda: next(waits))
+    slept = []
+
+    async def fake_sleep(seconds):
+        slept.append(seconds)
+
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", fake_sleep)
+    asyncio.run(limiter.acquire_async())
+    assert slept == [0.25]
@@ -0,0 +1,60 @@
+import json
+
+import pytest
+
+from modules.record_io import iter_records
+
+RECORDS = [
+    {"recordid.": 1, "citation": "Smith A. Methotrexate. J Rheumatol. 2001.", "score": 3.5e3},
+    {"recordid.": "2", "citation": "Doe J. [GCA], {tocilizumab}", "tags": ["a", "b"]},
+    {"recordid.": 3, "abstract": "café — \"quoted\"", "nested": {"x": [1, {"y": None}]}},
+]
+
+
+def test_jsonl_skips_blank_lines(tmp_path):
+    path = tmp_path / "papers.jsonl"
+    path.write_text("\n" + "\n\n".join(json.dumps(r) for r in RECORDS) + "\n\n", encoding="utf-8")
+    assert list(iter_records(path)) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 1 << 16])
+def test_json_array_any_chunk_size(tmp_path, chunk_size):
+    path = tmp_path / "papers.json"
+    path.write_text("  \n" + json.dumps(RECORDS, indent=2), encoding="utf-8")
+    assert list(iter_records(path, chunk_size=chunk_size)) == RECORDS
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3])
+def test_json_array_of_numbers_cut_at_chunk_boundaries(tmp_path, chunk_size):
+    path = tmp_path / "numbers.json"
+    path.write_text("[3.5e3, 12345, -0.25]", encoding="utf-8")
+    assert list(iter_records(path, chunk_size=chunk_size)) == [3.5e3, 12345, -0.25]
+
+
+def test_empty_json_array(tmp_path):
+    path = tmp_path / "empty.json"
+    path.write_text("[ ]", encoding="utf-8")
+    assert list(iter_records(path, chunk_size=1)) == []
+
+
+def test_records_are_yielded_before_the_file_is_read_fully(tmp_path):
+    path = tmp_path / "papers.json"
+    path.write_text(json.dumps(RECORDS)[:-1] + ", {broken", encoding="utf-8")
+    records = iter_records(path, chunk_size=8)
+    assert [next(records) for _ in RECORDS] == RECORDS
+    with pytest.raises(json.JSONDecodeError):
+        next(records)
+
+
+def test_malformed_jsonl_reports_line_number(tmp_path):
+    path = tmp_path / "papers.jsonl"
+    path.write_text(json.dumps(RECORDS[0]) + "\n{not json}\n", encoding="utf-8")
+    with pytest.raises(ValueError, match=r"papers\.jsonl:2:"):
+        list(iter_records(path))
+
+
+def test_missing_comma_in_json_array(tmp_path):
+    path = tmp_path / "papers.json"
+    path.write_text('[{"a": 1} {"b": 2}]', encoding="utf-8")
+    with pytest.raises(ValueError, match="Expected ','"):
+        list(iter_records(path))
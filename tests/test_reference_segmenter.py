@@ -0,0 +1,52 @@
+from modules import reference_segmenter
+from modules.reference_segmenter import is_numbered, segment_references
+
+
+def test_numbered_list_ignores_out_of_sequence_numbers():
+    bibliography = """
+1. Smith A. Methotrexate in early RA. J Rheumatol. 2001;28:1-9.
+2. Doe J. Tocilizumab in GCA.
+Published in 3. edition of the handbook.
+3) Lee K. Gout flares.
+- [4] Kim H. Lupus nephritis.
+"""
+    assert is_numbered(bibliography)
+    assert segment_references(bibliography) == [
+        "Smith A. Methotrexate in early RA. J Rheumatol. 2001;28:1-9.",
+        "Doe J. Tocilizumab in GCA.\nPublished in 3. edition of the handbook.",
+        "Lee K. Gout flares.",
+        "Kim H. Lupus nephritis.",
+    ]
+
+
+def test_numbered_list_without_line_breaks():
+    text = "[1] Smith A. First paper. 2001. [2] Doe J. Second paper. 2002. [3] Lee K. Third paper."
+    assert segment_references(text) == ["Smith A. First paper. 2001.", "Doe J. Second paper. 2002.", "Lee K. Third paper."]
+
+
+def test_author_year_references_with_continuation_lines():
+    bibliography = """References
+
+- Smith, A. (2019). Methotrexate in early rheumatoid arthritis.
+  Journal of Rheumatology, 46, 1-9.
+- Doe, J. and Roe, R. (2020a). Tocilizumab for giant cell arteritis.
+"""
+    assert not is_numbered(bibliography)
+    assert segment_references(bibliography) == [
+        "Smith, A. (2019). Methotrexate in early rheumatoid arthritis.\n  Journal of Rheumatology, 46, 1-9.",
+        "Doe, J. and Roe, R. (2020a). Tocilizumab for giant cell arteritis.",
+    ]
+
+
+def test_long_line_is_cut_at_author_heads(monkeypatch):
+    monkeypatch.setattr(reference_segmenter, "LONG_LINE", 50)
+    line = "Smith, A. (2019). First title. J Rheum. Doe, J. (2020). Second title. Ann Rheum Dis."
+    assert segment_references(line) == [
+        "Smith, A. (2019). First title. J Rheum.",
+        "Doe, J. (2020). Second title. Ann Rheum Dis.",
+    ]
+
+
+def test_empty_bibliography():
+    assert segment_references("") == []
+    assert segment_references("   \n\n") == []
@@ -0,0 +1,76 @@
+import pytest
+
+from modules import response_cache
+from modules.response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache.time, "time", clock)
+    return clock
+
+
+def test_positive_entry_expires_after_ttl(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=100, negative_ttl=10)
+    cache.set("url", 200, {"message": {"items": [1]}})
+    assert cache.get("url") == (200, {"message": {"items": [1]}})
+
+    clock.now += 101
+    assert cache.get("url") is None
+    assert len(cache) == 0  # Expired rows are dropped on read
+
+
+def test_misses_use_the_negative_ttl(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite", ttl=100, negative_ttl=10)
+    cache.store_response("empty", 200, {"message": {"items": []}})
+    cache.store_response("gone", 404, None)
+    assert cache.get("gone") == (404, None)
+
+    clock.now += 11
+    assert cache.get("empty") is None
+    assert cache.get("gone") is None
+
+
+def test_transient_errors_are_not_cached(tmp_path, clock):
+    cache = ResponseCache(tmp_path / "cache.sqlite")
+    cache.store_response("busy", 429, None)
+    cache.store_response("broken", 503, None)
+    assert cache.get("busy") is None
+    assert cache.get("broken") is None
+
+
+def test_eviction_drops_least_recently_used(tmp_path, clock, monkeypatch):
+    monkeypatch.setattr(response_cache, "_EVICT_EVERY", 5)
+    cache = ResponseCache(tmp_path / "cache.sqlite", max_entries=4)
+    for i in range(4):
+        cache.set(f"url{i}", 200, i)
+        clock.now += 1
+
+    clock.now += response_cache._TOUCH_INTERVAL + 1
+    assert cache.get("url0") == (200, 0)  # Refreshes its LRU timestamp
+
+    cache.set("url4", 200, 4)  # Fifth write triggers eviction down to 90% of the bound
+    assert cache.get("url0") is not None
+    assert cache.get("url4") is not None
+    assert cache.get("url1") is None
+    assert cache.get("url2") is None
+
+
+def test_disabled_and_refresh(tmp_path, clock):
+    path = tmp_path / "cache.sqlite"
+    ResponseCache(path).set("url", 200, 1)
+    assert ResponseCache(path, enabled=False).get("url") is None
+
+    refreshing = ResponseCache(path, refresh=True)
+    assert refreshing.get("url") is None
+    refreshing.set("url", 200, 2)
+    assert ResponseCache(path).get("url") == (200, 2)
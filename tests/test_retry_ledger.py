@@ -0,0 +1,31 @@
+from modules.retry_ledger import RetryLedger
+
+
+def test_integer_paper_id_survives_reload(tmp_path):
+    path = tmp_path / "retries.sqlite"
+    ledger = RetryLedger(path)
+    outcome = ledger.record_failure({"paper_id": 123, "url_1": "https://example.org/a"}, "HTML loaded, no PDF link found")
+    ledger.close()
+    assert not outcome["dead"]
+
+    # A new run reads str keys from SQLite while the input still holds an int
+    ledger = RetryLedger(path)
+    assert not ledger.should_try(123)
+    assert not ledger.should_try("123")
+    assert len(ledger.history(123)) == 1
+
+    ledger.record_success(123)
+    assert ledger.should_try(123)
+    ledger.close()
+
+
+def test_dead_integer_paper_id_stays_dead(tmp_path):
+    path = tmp_path / "retries.sqlite"
+    ledger = RetryLedger(path)
+    assert ledger.record_failure({"paper_id": 7}, "No URLs provided")["dead"]
+    ledger.close()
+
+    ledger = RetryLedger(path)
+    assert not ledger.should_try(7, now=float("inf"))
+    ledger.close()
+
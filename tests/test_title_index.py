@@ -0,0 +1,71 @@
+import numpy as np
+import pytest
+
+from modules import title_index
+from modules.title_index import TitleIndex, band_keys
+
+TITLES = [
+    "Methotrexate in early rheumatoid arthritis",
+    "Tocilizumab for giant cell arteritis",
+    "Belimumab in systemic lupus erythematosus",
+    "Ultrasound of the hand in psoriatic arthritis",
+    "Gout flares after starting allopurinol",
+    "Interstitial lung disease in systemic sclerosis",
+]
+
+
+def test_saved_generations_match_a_full_rebuild(tmp_path, monkeypatch):
+    monkeypatch.setattr(title_index, "_COPY_CHUNK", 3)  # Exercise the chunked copies
+    index = TitleIndex(tmp_path)
+    for i, title in enumerate(TITLES[:3]):
+        index.add(title, f"10.1/{i}")
+    index.save()
+    for i, title in enumerate(TITLES[3:], start=3):
+        index.add(title, f"10.1/{i}")
+    index.add(TITLES[1], "10.1/1")  # Equal keys: the stored entry stays first
+    index.save()
+
+    reloaded = TitleIndex(tmp_path)
+    assert len(reloaded) == len(TITLES) + 1
+    keys = band_keys(np.asarray(reloaded._signatures))
+    order = np.argsort(keys, axis=1, kind="stable")
+    assert np.array_equal(reloaded._band_keys, np.take_along_axis(keys, order, axis=1))
+    assert np.array_equal(reloaded._band_ids, order)
+    for i, title in enumerate(TITLES):
+        assert reloaded.match(title)["doi"] == f"10.1/{i}"
+
+
+def test_save_keeps_only_the_current_generation(tmp_path):
+    (tmp_path / "gen-000007").mkdir()  # Left by a save that crashed
+    index = TitleIndex(tmp_path)
+    index.add(TITLES[0], "10.1/0")
+    index.save()
+    index.add(TITLES[1], "10.1/1")
+    index.save()
+
+    current = (tmp_path / "CURRENT").read_text()
+    assert [d.name for d in tmp_path.glob("gen-*")] == [current]
+
+
+@pytest.mark.skipif(title_index.fcntl is None, reason="needs fcntl")
+def test_concurrent_saves_keep_both_deltas(tmp_path):
+    first, second = TitleIndex(tmp_path), TitleIndex(tmp_path)
+    first.add(TITLES[0], "10.1/0")
+    second.add(TITLES[1], "10.1/1")
+    first.save()
+    second.save()  # Merged on top of the generation `first` wrote
+
+    reloaded = TitleIndex(tmp_path)
+    assert len(reloaded) == 2
+    assert reloaded.match(TITLES[0])["doi"] == "10.1/0"
+    assert reloaded.match(TITLES[1])["doi"] == "10.1/1"
+
+
+def test_flat_layout_is_still_read(tmp_path):
+    index = TitleIndex(tmp_path / "new")
+    index.add(TITLES[0], "10.1/0")
+    index.save()
+    generation = (tmp_path / "new" / (tmp_path / "new" / "CURRENT").read_text())
+    generation.rename(tmp_path / "flat")
+
+    assert TitleIndex(tmp_path / "flat").match(TITLES[0])["doi"] == "10.1/0"